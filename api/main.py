@@ -1,19 +1,25 @@
 """
 FastAPI backend for Pitwall - serves gold layer data to frontend
 """
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.routing import Match
 from contextlib import asynccontextmanager
 import os
 import subprocess
 import threading
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
 from dotenv import load_dotenv
 import psycopg
 from psycopg_pool import ConnectionPool  
 from psycopg.rows import dict_row
 
+import gold_refresh
+from api.response_cache import (
+    cached_response, response_cache, etag_matches, cache_control_header,
+)
+
 load_dotenv()
 
 # Track database update status
@@ -27,6 +33,10 @@ update_status = {
     "log_file": None
 }
 
+# Cache lifetime of responses that also read silver tables (drivers, team branding), which
+# can change without a gold refresh
+SILVER_READ_TTL = 300
+
 # Database connection pool
 db_pool: ConnectionPool | None = None
 
@@ -47,8 +57,10 @@ async def lifespan(app: FastAPI):
         min_size=1,
         max_size=10,
     )
+    response_cache.attach(db_pool)
     yield
     # Cleanup
+    response_cache.attach(None)
     if db_pool:
         db_pool.close()
 
@@ -60,6 +72,41 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+
+def cached_route_ttl(request: Request) -> Optional[float]:
+    """Cache lifetime of the @cached_response endpoint the request is routed to, if any."""
+    for route in app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return getattr(getattr(route, 'endpoint', None), 'cache_ttl', None)
+    return None
+
+
+# Registered before CORS so that CORSMiddleware wraps it and adds its headers to 304s too
+@app.middleware("http")
+async def gold_etag_middleware(request: Request, call_next):
+    """
+    Conditional GETs for the cached gold-backed endpoints.
+
+    @cached_response sends the ETag of the body it serves (a hash of it), so the tag only
+    matches while the response is unchanged. A client whose copy is current gets a 304
+    instead of the body; the endpoint itself is served from the response cache.
+    Cache-Control lets browsers and the CDN reuse responses briefly and revalidate.
+    """
+    if request.method != "GET" or cached_route_ttl(request) is None:
+        return await call_next(request)
+
+    response = await call_next(request)
+    etag = response.headers.get("etag")
+    if response.status_code != 200 or etag is None:
+        return response
+
+    headers = {"ETag": etag, "Cache-Control": cache_control_header()}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return response
+
 # CORS middleware - allow frontend origins
 ALLOWED_ORIGINS = [
     "http://localhost:5174",
@@ -93,6 +140,7 @@ def root():
 
 
 @app.get("/api/drivers")
+@cached_response()
 def get_drivers(season: int = None):
     """Get drivers from gold.dim_drivers"""
     if not db_pool:
@@ -111,6 +159,7 @@ def get_drivers(season: int = None):
 
 
 @app.get("/api/teams")
+@cached_response()
 def get_teams(season: int = None):
     """Get teams from gold.dim_teams"""
     if not db_pool:
@@ -129,6 +178,7 @@ def get_teams(season: int = None):
 
 
 @app.get("/api/meetings")
+@cached_response()
 def get_meetings(season: int = None):
     """Get meetings from gold.dim_meetings"""
     if not db_pool:
@@ -147,6 +197,7 @@ def get_meetings(season: int = None):
 
 
 @app.get("/api/seasons")
+@cached_response()
 def get_seasons():
     """Get distinct seasons that have meeting data, ordered descending"""
     if not db_pool:
@@ -161,6 +212,7 @@ def get_seasons():
 
 
 @app.get("/api/circuits")
+@cached_response()
 def get_circuits():
     """Get circuits from gold.dim_circuits"""
     if not db_pool:
@@ -254,6 +306,7 @@ def get_circuit_images(circuit_id: str, image_type: str = None, cover_only: bool
 
 
 @app.get("/api/meetings/{meeting_id}")
+@cached_response()
 def get_meeting(meeting_id: str):
     """Get a specific meeting by ID"""
     if not db_pool:
@@ -272,6 +325,7 @@ def get_meeting(meeting_id: str):
 
 
 @app.get("/api/meetings/{meeting_id}/sessions")
+@cached_response()
 def get_meeting_sessions(meeting_id: str):
     """Get all sessions for a specific meeting"""
     if not db_pool:
@@ -310,6 +364,7 @@ def get_meeting_sessions(meeting_id: str):
 
 
 @app.get("/api/sessions/{session_id}")
+@cached_response()
 def get_session(session_id: str):
     """Get session summary by ID"""
     if not db_pool:
@@ -328,6 +383,7 @@ def get_session(session_id: str):
 
 
 @app.get("/api/sessions/{session_id}/classification")
+@cached_response(ttl=SILVER_READ_TTL)
 def get_session_classification(session_id: str):
     """Get classification (results) for a specific session"""
     if not db_pool:
@@ -356,6 +412,7 @@ def get_session_classification(session_id: str):
 
 
 @app.get("/api/sessions/{session_id}/lap-chart")
+@cached_response()
 def get_lap_chart(session_id: str):
     """Get lap-by-lap position data for a session from gold.lap_intervals"""
     if not db_pool:
@@ -382,7 +439,229 @@ def get_lap_chart(session_id: str):
             return cur.fetchall()
 
 
+# Telemetry levels (gold.telemetry_lod), finest first: (level, seconds per point).
+# 'full' reads raw samples (~3.7 Hz); 'lap' has one point per lap.
+TELEMETRY_LEVELS = [
+    ("full", 1 / 3.7),
+    ("1s", 1),
+    ("5s", 5),
+]
+# Upper bound for max_points (raw samples or buckets per response)
+TELEMETRY_MAX_POINTS = 20000
+
+
+@app.get("/api/sessions/{session_id}/telemetry")
+def get_session_telemetry(
+    session_id: str,
+    driver_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    max_points: int = 2000,
+):
+    """
+    Get a driver's telemetry for a time range at the finest level that fits max_points.
+
+    Uses raw samples when the range is short enough, otherwise the 1s / 5s / per-lap
+    buckets from gold.telemetry_lod (min/max/mean per channel). start / end default to
+    the session's start and end time; times without a timezone are taken as UTC.
+    """
+    if not db_pool:
+        raise HTTPException(status_code=500, detail="Database pool not initialized")
+    if not 1 <= max_points <= TELEMETRY_MAX_POINTS:
+        raise HTTPException(status_code=400, detail=f"max_points must be between 1 and {TELEMETRY_MAX_POINTS}")
+    start = start.replace(tzinfo=timezone.utc) if start and start.tzinfo is None else start
+    end = end.replace(tzinfo=timezone.utc) if end and end.tzinfo is None else end
+
+    with db_pool.connection() as conn:
+        with conn.cursor(row_factory=dict_row) as cur:
+            cur.execute(
+                "SELECT start_time, end_time FROM silver.sessions WHERE session_id = %s",
+                (session_id,)
+            )
+            session = cur.fetchone()
+            if not session:
+                raise HTTPException(status_code=404, detail="Session not found")
+
+            start = start or session["start_time"]
+            end = end or session["end_time"]
+            if start is None or end is None:
+                raise HTTPException(status_code=404, detail="Session has no start or end time; pass start and end")
+            if end <= start:
+                raise HTTPException(status_code=400, detail="end must be after start")
+            duration_s = (end - start).total_seconds()
+
+            level = "lap"
+            for candidate, seconds_per_point in TELEMETRY_LEVELS:
+                if duration_s / seconds_per_point <= max_points:
+                    level = candidate
+                    break
+
+            if level == "full":
+                cur.execute("""
+                    SELECT date, speed_kph, rpm, throttle, brake, n_gear, drs
+                    FROM silver.car_telemetry_samples
+                    WHERE session_id = %s
+                      AND driver_id = %s
+                      AND date BETWEEN %s AND %s
+                    ORDER BY date
+                """, (session_id, driver_id, start, end))
+            else:
+                cur.execute("""
+                    SELECT
+                        bucket_start, bucket_end, lap_number, sample_count,
+                        speed_min, speed_max, speed_mean,
+                        rpm_min, rpm_max, rpm_mean,
+                        throttle_min, throttle_max, throttle_mean,
+                        brake_max, brake_mean,
+                        n_gear_min, n_gear_max,
+                        drs_max
+                    FROM gold.telemetry_lod
+                    WHERE session_id = %s
+                      AND driver_id = %s
+                      AND level = %s
+                      AND bucket_end >= %s
+                      AND bucket_start <= %s
+                    ORDER BY bucket_start
+                """, (session_id, driver_id, level, start, end))
+
+            return {"level": level, "start": start, "end": end, "points": cur.fetchall()}
+
+
+LAP_COMPARE_CHANNELS = ["speed_kph", "throttle", "brake"]
+
+
+def resolve_lap_number(cur, session_id: str, driver_id: str, lap: str) -> int:
+    """Turn a lap query value (a lap number or "fastest") into a lap number."""
+    if lap != "fastest":
+        try:
+            return int(lap)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid lap: {lap}")
+
+    cur.execute("""
+        SELECT lap_number
+        FROM gold.lap_times
+        WHERE session_id = %s
+          AND driver_id = %s
+          AND lap_duration_ms IS NOT NULL
+          AND is_valid IS NOT FALSE
+        ORDER BY lap_duration_ms
+        LIMIT 1
+    """, (session_id, driver_id))
+    row = cur.fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail=f"No timed laps for {driver_id}")
+    return row["lap_number"]
+
+
+def interpolate(xs: list, ys: list, grid: list) -> list:
+    """
+    Linearly interpolate ys (sampled at ascending xs) at each ascending grid point.
+
+    One merge pass over both sequences. Points outside xs take the nearest end value.
+    """
+    values = []
+    i = 0
+    last = len(xs) - 1
+    for g in grid:
+        while i < last and xs[i + 1] < g:
+            i += 1
+        if g <= xs[0] or i == last:
+            y = ys[0] if g <= xs[0] else ys[last]
+        else:
+            x0, x1, y0, y1 = xs[i], xs[i + 1], ys[i], ys[i + 1]
+            if y0 is None or y1 is None or x1 == x0:
+                y = y0 if y0 is not None else y1
+            else:
+                y = y0 + (y1 - y0) * (g - x0) / (x1 - x0)
+        values.append(y)
+    return values
+
+
+def compute_lap_compare(cur, session_id: str, driver_a: str, lap_a: int,
+                        driver_b: str, lap_b: int, points: int) -> dict:
+    """Distance-aligned traces and time delta for two resolved laps."""
+    laps = []
+    for driver_id, lap_number in ((driver_a, lap_a), (driver_b, lap_b)):
+        # Time is measured from the lap start, where lap_distance_m is 0
+        cur.execute("""
+            SELECT t.sample_timestamp, l.date_start, t.lap_distance_m,
+                   t.speed_kph, t.throttle, t.brake
+            FROM gold.telemetry_trace t
+            INNER JOIN silver.laps l ON t.lap_id = l.lap_id
+            WHERE t.session_id = %s
+              AND t.driver_id = %s
+              AND t.lap_number = %s
+              AND t.lap_distance_m IS NOT NULL
+            ORDER BY t.sample_timestamp
+        """, (session_id, driver_id, lap_number))
+        samples = cur.fetchall()
+        if len(samples) < 2:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No telemetry for {driver_id} lap {lap_number}"
+            )
+        laps.append(samples)
+
+    # Common distance grid over the part of the lap both drivers covered
+    lap_length_m = min(samples[-1]["lap_distance_m"] for samples in laps)
+    grid = [lap_length_m * i / (points - 1) for i in range(points)]
+
+    traces = []
+    for samples in laps:
+        distance = [s["lap_distance_m"] for s in samples]
+        start = samples[0]["date_start"]
+        elapsed = [(s["sample_timestamp"] - start).total_seconds() for s in samples]
+        # The line crossing itself: distance 0 at time 0
+        trace = {"time_s": interpolate([0.0] + distance, [0.0] + elapsed, grid)}
+        for channel in LAP_COMPARE_CHANNELS:
+            trace[channel] = interpolate(distance, [s[channel] for s in samples], grid)
+        traces.append(trace)
+
+    return {
+        "session_id": session_id,
+        "lap_a": {"driver_id": driver_a, "lap_number": lap_a, **traces[0]},
+        "lap_b": {"driver_id": driver_b, "lap_number": lap_b, **traces[1]},
+        "distance_m": grid,
+        # Positive when lap B is behind lap A at that distance
+        "delta_s": [tb - ta for ta, tb in zip(traces[0]["time_s"], traces[1]["time_s"])],
+    }
+
+
+@app.get("/api/sessions/{session_id}/lap-compare")
+@cached_response(ttl=SILVER_READ_TTL)
+def get_lap_compare(
+    session_id: str,
+    driver_a: str,
+    driver_b: str,
+    lap_a: str = "fastest",
+    lap_b: str = "fastest",
+    points: int = 500,
+):
+    """
+    Compare two laps by distance along the lap (gold.telemetry_trace.lap_distance_m).
+
+    lap_a / lap_b take a lap number or "fastest" (the driver's fastest valid lap).
+    Returns speed, throttle and brake for both laps on a common distance grid of
+    `points` points plus the cumulative time delta of lap B against lap A.
+    Cached with the silver-reading endpoints' TTL, since gold.telemetry_trace is rebuilt
+    per session without a gold refresh.
+    """
+    if not db_pool:
+        raise HTTPException(status_code=500, detail="Database pool not initialized")
+    if not 2 <= points <= 5000:
+        raise HTTPException(status_code=400, detail="points must be between 2 and 5000")
+
+    with db_pool.connection() as conn:
+        with conn.cursor(row_factory=dict_row) as cur:
+            lap_a_number = resolve_lap_number(cur, session_id, driver_a, lap_a)
+            lap_b_number = resolve_lap_number(cur, session_id, driver_b, lap_b)
+            return compute_lap_compare(cur, session_id, driver_a, lap_a_number,
+                                       driver_b, lap_b_number, points)
+
+
 @app.get("/api/segment-meaning")
+@cached_response()
 def get_segment_meaning():
     """Lookup for sector segment values -> meaning/color"""
     if not db_pool:
@@ -403,6 +682,7 @@ def get_segment_meaning():
 
 
 @app.get("/api/session-summary")
+@cached_response()
 def get_session_summary(season: int = None, session_type: str = None):
     """Get session summaries from gold.session_summary"""
     if not db_pool:
@@ -428,6 +708,7 @@ def get_session_summary(season: int = None, session_type: str = None):
 
 
 @app.get("/api/driver-standings")
+@cached_response()
 def get_driver_standings(season: int = None):
     """Get driver standings progression from gold.driver_standings_progression"""
     if not db_pool:
@@ -448,6 +729,7 @@ def get_driver_standings(season: int = None):
 
 
 @app.get("/api/lap-times")
+@cached_response()
 def get_lap_times(session_id: str = None, driver_id: str = None):
     """Get lap times from gold.lap_times"""
     if not db_pool:
@@ -473,6 +755,7 @@ def get_lap_times(session_id: str = None, driver_id: str = None):
 
 
 @app.get("/api/circuit-overtake-stats")
+@cached_response()
 def get_circuit_overtake_stats():
     """Get circuit overtake statistics"""
     if not db_pool:
@@ -485,185 +768,96 @@ def get_circuit_overtake_stats():
 
 
 @app.get("/api/standings/drivers")
+@cached_response()
 def get_driver_standings_by_meeting(season: int = 2024):
     """
     Get driver championship standings progression by meeting.
     Returns the cumulative points for each driver after each meeting (round).
     Filters to only the top 20 drivers by number of meetings participated.
-    Fills in missing rounds with carried-forward cumulative points.
+    Missing rounds carry the previous cumulative points (gold.championship_grid).
     """
     if not db_pool:
         raise HTTPException(status_code=500, detail="Database pool not initialized")
     
     query = """
-        WITH driver_meeting_counts AS (
-            SELECT 
-                driver_id,
-                COUNT(DISTINCT round_number) as meeting_count
-            FROM gold.driver_standings_progression
-            WHERE season = %s
-            GROUP BY driver_id
-            ORDER BY meeting_count DESC
-            LIMIT 20
-        ),
-        all_rounds AS (
-            SELECT DISTINCT 
-                round_number,
-                meeting_name,
-                meeting_short_name,
-                country_code,
-                emoji_flag,
-                flag_url
-            FROM gold.driver_standings_progression
-            WHERE season = %s
-        ),
-        top_drivers AS (
-            SELECT DISTINCT ON (dsp.driver_id)
-                dsp.driver_id,
-                dsp.driver_number,
-                dsp.driver_name,
-                dsp.name_acronym,
-                d.first_name,
-                d.last_name,
-                d.headshot_url,
-                d.headshot_override,
-                dsp.team_id,
-                dsp.team_name,
-                dsp.color_hex,
-                dt.logo_url
-            FROM gold.driver_standings_progression dsp
-            INNER JOIN driver_meeting_counts dmc ON dsp.driver_id = dmc.driver_id
-            LEFT JOIN gold.dim_teams dt ON dsp.team_id = dt.team_id AND dt.season = %s
-            LEFT JOIN silver.drivers d ON dsp.driver_id = d.driver_id
-            WHERE dsp.season = %s
-            ORDER BY dsp.driver_id, dsp.round_number DESC
-        ),
-        driver_round_grid AS (
-            SELECT 
-                td.driver_id,
-                td.driver_number,
-                td.driver_name,
-                td.name_acronym,
-                td.first_name,
-                td.last_name,
-                td.headshot_url,
-                td.headshot_override,
-                td.team_id,
-                td.team_name,
-                td.color_hex,
-                td.logo_url,
-                ar.round_number,
-                ar.meeting_name,
-                ar.meeting_short_name,
-                ar.country_code,
-                ar.emoji_flag,
-                ar.flag_url
-            FROM top_drivers td
-            CROSS JOIN all_rounds ar
-        ),
-        actual_points AS (
-            SELECT 
-                dsp.driver_id,
-                dsp.round_number,
-                MAX(dsp.cumulative_points) as cumulative_points
-            FROM gold.driver_standings_progression dsp
-            INNER JOIN driver_meeting_counts dmc ON dsp.driver_id = dmc.driver_id
-            WHERE dsp.season = %s
-            GROUP BY dsp.driver_id, dsp.round_number
-        )
         SELECT 
-            %s as season,
-            drg.round_number,
-            drg.meeting_name,
-            drg.meeting_short_name,
-            drg.country_code,
-            drg.emoji_flag,
-            drg.flag_url,
-            drg.driver_id,
-            drg.driver_number,
-            drg.driver_name,
-            drg.name_acronym,
-            drg.first_name,
-            drg.last_name,
-            drg.headshot_url,
-            drg.headshot_override,
-            drg.team_id,
-            drg.team_name,
-            drg.color_hex,
-            drg.logo_url,
-            COALESCE(
-                ap.cumulative_points,
-                (SELECT MAX(ap2.cumulative_points) 
-                 FROM actual_points ap2 
-                 WHERE ap2.driver_id = drg.driver_id 
-                   AND ap2.round_number < drg.round_number),
-                0
-            ) as cumulative_points
-        FROM driver_round_grid drg
-        LEFT JOIN actual_points ap 
-            ON drg.driver_id = ap.driver_id 
-            AND drg.round_number = ap.round_number
-        ORDER BY drg.round_number, drg.driver_name
+            season,
+            round_number,
+            meeting_name,
+            meeting_short_name,
+            country_code,
+            emoji_flag,
+            flag_url,
+            driver_id,
+            driver_number,
+            driver_name,
+            name_acronym,
+            first_name,
+            last_name,
+            headshot_url,
+            headshot_override,
+            team_id,
+            team_name,
+            color_hex,
+            logo_url,
+            cumulative_points,
+            position
+        FROM gold.championship_grid
+        WHERE season = %s
+          AND entity_type = 'driver'
+          AND participation_rank <= 20
+        ORDER BY round_number, driver_name
     """
     
     with db_pool.connection() as conn:
         with conn.cursor(row_factory=dict_row) as cur:
-            cur.execute(query, (season, season, season, season, season, season))
+            cur.execute(query, (season,))
             return cur.fetchall()
 
 
 @app.get("/api/standings/constructors")
+@cached_response()
 def get_constructor_standings_by_meeting(season: int = 2024):
     """
     Get constructor championship standings progression by meeting.
     Returns the cumulative points for each team after each meeting (round).
     Filters to only teams that participated in the season (top 10 by meeting count).
+    Missing rounds carry the previous cumulative points (gold.championship_grid).
     """
     if not db_pool:
         raise HTTPException(status_code=500, detail="Database pool not initialized")
     
     query = """
-        WITH team_meeting_counts AS (
-            SELECT 
-                team_id,
-                COUNT(DISTINCT round_number) as meeting_count
-            FROM gold.constructor_standings_progression
-            WHERE season = %s
-            GROUP BY team_id
-            ORDER BY meeting_count DESC
-            LIMIT 10
-        )
         SELECT 
-            csp.season,
-            csp.round_number,
-            csp.meeting_name,
-            csp.meeting_short_name,
-            csp.country_code,
-            csp.emoji_flag,
-            csp.flag_url,
-            csp.team_id,
-            csp.team_name,
-            csp.display_name,
-            csp.color_hex,
-            dt.logo_url,
-            MAX(csp.cumulative_points) as cumulative_points
-        FROM gold.constructor_standings_progression csp
-        INNER JOIN team_meeting_counts tmc ON csp.team_id = tmc.team_id
-        LEFT JOIN gold.dim_teams dt ON csp.team_id = dt.team_id AND dt.season = csp.season
-        WHERE csp.season = %s
-        GROUP BY 
-            csp.season, csp.round_number, csp.meeting_name, csp.meeting_short_name,
-            csp.country_code, csp.emoji_flag, csp.flag_url, csp.team_id, csp.team_name, csp.display_name, csp.color_hex, dt.logo_url
-        ORDER BY csp.round_number, csp.team_name
+            season,
+            round_number,
+            meeting_name,
+            meeting_short_name,
+            country_code,
+            emoji_flag,
+            flag_url,
+            team_id,
+            team_name,
+            display_name,
+            color_hex,
+            logo_url,
+            cumulative_points,
+            position
+        FROM gold.championship_grid
+        WHERE season = %s
+          AND entity_type = 'constructor'
+          AND participation_rank <= 10
+        ORDER BY round_number, team_name
     """
     
     with db_pool.connection() as conn:
         with conn.cursor(row_factory=dict_row) as cur:
-            cur.execute(query, (season, season))
+            cur.execute(query, (season,))
             return cur.fetchall()
 
 
 @app.get("/api/teams/roster")
+@cached_response(ttl=SILVER_READ_TTL)
 def get_teams_roster(season: int = 2025):
     """
     Get the current roster of teams for a season.
@@ -692,6 +886,7 @@ def get_teams_roster(season: int = 2025):
 
 
 @app.get("/api/drivers/roster")
+@cached_response(ttl=SILVER_READ_TTL)
 def get_drivers_roster(season: int = 2025):
     """
     Get the current roster of permanent drivers for a season.
@@ -759,6 +954,7 @@ def get_drivers_roster(season: int = 2025):
 
 
 @app.get("/api/drivers/{driver_id}")
+@cached_response(ttl=SILVER_READ_TTL)
 def get_driver_detail(driver_id: str, season: int = 2025):
     """
     Get detailed information about a specific driver for a season.
@@ -812,20 +1008,13 @@ def get_driver_detail(driver_id: str, season: int = 2025):
             """, (driver_id, season))
             season_stats = cur.fetchone()
             
-            # Get championship position (based on final cumulative points)
+            # Get championship position (after the season's latest round)
             cur.execute("""
-                WITH final_points AS (
-                    SELECT 
-                        driver_id,
-                        MAX(cumulative_points) as final_points
-                    FROM gold.driver_standings_progression
-                    WHERE season = %s
-                    GROUP BY driver_id
-                )
-                SELECT 
-                    ROW_NUMBER() OVER (ORDER BY final_points DESC) as position
-                FROM final_points
-                WHERE driver_id = %s
+                SELECT position
+                FROM gold.championship_grid
+                WHERE season = %s AND entity_type = 'driver' AND entity_id = %s
+                ORDER BY round_number DESC
+                LIMIT 1
             """, (season, driver_id))
             position_result = cur.fetchone()
             championship_position = position_result['position'] if position_result else None
@@ -879,6 +1068,7 @@ def get_driver_detail(driver_id: str, season: int = 2025):
 
 
 @app.get("/api/teams/{team_id}")
+@cached_response(ttl=SILVER_READ_TTL)
 def get_team_detail(team_id: str, season: int = 2025):
     """
     Get detailed information about a specific team for a season.
@@ -939,20 +1129,13 @@ def get_team_detail(team_id: str, season: int = 2025):
             """, (team_id, season, team_id, season))
             season_stats = cur.fetchone()
             
-            # Get championship position (based on final cumulative points)
+            # Get championship position (after the season's latest round)
             cur.execute("""
-                WITH final_points AS (
-                    SELECT 
-                        team_id,
-                        MAX(cumulative_points) as final_points
-                    FROM gold.constructor_standings_progression
-                    WHERE season = %s
-                    GROUP BY team_id
-                )
-                SELECT 
-                    ROW_NUMBER() OVER (ORDER BY final_points DESC) as position
-                FROM final_points
-                WHERE team_id = %s
+                SELECT position
+                FROM gold.championship_grid
+                WHERE season = %s AND entity_type = 'constructor' AND entity_id = %s
+                ORDER BY round_number DESC
+                LIMIT 1
             """, (season, team_id))
             position_result = cur.fetchone()
             championship_position = position_result['position'] if position_result else None
@@ -1326,40 +1509,165 @@ def get_docker_status():
 def refresh_gold_views_endpoint():
     """
     Refresh only the gold materialized views (fast operation).
+
+    Independent views are refreshed at the same time on pooled connections, and
+    concurrently (or swapped in from a shadow copy) where possible, so API reads keep
+    being served during the refresh.
     """
     if not db_pool:
         raise HTTPException(status_code=500, detail="Database pool not initialized")
     
-    views = [
-        'gold.dim_drivers',
-        'gold.dim_teams',
-        'gold.dim_circuits',
-        'gold.dim_meetings',
-        'gold.driver_session_results',
-        'gold.session_classification',
-        'gold.session_summary',
-        'gold.lap_times',
-        'gold.lap_intervals',
-        'gold.driver_standings_progression',
-        'gold.constructor_standings_progression',
-        'gold.circuit_overtake_stats',
-    ]
+    refresh = gold_refresh.refresh_views(db_pool)
+    if refresh.get("data_version"):
+        response_cache.set_version(refresh["data_version"])
+    results = {"success": [], "failed": [], "wall_seconds": refresh["wall_seconds"]}
     
-    results = {"success": [], "failed": []}
-    
-    # Use individual connections for each view to prevent transaction abort cascade
-    for view in views:
-        try:
-            with db_pool.connection() as conn:
-                with conn.cursor() as cur:
-                    cur.execute(f"REFRESH MATERIALIZED VIEW {view}")
-                    conn.commit()
-            results["success"].append(view.split('.')[-1])
-        except Exception as e:
-            results["failed"].append({"view": view.split('.')[-1], "error": str(e)})
+    for detail in refresh["details"]:
+        if detail["success"]:
+            results["success"].append({
+                "view": detail["view"],
+                "mode": detail["mode"],
+                "duration": detail["duration"]
+            })
+        else:
+            results["failed"].append({
+                "view": detail["view"],
+                "error": detail.get("error", "dependency did not refresh")
+            })
     
     return {
         "message": f"Refreshed {len(results['success'])} views",
         "results": results
     }
 
+
+@app.get("/api/ops/stage-runs")
+def get_stage_runs(phase: Optional[str] = None, stage: Optional[str] = None, limit: int = 100):
+    """
+    Get recorded pipeline stage runs from ops.stage_runs, most recent first.
+
+    Args:
+        phase: Only this phase ('bronze', 'silver' or 'gold')
+        stage: Only this script or gold view (e.g. 'upsert_laps.py', 'gold.lap_times')
+        limit: Maximum number of runs (1-5000)
+    """
+    if not db_pool:
+        raise HTTPException(status_code=500, detail="Database pool not initialized")
+    if not 1 <= limit <= 5000:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 5000")
+    
+    with db_pool.connection() as conn:
+        with conn.cursor(row_factory=dict_row) as cur:
+            cur.execute("""
+                SELECT
+                    stage_run_id,
+                    phase,
+                    stage,
+                    mode,
+                    started_at,
+                    finished_at,
+                    duration_ms,
+                    success,
+                    rows_read,
+                    rows_written,
+                    bytes_written,
+                    peak_rss_kb,
+                    error
+                FROM ops.stage_runs
+                WHERE (%(phase)s::text IS NULL OR phase = %(phase)s)
+                  AND (%(stage)s::text IS NULL OR stage = %(stage)s)
+                ORDER BY started_at DESC
+                LIMIT %(limit)s
+            """, {'phase': phase, 'stage': stage, 'limit': limit})
+            return cur.fetchall()
+
+
+@app.get("/api/ops/stage-runs/trends")
+def get_stage_run_trends(phase: Optional[str] = None, days: int = 30, baseline_runs: int = 10):
+    """
+    Compare each stage's latest run with its recent history, slowest regressions first.
+
+    For every stage run in the last `days` days, returns the latest run next to the median
+    duration, rows written and peak RSS of the `baseline_runs` successful runs before it.
+    duration_ratio > 1 means the latest run was slower than usual.
+    """
+    if not db_pool:
+        raise HTTPException(status_code=500, detail="Database pool not initialized")
+    if days < 1 or baseline_runs < 1:
+        raise HTTPException(status_code=400, detail="days and baseline_runs must be positive")
+    
+    with db_pool.connection() as conn:
+        with conn.cursor(row_factory=dict_row) as cur:
+            cur.execute("""
+                WITH runs AS (
+                    SELECT
+                        phase,
+                        stage,
+                        started_at,
+                        success,
+                        duration_ms,
+                        rows_written,
+                        peak_rss_kb,
+                        ROW_NUMBER() OVER (
+                            PARTITION BY phase, stage
+                            ORDER BY started_at DESC
+                        ) AS run_index
+                    FROM ops.stage_runs
+                    WHERE started_at >= NOW() - make_interval(days => %(days)s)
+                      AND (%(phase)s::text IS NULL OR phase = %(phase)s)
+                ),
+                previous_successes AS (
+                    -- Successful runs before the latest one, numbered after filtering so
+                    -- failed runs do not shrink the baseline
+                    SELECT
+                        phase,
+                        stage,
+                        duration_ms,
+                        rows_written,
+                        peak_rss_kb,
+                        ROW_NUMBER() OVER (
+                            PARTITION BY phase, stage
+                            ORDER BY started_at DESC
+                        ) AS success_index
+                    FROM runs
+                    WHERE run_index > 1
+                      AND success
+                ),
+                baseline AS (
+                    SELECT
+                        phase,
+                        stage,
+                        COUNT(*) AS baseline_runs,
+                        percentile_cont(0.5) WITHIN GROUP (ORDER BY duration_ms) AS median_duration_ms,
+                        percentile_cont(0.5) WITHIN GROUP (ORDER BY rows_written) AS median_rows_written,
+                        percentile_cont(0.5) WITHIN GROUP (ORDER BY peak_rss_kb) AS median_peak_rss_kb
+                    FROM previous_successes
+                    WHERE success_index <= %(baseline_runs)s
+                    GROUP BY phase, stage
+                )
+                SELECT
+                    r.phase,
+                    r.stage,
+                    r.started_at AS last_started_at,
+                    r.success AS last_success,
+                    r.duration_ms AS last_duration_ms,
+                    b.median_duration_ms,
+                    ROUND((r.duration_ms / NULLIF(b.median_duration_ms, 0))::NUMERIC, 2) AS duration_ratio,
+                    r.rows_written AS last_rows_written,
+                    b.median_rows_written,
+                    r.peak_rss_kb AS last_peak_rss_kb,
+                    b.median_peak_rss_kb,
+                    COALESCE(b.baseline_runs, 0) AS baseline_runs
+                FROM runs r
+                LEFT JOIN baseline b ON b.phase = r.phase AND b.stage = r.stage
+                WHERE r.run_index = 1
+                ORDER BY duration_ratio DESC NULLS LAST, r.phase, r.stage
+            """, {'phase': phase, 'days': days, 'baseline_runs': baseline_runs})
+            return cur.fetchall()
+
+
+
+@app.get("/api/ops/response-cache")
+def get_response_cache_stats():
+    """Get the in-memory response cache's size, hit/miss counters and gold data version"""
+    return response_cache.stats()
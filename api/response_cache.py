@@ -0,0 +1,213 @@
+"""
+In-memory response cache for the gold-backed API endpoints.
+
+The gold materialized views only change when they are refreshed, and every refresh bumps
+gold.data_version (init-db/34-create-gold-data-version.sql). Endpoints decorated with
+@cached_response() keep their rendered JSON in memory, keyed by route and parameters and
+tagged with the data version it was built from. A repeat request is served from memory
+while the version is unchanged and the entry's TTL has not run out.
+
+The version is read from the database at most every API_CACHE_VERSION_CHECK_SECONDS, so a
+refresh run by update_database.py elsewhere is picked up within that interval. When the
+version cannot be read (no pool, migration not applied) requests bypass the cache.
+
+Every entry carries a strong ETag, a hash of its body (body_etag()), sent with the
+response. api/main.py answers a matching If-None-Match with 304 instead of the body, and
+sets Cache-Control so browsers and the CDN in front of api.pitwall.one keep and revalidate
+their copies. As the tag is the body's, it changes exactly when the response does.
+
+Environment:
+    API_CACHE_ENABLED                 true/false (default true)
+    API_CACHE_MAX_ENTRIES             Entries kept before least recently used are evicted (default 2000)
+    API_CACHE_TTL_SECONDS             Default entry lifetime (default 3600)
+    API_CACHE_VERSION_CHECK_SECONDS   How often gold.data_version is read (default 5)
+    API_BROWSER_MAX_AGE               Cache-Control max-age for browsers (default 60)
+    API_CDN_MAX_AGE                   Cache-Control s-maxage for shared caches (default 300)
+    API_STALE_WHILE_REVALIDATE        Cache-Control stale-while-revalidate (default 3600)
+"""
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Dict, Optional, Tuple
+
+import psycopg
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from psycopg_pool import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENABLED = os.getenv('API_CACHE_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+MAX_ENTRIES = int(os.getenv('API_CACHE_MAX_ENTRIES', '2000'))
+DEFAULT_TTL = float(os.getenv('API_CACHE_TTL_SECONDS', '3600'))
+VERSION_CHECK_SECONDS = float(os.getenv('API_CACHE_VERSION_CHECK_SECONDS', '5'))
+BROWSER_MAX_AGE = int(os.getenv('API_BROWSER_MAX_AGE', '60'))
+CDN_MAX_AGE = int(os.getenv('API_CDN_MAX_AGE', '300'))
+STALE_WHILE_REVALIDATE = int(os.getenv('API_STALE_WHILE_REVALIDATE', '3600'))
+
+
+class ResponseCache:
+    """Size-bounded LRU of rendered JSON bodies, tagged with the gold data version."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, default_ttl: float = DEFAULT_TTL,
+                 version_check_seconds: float = VERSION_CHECK_SECONDS):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.version_check_seconds = version_check_seconds
+        # key -> (data version, expiry on the monotonic clock, body, ETag)
+        self._entries: "OrderedDict[Tuple, Tuple[int, float, bytes, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version_lock = threading.Lock()
+        self._pool: Optional[ConnectionPool] = None
+        self._version: Optional[int] = None
+        self._version_checked = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def attach(self, pool: Optional[ConnectionPool]) -> None:
+        """Read gold.data_version through this pool (None detaches and disables caching)."""
+        self._pool = pool
+        self._version_checked = 0.0
+        self.clear()
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def set_version(self, version: Optional[int]) -> None:
+        """Record the current data version, dropping every entry if it changed."""
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+            self._version = version
+            self._version_checked = time.monotonic()
+
+    def data_version(self) -> Optional[int]:
+        """The current gold data version, re-read from the database when due."""
+        if time.monotonic() - self._version_checked < self.version_check_seconds:
+            return self._version
+        with self._version_lock:
+            # Another request may have re-read it while this one waited
+            if time.monotonic() - self._version_checked < self.version_check_seconds:
+                return self._version
+            version = None
+            if self._pool is not None:
+                try:
+                    with self._pool.connection() as conn:
+                        with conn.cursor() as cur:
+                            cur.execute("SELECT version FROM gold.data_version")
+                            row = cur.fetchone()
+                            version = row[0] if row else None
+                except psycopg.Error as e:
+                    logger.warning(f"Could not read gold.data_version, response cache bypassed: {e}")
+            self.set_version(version)
+            return version
+
+    def get(self, key: Tuple, version: int) -> Optional[Tuple[bytes, str]]:
+        """Cached (body, ETag) for key if built from this version and not expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version or entry[1] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2], entry[3]
+
+    def put(self, key: Tuple, version: int, body: bytes, ttl: Optional[float] = None) -> str:
+        """
+        Store a body, evicting the least recently used entries beyond max_entries.
+
+        Returns:
+            The body's ETag
+        """
+        etag = body_etag(body)
+        expires = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            if version != self._version:
+                return etag
+            self._entries[key] = (version, expires, body, etag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return etag
+
+    def stats(self) -> Dict:
+        """Entry count, hit/miss counters and the data version in use."""
+        with self._lock:
+            return {
+                "enabled": CACHE_ENABLED and self._pool is not None,
+                "data_version": self._version,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": sum(len(e[2]) for e in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+response_cache = ResponseCache()
+
+
+def cached_response(ttl: Optional[float] = None) -> Callable:
+    """
+    Serve a GET endpoint from response_cache.
+
+    The endpoint's return value is rendered to JSON once per route, parameters and data
+    version, and sent with the body's ETag. Exceptions (e.g. 404s) are not cached.
+
+    Args:
+        ttl: Seconds an entry stays valid (default API_CACHE_TTL_SECONDS). Shorter for
+             endpoints that also read silver tables directly, which change without a
+             gold refresh
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            version = response_cache.data_version() if CACHE_ENABLED else None
+            if version is None:
+                return func(*args, **kwargs)
+
+            key = (func.__name__, tuple(sorted(kwargs.items())))
+            cached = response_cache.get(key, version)
+            if cached is None:
+                body = JSONResponse(content=jsonable_encoder(func(*args, **kwargs))).body
+                etag = response_cache.put(key, version, body, ttl)
+            else:
+                body, etag = cached
+            return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+        # Read by the ETag middleware to find the cached routes
+        wrapper.cache_ttl = DEFAULT_TTL if ttl is None else ttl
+        return wrapper
+    return decorator
+
+
+def body_etag(body: bytes) -> str:
+    """Strong ETag of a rendered response body."""
+    return f'"{hashlib.sha1(body).hexdigest()[:24]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches the ETag (weak comparison, per RFC 9110)."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in candidates or any(tag.removeprefix('W/') == etag for tag in candidates)
+
+
+def cache_control_header() -> str:
+    """Cache-Control for cached routes: short browser lifetime, longer one for the CDN."""
+    return (f"public, max-age={BROWSER_MAX_AGE}, s-maxage={CDN_MAX_AGE}, "
+            f"stale-while-revalidate={STALE_WHILE_REVALIDATE}")
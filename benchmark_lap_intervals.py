@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-pass gold.lap_intervals lap assignment against the LATERAL version.
+
+gold.lap_intervals used to pick each race lap's interval with a LATERAL subquery against
+silver.intervals (init-db/05-create-gold-views.sql). It now merges lap starts and
+intervals into one sorted stream per driver (init-db/31-rewrite-lap-intervals-merge.sql).
+
+This script generates a synthetic multi-season dataset of race laps and intervals in temp
+tables, runs the lap assignment of both definitions over it, and reports the time taken,
+the row counts and the rows that differ. The LATERAL version gets a (session_id,
+driver_id, date) index on the synthetic intervals, its best case (silver.intervals has
+none). Everything runs in one transaction that is rolled back, so nothing is written.
+
+Usage:
+    python3 benchmark_lap_intervals.py                 # 5 seasons of 24 races
+    python3 benchmark_lap_intervals.py --seasons 10
+    python3 benchmark_lap_intervals.py --seasons 2 --races 10 --interval-seconds 1
+"""
+
+import os
+import argparse
+import logging
+import time
+
+import psycopg
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# One synthetic race: 20 drivers, 57 laps of ~90 s, slower drivers losing time every lap
+DRIVERS_PER_RACE = 20
+LAPS_PER_RACE = 57
+
+SYNTHETIC_LAPS_SQL = """
+    CREATE TEMP TABLE bench_laps AS
+    SELECT
+        'bench_' || race AS session_id,
+        'driver_' || driver AS driver_id,
+        lap AS lap_number,
+        TIMESTAMPTZ '2018-03-01 14:00:00+00'
+            + race * INTERVAL '7 days'
+            + (lap - 1) * (90 + driver * 0.2) * INTERVAL '1 second' AS date_start
+    FROM generate_series(1, %(races)s) AS race
+    CROSS JOIN generate_series(1, %(drivers)s) AS driver
+    CROSS JOIN generate_series(1, %(laps)s) AS lap
+"""
+
+# An interval every interval_seconds per driver from the start until a minute after the
+# last lap, with a few missing gaps (the leader, timing dropouts)
+SYNTHETIC_INTERVALS_SQL = """
+    CREATE TEMP TABLE bench_intervals AS
+    SELECT
+        'bench_' || race AS session_id,
+        'driver_' || driver AS driver_id,
+        TIMESTAMPTZ '2018-03-01 14:00:00+00'
+            + race * INTERVAL '7 days'
+            + tick * %(interval_seconds)s * INTERVAL '1 second'
+            + random() * INTERVAL '1 second' AS date,
+        CASE WHEN driver = 1 OR random() < 0.03 THEN NULL
+             ELSE (tick * %(interval_seconds)s * driver * 2 + random() * 500)::INT
+        END AS gap_to_leader_ms,
+        CASE WHEN driver = 1 THEN NULL ELSE (random() * 3000)::INT END AS interval_ms
+    FROM generate_series(1, %(races)s) AS race
+    CROSS JOIN generate_series(1, %(drivers)s) AS driver
+    CROSS JOIN generate_series(
+        0, ((%(laps)s * (90 + %(drivers)s * 0.2) + 60) / %(interval_seconds)s)::INT
+    ) AS tick
+"""
+
+# Lap assignment from 05-create-gold-views.sql
+LATERAL_MAPPING_SQL = """
+    CREATE TEMP TABLE mapping_lateral AS
+    WITH laps_with_next_start AS (
+        SELECT
+            l.session_id,
+            l.driver_id,
+            l.lap_number,
+            l.date_start,
+            LEAD(l.date_start) OVER (
+                PARTITION BY l.session_id, l.driver_id
+                ORDER BY l.lap_number
+            ) AS next_lap_date_start
+        FROM bench_laps l
+    )
+    SELECT DISTINCT ON (l.session_id, l.driver_id, l.lap_number)
+        l.session_id,
+        l.driver_id,
+        l.lap_number,
+        i.gap_to_leader_ms,
+        i.interval_ms
+    FROM laps_with_next_start l
+    LEFT JOIN LATERAL (
+        SELECT i.gap_to_leader_ms, i.interval_ms
+        FROM bench_intervals i
+        WHERE i.session_id = l.session_id
+          AND i.driver_id = l.driver_id
+          AND i.date >= l.date_start
+          AND (l.next_lap_date_start IS NULL OR i.date < l.next_lap_date_start)
+          AND i.gap_to_leader_ms IS NOT NULL
+        ORDER BY i.date DESC
+        LIMIT 1
+    ) i ON true
+    WHERE i.gap_to_leader_ms IS NOT NULL
+"""
+
+# Lap assignment from 31-rewrite-lap-intervals-merge.sql
+MERGE_MAPPING_SQL = """
+    CREATE TEMP TABLE mapping_merge AS
+    WITH lap_events AS (
+        SELECT
+            l.session_id,
+            l.driver_id,
+            l.date_start AS event_at,
+            0 AS event_order,
+            l.lap_number,
+            NULL::INT AS gap_to_leader_ms,
+            NULL::INT AS interval_ms
+        FROM bench_laps l
+        UNION ALL
+        SELECT i.session_id, i.driver_id, i.date, 1, NULL, i.gap_to_leader_ms, i.interval_ms
+        FROM bench_intervals i
+        WHERE i.gap_to_leader_ms IS NOT NULL
+    ),
+    event_stream AS (
+        SELECT
+            le.*,
+            MAX(le.lap_number) OVER driver_events AS current_lap,
+            LEAD(le.event_order) OVER driver_events AS next_event_order
+        FROM lap_events le
+        WINDOW driver_events AS (
+            PARTITION BY le.session_id, le.driver_id
+            ORDER BY le.event_at, le.event_order
+            ROWS UNBOUNDED PRECEDING
+        )
+    )
+    SELECT DISTINCT ON (es.session_id, es.driver_id, es.current_lap)
+        es.session_id,
+        es.driver_id,
+        es.current_lap AS lap_number,
+        es.gap_to_leader_ms,
+        es.interval_ms
+    FROM event_stream es
+    WHERE es.event_order = 1
+      AND es.current_lap IS NOT NULL
+      AND es.next_event_order IS DISTINCT FROM 1
+    ORDER BY es.session_id, es.driver_id, es.current_lap, es.event_at DESC
+"""
+
+MISMATCH_SQL = """
+    SELECT COUNT(*) FROM (
+        (SELECT * FROM mapping_lateral EXCEPT ALL SELECT * FROM mapping_merge)
+        UNION ALL
+        (SELECT * FROM mapping_merge EXCEPT ALL SELECT * FROM mapping_lateral)
+    ) diff
+"""
+
+
+def get_db_connection():
+    """Create and return a database connection."""
+    try:
+        conn = psycopg.connect(
+            host=os.getenv('PGHOST', 'localhost'),
+            port=os.getenv('PGPORT', '5433'),
+            dbname=os.getenv('PGDATABASE', 'pitwall'),
+            user=os.getenv('PGUSER', 'pitwall'),
+            password=os.getenv('PGPASSWORD', 'pitwall')
+        )
+        return conn
+    except Exception as e:
+        logger.error(f"Failed to connect to database: {e}")
+        raise
+
+
+def timed(conn, sql: str, params: dict = None) -> float:
+    """Run one statement and return the seconds it took."""
+    start = time.time()
+    with conn.cursor() as cur:
+        cur.execute(sql, params)
+    return time.time() - start
+
+
+def count_rows(conn, table: str) -> int:
+    """Row count of a temp table."""
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT COUNT(*) FROM {table}")
+        return cur.fetchone()[0]
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Benchmark LATERAL vs single-pass lap_intervals")
+    parser.add_argument(
+        '--seasons',
+        type=int,
+        default=5,
+        help='Synthetic seasons (default 5)'
+    )
+    parser.add_argument(
+        '--races',
+        type=int,
+        default=24,
+        help='Races per season (default 24)'
+    )
+    parser.add_argument(
+        '--interval-seconds',
+        type=float,
+        default=4.0,
+        help='Seconds between intervals per driver (default 4, as in OpenF1)'
+    )
+    args = parser.parse_args()
+
+    params = {
+        'races': args.seasons * args.races,
+        'drivers': DRIVERS_PER_RACE,
+        'laps': LAPS_PER_RACE,
+        'interval_seconds': args.interval_seconds,
+    }
+
+    logger.info("="*70)
+    logger.info("LAP INTERVALS BENCHMARK")
+    logger.info("="*70)
+
+    conn = get_db_connection()
+
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT setseed(0.46)")
+        generate_seconds = timed(conn, SYNTHETIC_LAPS_SQL, params)
+        generate_seconds += timed(conn, SYNTHETIC_INTERVALS_SQL, params)
+        generate_seconds += timed(conn, """
+            CREATE INDEX ON bench_intervals (session_id, driver_id, date);
+            ANALYZE bench_laps;
+            ANALYZE bench_intervals;
+        """)
+        logger.info(f"Generated {params['races']} races ({args.seasons} seasons): "
+                    f"{count_rows(conn, 'bench_laps'):,} laps, "
+                    f"{count_rows(conn, 'bench_intervals'):,} intervals in {generate_seconds:.1f}s")
+
+        lateral_seconds = timed(conn, LATERAL_MAPPING_SQL)
+        merge_seconds = timed(conn, MERGE_MAPPING_SQL)
+
+        with conn.cursor() as cur:
+            cur.execute(MISMATCH_SQL)
+            mismatches = cur.fetchone()[0]
+
+        logger.info("="*70)
+        logger.info(f"LATERAL:     {lateral_seconds:.1f}s, {count_rows(conn, 'mapping_lateral'):,} laps")
+        logger.info(f"Single-pass: {merge_seconds:.1f}s, {count_rows(conn, 'mapping_merge'):,} laps "
+                    f"({lateral_seconds / max(merge_seconds, 1e-6):.1f}x)")
+        logger.info(f"Mismatched rows: {mismatches:,}")
+
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Benchmark the set-based telemetry alignment against the LATERAL version it replaced.
+
+gold.telemetry_trace used to match every telemetry sample to its nearest GPS fix and to
+its lap with two LATERAL subqueries (init-db/14-create-telemetry-trace-view.sql). It is
+now built from gold.align_telemetry(), which does both with sorted merge joins over
+window functions (init-db/24-create-telemetry-alignment.sql).
+
+For each session this script builds the aligned rows both ways into temp tables, reports
+the time taken and the row counts, and counts rows that differ in lap or GPS position.
+Only sessions with raw rows in silver.car_telemetry are compared (the LATERAL version
+does not read packed telemetry). Nothing is written to the database.
+
+Usage:
+    python3 benchmark_telemetry_alignment.py                        # 3 most recent races
+    python3 benchmark_telemetry_alignment.py --sessions 5
+    python3 benchmark_telemetry_alignment.py --session-id <id> ...  # Selected sessions
+"""
+
+import os
+import argparse
+import logging
+import time
+from typing import List, Optional
+
+import psycopg
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Alignment from 14-create-telemetry-trace-view.sql, restricted to one session
+LATERAL_ALIGNMENT_SQL = """
+    CREATE TEMP TABLE alignment_lateral AS
+    WITH laps_with_end AS (
+        SELECT
+            l.session_id,
+            l.driver_id,
+            l.lap_id,
+            l.lap_number,
+            l.date_start,
+            COALESCE(
+                LEAD(l.date_start) OVER (
+                    PARTITION BY l.session_id, l.driver_id
+                    ORDER BY l.lap_number
+                ),
+                CASE
+                    WHEN l.lap_duration_ms IS NOT NULL
+                    THEN l.date_start + (l.lap_duration_ms || ' milliseconds')::INTERVAL
+                    ELSE l.date_start + INTERVAL '2 minutes'
+                END
+            ) AS date_end
+        FROM silver.laps l
+        WHERE l.session_id = %(session_id)s
+    ),
+    telemetry_with_gps AS (
+        SELECT DISTINCT ON (ct.car_telemetry_id)
+            ct.car_telemetry_id,
+            ct.session_id,
+            ct.driver_id,
+            ct.date AS sample_timestamp,
+            cg.x,
+            cg.y,
+            cg.z
+        FROM silver.car_telemetry ct
+        LEFT JOIN LATERAL (
+            SELECT cg.x, cg.y, cg.z
+            FROM silver.car_gps cg
+            WHERE cg.session_id = ct.session_id
+              AND cg.driver_id = ct.driver_id
+              AND cg.date BETWEEN ct.date - INTERVAL '0.3 seconds' AND ct.date + INTERVAL '0.3 seconds'
+              AND ABS(EXTRACT(EPOCH FROM (ct.date - cg.date))) < 0.3
+            ORDER BY ABS(EXTRACT(EPOCH FROM (ct.date - cg.date)))
+            LIMIT 1
+        ) cg ON true
+        WHERE ct.session_id = %(session_id)s
+    ),
+    telemetry_with_lap AS (
+        SELECT DISTINCT ON (twg.car_telemetry_id)
+            twg.*,
+            lwe.lap_id,
+            lwe.lap_number
+        FROM telemetry_with_gps twg
+        LEFT JOIN LATERAL (
+            SELECT lwe.lap_id, lwe.lap_number
+            FROM laps_with_end lwe
+            WHERE lwe.session_id = twg.session_id
+              AND lwe.driver_id = twg.driver_id
+              AND twg.sample_timestamp >= lwe.date_start
+              AND twg.sample_timestamp < lwe.date_end
+            ORDER BY lwe.lap_number
+            LIMIT 1
+        ) lwe ON true
+    )
+    SELECT
+        twl.driver_id, twl.sample_timestamp, twl.lap_id, twl.lap_number, twl.x, twl.y, twl.z
+    FROM telemetry_with_lap twl
+    INNER JOIN silver.driver_id_by_session dis
+        ON twl.session_id = dis.session_id
+        AND twl.driver_id = dis.driver_id
+"""
+
+SET_BASED_ALIGNMENT_SQL = """
+    CREATE TEMP TABLE alignment_set_based AS
+    SELECT driver_id, sample_timestamp, lap_id, lap_number, x, y, z
+    FROM gold.align_telemetry(ARRAY[%(session_id)s])
+"""
+
+MISMATCH_SQL = """
+    SELECT COUNT(*) FROM (
+        (SELECT * FROM alignment_lateral EXCEPT ALL SELECT * FROM alignment_set_based)
+        UNION ALL
+        (SELECT * FROM alignment_set_based EXCEPT ALL SELECT * FROM alignment_lateral)
+    ) diff
+"""
+
+
+def get_db_connection():
+    """Create and return a database connection."""
+    try:
+        conn = psycopg.connect(
+            host=os.getenv('PGHOST', 'localhost'),
+            port=os.getenv('PGPORT', '5433'),
+            dbname=os.getenv('PGDATABASE', 'pitwall'),
+            user=os.getenv('PGUSER', 'pitwall'),
+            password=os.getenv('PGPASSWORD', 'pitwall')
+        )
+        return conn
+    except Exception as e:
+        logger.error(f"Failed to connect to database: {e}")
+        raise
+
+
+def get_benchmark_sessions(conn, limit: int, session_ids: Optional[List[str]] = None) -> List[str]:
+    """
+    Get trace sessions with raw telemetry, most recent first.
+
+    Args:
+        limit: Number of sessions when session_ids is None
+        session_ids: Only these sessions
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT s.session_id
+            FROM silver.sessions s
+            WHERE s.session_type IN ('race', 'sprint', 'quali', 'sprint_quali')
+              AND (%(session_ids)s::text[] IS NULL OR s.session_id = ANY(%(session_ids)s::text[]))
+              AND (%(session_ids)s::text[] IS NOT NULL OR s.session_type = 'race')
+              AND EXISTS (SELECT 1 FROM silver.car_telemetry ct WHERE ct.session_id = s.session_id)
+            ORDER BY s.start_time DESC
+            LIMIT %(limit)s
+        """, {'session_ids': session_ids, 'limit': None if session_ids else limit})
+        return [row[0] for row in cur.fetchall()]
+
+
+def timed_build(conn, sql: str, session_id: str) -> float:
+    """Run one CREATE TEMP TABLE ... AS and return the seconds it took."""
+    start = time.time()
+    with conn.cursor() as cur:
+        cur.execute(sql, {'session_id': session_id})
+    return time.time() - start
+
+
+def benchmark_session(conn, session_id: str) -> dict:
+    """
+    Align one session both ways and compare the results.
+
+    Runs in a transaction that is rolled back, so the temp tables are discarded.
+    """
+    try:
+        lateral_seconds = timed_build(conn, LATERAL_ALIGNMENT_SQL, session_id)
+        set_based_seconds = timed_build(conn, SET_BASED_ALIGNMENT_SQL, session_id)
+
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM alignment_lateral")
+            lateral_rows = cur.fetchone()[0]
+            cur.execute("SELECT COUNT(*) FROM alignment_set_based")
+            set_based_rows = cur.fetchone()[0]
+            cur.execute(MISMATCH_SQL)
+            mismatches = cur.fetchone()[0]
+
+        return {
+            'session_id': session_id,
+            'lateral_seconds': lateral_seconds,
+            'set_based_seconds': set_based_seconds,
+            'lateral_rows': lateral_rows,
+            'set_based_rows': set_based_rows,
+            'mismatches': mismatches,
+        }
+    finally:
+        conn.rollback()
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Benchmark LATERAL vs set-based telemetry alignment")
+    parser.add_argument(
+        '--sessions',
+        type=int,
+        default=3,
+        help='Number of most recent races to benchmark (default 3)'
+    )
+    parser.add_argument(
+        '--session-id',
+        action='append',
+        dest='session_ids',
+        help='Benchmark this session (repeatable; overrides --sessions)'
+    )
+    args = parser.parse_args()
+
+    logger.info("="*70)
+    logger.info("TELEMETRY ALIGNMENT BENCHMARK")
+    logger.info("="*70)
+
+    conn = get_db_connection()
+
+    try:
+        sessions = get_benchmark_sessions(conn, args.sessions, args.session_ids)
+        if not sessions:
+            logger.info("No sessions with raw telemetry to benchmark")
+            return
+
+        results = []
+        for idx, session_id in enumerate(sessions, 1):
+            result = benchmark_session(conn, session_id)
+            results.append(result)
+            speedup = result['lateral_seconds'] / max(result['set_based_seconds'], 1e-6)
+            logger.info(f"  [{idx}/{len(sessions)}] {session_id}: "
+                        f"LATERAL {result['lateral_seconds']:.1f}s, "
+                        f"set-based {result['set_based_seconds']:.1f}s ({speedup:.1f}x), "
+                        f"rows {result['lateral_rows']:,} / {result['set_based_rows']:,}, "
+                        f"mismatches {result['mismatches']:,}")
+
+        lateral_total = sum(r['lateral_seconds'] for r in results)
+        set_based_total = sum(r['set_based_seconds'] for r in results)
+        logger.info("="*70)
+        logger.info(f"Sessions: {len(results)}")
+        logger.info(f"LATERAL total: {lateral_total:.1f}s")
+        logger.info(f"Set-based total: {set_based_total:.1f}s "
+                    f"({lateral_total / max(set_based_total, 1e-6):.1f}x)")
+        logger.info(f"Mismatched rows: {sum(r['mismatches'] for r in results):,}")
+
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,10 @@ Deduplicate car_telemetry and car_gps tables, then add unique constraints.
 
 Removes duplicate records based on (session_id, driver_id, date) composite key,
 keeping the record with the smallest primary key ID (oldest insert).
+
+init-db/20-add-car-telemetry-gps-unique-keys.sql now does the same once, and the
+loaders merge with ON CONFLICT DO NOTHING, so this is only needed for databases
+that have not applied that migration.
 """
 
 import os
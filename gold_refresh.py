@@ -0,0 +1,587 @@
+#!/usr/bin/env python3
+"""
+Refresh the gold materialized views without blocking readers.
+
+Shared by update_database.py (gold phase) and the API's /api/database/refresh-gold
+endpoint. refresh_views() reads which gold views select from which others (pg_depend)
+and refreshes every view whose dependencies are done at the same time, each on its own
+pooled connection, so the phase takes about as long as its slowest chain of views rather
+than the sum of all of them.
+
+plan_refresh() narrows a refresh to the views whose inputs changed: the silver tables each
+view reads (pg_depend again) are checked against the dirty-session changelog, or against a
+content hash saved in gold.refresh_source_markers for tables the changelog does not cover.
+
+Every refresh that changes at least one view bumps gold.data_version, which the API's
+response cache (api/response_cache.py) compares against to drop stale responses.
+
+For each view, refresh_view() picks the least disruptive mode available:
+
+1. concurrent: REFRESH MATERIALIZED VIEW CONCURRENTLY. Needs a unique index on plain
+   columns (init-db/29-add-gold-unique-indexes.sql) and a populated view. Readers are
+   never blocked
+2. shadow: build gold.<view>__shadow from the view's definition and indexes, then swap
+   it in with renames. Readers only wait for the swap itself. Not possible when other
+   views depend on the view (dropping it would drop them)
+3. blocking: plain REFRESH MATERIALIZED VIEW
+
+Usage:
+    python3 gold_refresh.py                          # Refresh every gold view
+    python3 gold_refresh.py --view gold.lap_times    # One view
+    python3 gold_refresh.py --blocking               # Plain REFRESH only
+    python3 gold_refresh.py --workers 1              # One view at a time
+"""
+
+import os
+import time
+import argparse
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import psycopg
+from psycopg import sql
+from psycopg_pool import ConnectionPool
+from dotenv import load_dotenv
+
+import stage_runs
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Gold materialized views to refresh
+GOLD_VIEWS = [
+    'gold.dim_drivers',
+    'gold.dim_teams',
+    'gold.dim_circuits',
+    'gold.dim_meetings',
+    'gold.driver_session_results',
+    'gold.session_classification',
+    'gold.session_summary',
+    'gold.lap_times',
+    'gold.lap_intervals',
+    'gold.driver_standings_progression',
+    'gold.constructor_standings_progression',
+    'gold.circuit_overtake_stats',
+    'gold.championship_grid',
+]
+
+SHADOW_SUFFIX = '__shadow'
+OLD_SUFFIX = '__old'
+
+# Views refreshed at the same time (one pooled connection each)
+DEFAULT_WORKERS = 4
+
+
+def create_pool(max_size: int = DEFAULT_WORKERS) -> ConnectionPool:
+    """Create a connection pool for refresh_views()."""
+    return ConnectionPool(
+        conninfo=(
+            f"host={os.getenv('PGHOST', 'localhost')} "
+            f"port={os.getenv('PGPORT', '5433')} "
+            f"dbname={os.getenv('PGDATABASE', 'pitwall')} "
+            f"user={os.getenv('PGUSER', 'pitwall')} "
+            f"password={os.getenv('PGPASSWORD', 'pitwall')}"
+        ),
+        min_size=1,
+        max_size=max_size,
+    )
+
+
+# Every relation the given views select from, following pg_depend through plain views.
+# (view_oid, source_oid) pairs; sources include the plain views themselves.
+VIEW_READS_CTE = """
+    WITH RECURSIVE reads AS (
+        SELECT r.ev_class AS view_oid, d.refobjid AS source_oid
+        FROM pg_rewrite r
+        INNER JOIN pg_depend d
+            ON d.classid = 'pg_rewrite'::regclass
+            AND d.objid = r.oid
+            AND d.refclassid = 'pg_class'::regclass
+        WHERE r.ev_class = ANY(%(views)s::text[]::regclass[])
+          AND d.refobjid <> r.ev_class
+        UNION
+        SELECT reads.view_oid, d.refobjid
+        FROM reads
+        INNER JOIN pg_class c ON c.oid = reads.source_oid AND c.relkind = 'v'
+        INNER JOIN pg_rewrite r ON r.ev_class = c.oid
+        INNER JOIN pg_depend d
+            ON d.classid = 'pg_rewrite'::regclass
+            AND d.objid = r.oid
+            AND d.refclassid = 'pg_class'::regclass
+        WHERE d.refobjid <> r.ev_class
+    )
+"""
+
+
+def get_view_dependencies(conn, views: List[str]) -> Dict[str, List[str]]:
+    """
+    Map each view to the views in the list it selects from.
+
+    Follows pg_depend through plain views, so a materialized view that reads another
+    through a regular view still waits for it.
+    """
+    with conn.cursor() as cur:
+        cur.execute(VIEW_READS_CTE + """
+            SELECT DISTINCT vn.nspname || '.' || v.relname, sn.nspname || '.' || s.relname
+            FROM reads
+            INNER JOIN pg_class v ON v.oid = reads.view_oid
+            INNER JOIN pg_namespace vn ON vn.oid = v.relnamespace
+            INNER JOIN pg_class s ON s.oid = reads.source_oid
+            INNER JOIN pg_namespace sn ON sn.oid = s.relnamespace
+            WHERE reads.source_oid = ANY(%(views)s::text[]::regclass[])
+              AND reads.source_oid <> reads.view_oid
+        """, {'views': views})
+        dependencies: Dict[str, List[str]] = {view: [] for view in views}
+        for view, source in cur.fetchall():
+            dependencies[view].append(source)
+        return dependencies
+
+
+def get_view_sources(conn, views: List[str]) -> Dict[str, List[str]]:
+    """
+    Map each view to the tables it selects from, directly or through plain views.
+
+    Tables read through another materialized view are not included; get_view_dependencies()
+    covers those.
+    """
+    with conn.cursor() as cur:
+        cur.execute(VIEW_READS_CTE + """
+            SELECT DISTINCT vn.nspname || '.' || v.relname, sn.nspname || '.' || s.relname
+            FROM reads
+            INNER JOIN pg_class v ON v.oid = reads.view_oid
+            INNER JOIN pg_namespace vn ON vn.oid = v.relnamespace
+            INNER JOIN pg_class s ON s.oid = reads.source_oid AND s.relkind IN ('r', 'p')
+            INNER JOIN pg_namespace sn ON sn.oid = s.relnamespace
+        """, {'views': views})
+        sources: Dict[str, List[str]] = {view: [] for view in views}
+        for view, source in cur.fetchall():
+            sources[view].append(source)
+        return sources
+
+
+def get_changelog_tables(conn) -> Set[str]:
+    """Tables whose writes are logged to silver.dirty_sessions by trigger."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT DISTINCT n.nspname || '.' || c.relname
+            FROM pg_trigger t
+            INNER JOIN pg_class c ON c.oid = t.tgrelid
+            INNER JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE t.tgfoid = 'silver.mark_dirty_silver_sessions'::regproc
+        """)
+        return {row[0] for row in cur.fetchall()}
+
+
+def get_table_markers(conn, tables: List[str]) -> Dict[str, str]:
+    """
+    Content hash of each table.
+
+    Used for the small reference tables (drivers, teams, circuits, ...) that are not in
+    the changelog. Their upserts rewrite every row on each run, so only the content
+    tells whether they changed.
+    """
+    markers = {}
+    with conn.cursor() as cur:
+        for table in tables:
+            schema, name = table.split('.')
+            cur.execute(sql.SQL("""
+                SELECT md5(COALESCE(string_agg(t::text, '|' ORDER BY t::text), ''))
+                FROM {} t
+            """).format(sql.Identifier(schema, name)))
+            markers[table] = cur.fetchone()[0]
+    conn.commit()
+    return markers
+
+
+def get_saved_markers(conn) -> Dict[str, str]:
+    """Table markers recorded by the last successful change-aware refresh."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT source, marker FROM gold.refresh_source_markers")
+        return dict(cur.fetchall())
+
+
+def save_markers(conn, markers: Dict[str, str]) -> None:
+    """Record the table markers the gold views are now up to date with."""
+    try:
+        with conn.cursor() as cur:
+            cur.executemany("""
+                INSERT INTO gold.refresh_source_markers (source, marker)
+                VALUES (%s, %s)
+                ON CONFLICT (source) DO UPDATE SET
+                    marker = EXCLUDED.marker,
+                    updated_at = NOW()
+            """, list(markers.items()))
+        conn.commit()
+    except psycopg.Error:
+        conn.rollback()
+        raise
+
+
+def plan_refresh(conn, views: List[str],
+                 changed_tables: Optional[Set[str]]) -> Tuple[List[str], Dict[str, str]]:
+    """
+    Pick the views whose inputs changed since the last refresh.
+
+    A table counts as changed when it is in changed_tables (changelog tables) or its
+    content hash differs from the saved marker (every other table). A view is refreshed
+    when one of its tables changed or a view it selects from is refreshed. The tables or
+    views that selected each view are logged.
+
+    Args:
+        views: Candidate views
+        changed_tables: Changelog tables written since the last refresh, or None to
+            refresh every view
+
+    Returns:
+        Tuple of (views to refresh in list order, current markers of the non-changelog
+        tables to save once the refresh has succeeded)
+    """
+    sources = get_view_sources(conn, views)
+    changelog_tables = get_changelog_tables(conn)
+    marked_tables = sorted({t for tables in sources.values() for t in tables} - changelog_tables)
+    markers = get_table_markers(conn, marked_tables)
+
+    if changed_tables is None:
+        conn.commit()
+        return list(views), markers
+
+    saved = get_saved_markers(conn)
+    marker_changes = {t for t in marked_tables if saved.get(t) != markers[t]}
+    changed = set(changed_tables) | marker_changes
+    logger.info(f"Changed since the last refresh: {', '.join(sorted(changed)) or 'nothing'} "
+                f"({len(changed_tables)} from the changelog, {len(marker_changes)} by marker)")
+
+    # view -> the changed tables, or refreshed views, that select it
+    reasons = {view: sorted(changed.intersection(sources[view])) for view in views}
+    selected = {view for view in views if reasons[view]}
+
+    deps = get_view_dependencies(conn, views)
+    grew = True
+    while grew:
+        downstream = {view for view in views if view not in selected and selected.intersection(deps[view])}
+        for view in downstream:
+            reasons[view] = sorted(selected.intersection(deps[view]))
+        selected |= downstream
+        grew = bool(downstream)
+    conn.commit()
+
+    for view in views:
+        if view in selected:
+            logger.info(f"  {view}: {', '.join(reasons[view])}")
+
+    return [view for view in views if view in selected], markers
+
+
+def can_refresh_concurrently(conn, view: str) -> bool:
+    """Whether the view is populated and has a unique index usable by CONCURRENTLY."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT
+                mv.ispopulated
+                AND EXISTS (
+                    SELECT 1 FROM pg_index i
+                    WHERE i.indrelid = %(view)s::regclass
+                      AND i.indisunique
+                      AND i.indisvalid
+                      AND i.indpred IS NULL
+                      AND i.indexprs IS NULL
+                )
+            FROM pg_matviews mv
+            WHERE mv.schemaname || '.' || mv.matviewname = %(view)s
+        """, {'view': view})
+        row = cur.fetchone()
+        return bool(row and row[0])
+
+
+def has_dependent_views(conn, view: str) -> bool:
+    """Whether other views or materialized views select from the view."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT EXISTS (
+                SELECT 1
+                FROM pg_depend d
+                INNER JOIN pg_rewrite r ON d.objid = r.oid
+                WHERE d.classid = 'pg_rewrite'::regclass
+                  AND d.refobjid = %(view)s::regclass
+                  AND r.ev_class <> %(view)s::regclass
+            )
+        """, {'view': view})
+        return cur.fetchone()[0]
+
+
+def get_view_indexes(conn, view: str) -> List[Tuple[str, str]]:
+    """(index name, CREATE INDEX statement) for every index on the view."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT c.relname, pg_get_indexdef(i.indexrelid)
+            FROM pg_index i
+            INNER JOIN pg_class c ON i.indexrelid = c.oid
+            WHERE i.indrelid = %s::regclass
+        """, (view,))
+        return cur.fetchall()
+
+
+def transaction_rows_read(conn) -> int:
+    """Rows the current transaction has read from user tables and views (seq + index)."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT COALESCE(SUM(seq_tup_read + COALESCE(idx_tup_fetch, 0)), 0)
+            FROM pg_stat_xact_user_tables
+        """)
+        return int(cur.fetchone()[0])
+
+
+def get_view_size(conn, view: str) -> Tuple[int, int]:
+    """(row count, bytes including indexes) of a view."""
+    with conn.cursor() as cur:
+        cur.execute(sql.SQL("SELECT COUNT(*), pg_total_relation_size(%s::regclass) FROM {}").format(
+            sql.Identifier(*view.split('.'))), (view,))
+        rows, size = cur.fetchone()
+    conn.commit()
+    return rows, size
+
+
+def swap_shadow_view(conn, view: str, stats: Optional[Dict] = None) -> None:
+    """
+    Rebuild the view as gold.<view>__shadow with the same indexes, then swap it in.
+
+    The build runs in its own transaction and only reads the view's sources. The swap
+    (two renames, a drop and the index renames) is a second, short transaction.
+    """
+    schema, name = view.split('.')
+    shadow = name + SHADOW_SUFFIX
+    old = name + OLD_SUFFIX
+
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_get_viewdef(%s::regclass, true)", (view,))
+        definition = cur.fetchone()[0].rstrip().rstrip(';')
+        indexes = get_view_indexes(conn, view)
+
+        cur.execute(sql.SQL("DROP MATERIALIZED VIEW IF EXISTS {}").format(sql.Identifier(schema, shadow)))
+        cur.execute(sql.SQL("CREATE MATERIALIZED VIEW {} AS {}").format(
+            sql.Identifier(schema, shadow), sql.SQL(definition)))
+        for index_name, index_def in indexes:
+            cur.execute(index_def.replace(
+                f" {index_name} ON {view} ",
+                f" {index_name}{SHADOW_SUFFIX} ON {schema}.{shadow} ",
+                1
+            ))
+    if stats is not None:
+        stats['rows_read'] = transaction_rows_read(conn)
+    conn.commit()
+
+    with conn.cursor() as cur:
+        cur.execute(sql.SQL("ALTER MATERIALIZED VIEW {} RENAME TO {}").format(
+            sql.Identifier(schema, name), sql.Identifier(old)))
+        cur.execute(sql.SQL("ALTER MATERIALIZED VIEW {} RENAME TO {}").format(
+            sql.Identifier(schema, shadow), sql.Identifier(name)))
+        cur.execute(sql.SQL("DROP MATERIALIZED VIEW {}").format(sql.Identifier(schema, old)))
+        for index_name, _ in indexes:
+            cur.execute(sql.SQL("ALTER INDEX {} RENAME TO {}").format(
+                sql.Identifier(schema, index_name + SHADOW_SUFFIX), sql.Identifier(index_name)))
+    conn.commit()
+
+
+def refresh_view(conn, view: str, concurrently: bool = True, stats: Optional[Dict] = None) -> str:
+    """
+    Refresh one gold materialized view.
+
+    Args:
+        view: Schema-qualified view name
+        concurrently: Use the non-blocking modes when possible (plain REFRESH if False)
+        stats: If given, receives 'rows_read', the rows the refresh read
+
+    Returns:
+        The mode used: 'concurrent', 'shadow' or 'blocking'
+    """
+    try:
+        if concurrently and can_refresh_concurrently(conn, view):
+            mode = 'concurrent'
+            with conn.cursor() as cur:
+                cur.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}")
+            if stats is not None:
+                stats['rows_read'] = transaction_rows_read(conn)
+            conn.commit()
+        elif concurrently and not has_dependent_views(conn, view):
+            mode = 'shadow'
+            swap_shadow_view(conn, view, stats)
+        else:
+            mode = 'blocking'
+            with conn.cursor() as cur:
+                cur.execute(f"REFRESH MATERIALIZED VIEW {view}")
+            if stats is not None:
+                stats['rows_read'] = transaction_rows_read(conn)
+            conn.commit()
+        return mode
+    except psycopg.Error:
+        conn.rollback()
+        raise
+
+
+def bump_data_version(conn) -> Optional[int]:
+    """Increment gold.data_version after a refresh; returns the new version."""
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                UPDATE gold.data_version
+                SET version = version + 1, refreshed_at = NOW()
+                RETURNING version
+            """)
+            row = cur.fetchone()
+        conn.commit()
+        return row[0] if row else None
+    except psycopg.Error as e:
+        conn.rollback()
+        logger.warning(f"Could not bump gold.data_version: {e}")
+        return None
+
+
+def refresh_views(pool: ConnectionPool, views: Optional[List[str]] = None,
+                  concurrently: bool = True, max_workers: int = DEFAULT_WORKERS) -> Dict:
+    """
+    Refresh gold views as a dependency DAG, up to max_workers at a time.
+
+    A view starts as soon as every view it selects from has been refreshed; views whose
+    dependencies failed are skipped. Each refresh borrows its own connection from the
+    pool, so a failure cannot abort another view's transaction.
+
+    Args:
+        pool: Connection pool (at least max_workers connections)
+        views: Views to refresh (default GOLD_VIEWS), started in list order when ready
+        concurrently: Passed on to refresh_view()
+        max_workers: Maximum number of views refreshed at the same time
+
+    Returns:
+        Dict with results summary, per-view mode and timings, and the phase wall time
+    """
+    views = list(views or GOLD_VIEWS)
+    with pool.connection() as conn:
+        deps = get_view_dependencies(conn, views)
+
+    results = {"success": 0, "failed": 0, "skipped": 0, "details": []}
+    phase_start = time.time()
+    pending = list(views)
+    status: Dict[str, str] = {}
+    running = {}
+
+    def run(view: str) -> Dict:
+        metrics = {}
+        with pool.connection() as conn:
+            metrics['mode'] = refresh_view(conn, view, concurrently, metrics)
+            metrics['rows_written'], metrics['bytes_written'] = get_view_size(conn, view)
+        return metrics
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        while pending or running:
+            for view in list(pending):
+                if any(status.get(d) in ('failed', 'skipped') for d in deps[view]):
+                    pending.remove(view)
+                    status[view] = 'skipped'
+                    logger.warning(f"  - Skipping {view} (dependency did not refresh)")
+                    results["skipped"] += 1
+                    results["details"].append({
+                        "view": view.split('.')[-1],
+                        "success": False,
+                        "skipped": True,
+                        "duration": 0.0
+                    })
+
+            for view in list(pending):
+                if len(running) >= max_workers:
+                    break
+                if all(status.get(d) == 'success' for d in deps[view]):
+                    pending.remove(view)
+                    logger.info(f"[{len(status) + len(running) + 1}/{len(views)}] Refreshing {view}...")
+                    running[executor.submit(run, view)] = (view, time.time())
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                view, started = running.pop(future)
+                finished = time.time()
+                detail = {
+                    "view": view.split('.')[-1],
+                    "duration": finished - started,
+                    "start_offset": started - phase_start,
+                    "end_offset": finished - phase_start
+                }
+                metrics = {}
+                try:
+                    metrics = future.result()
+                    detail.update(metrics)
+                    detail["success"] = True
+                    status[view] = 'success'
+                    results["success"] += 1
+                    logger.info(f"  ✓ {view} refreshed in {detail['duration']:.1f}s ({detail['mode']})")
+                except Exception as e:
+                    detail["success"] = False
+                    detail["error"] = str(e)
+                    status[view] = 'failed'
+                    results["failed"] += 1
+                    logger.error(f"  ✗ {view} failed after {detail['duration']:.1f}s: {e}")
+                results["details"].append(detail)
+
+                with pool.connection() as conn:
+                    stage_runs.record_stage_run(conn, 'gold', view, started, finished, detail["success"],
+                                                metrics, detail.get("error"))
+
+    results["wall_seconds"] = time.time() - phase_start
+    results["view_seconds"] = sum(d["duration"] for d in results["details"])
+    results["workers"] = max_workers
+
+    if results["success"]:
+        with pool.connection() as conn:
+            results["data_version"] = bump_data_version(conn)
+
+    logger.info(f"Refreshed {results['success']}/{len(views)} views in {results['wall_seconds']:.1f}s "
+                f"({results['view_seconds']:.1f}s of refreshes)")
+
+    return results
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Refresh the gold materialized views")
+    parser.add_argument(
+        '--view',
+        action='append',
+        dest='views',
+        help='View to refresh (repeatable; default all gold views)'
+    )
+    parser.add_argument(
+        '--blocking',
+        action='store_true',
+        help='Use plain REFRESH MATERIALIZED VIEW (locks out readers)'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f'Views refreshed at the same time (default {DEFAULT_WORKERS}, 1 = sequential)'
+    )
+    args = parser.parse_args()
+
+    pool = create_pool(max(1, args.workers))
+
+    try:
+        results = refresh_views(pool, args.views, concurrently=not args.blocking,
+                                max_workers=args.workers)
+    finally:
+        pool.close()
+
+    if results["failed"] or results["skipped"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+-- Silver layer: Points awarding state
+-- Records a fingerprint of the inputs used to compute each session's points
+-- (results, session context, race control gate and points_system rules), so
+-- upsert_points_awarding.py only recomputes sessions whose inputs changed.
+
+CREATE TABLE IF NOT EXISTS silver.points_awarding_state (
+    session_id TEXT NOT NULL PRIMARY KEY REFERENCES silver.sessions(session_id),
+    input_hash TEXT NOT NULL,
+    computed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Supports the per-session race_control gate used for the 0-25% completion band
+CREATE INDEX IF NOT EXISTS idx_race_control_session_category
+    ON silver.race_control(session_id, category);
@@ -0,0 +1,56 @@
+-- Migration: Natural-key unique constraints for silver.pit_stops and silver.stints
+-- Purpose: Let upsert_pit_stops.py and upsert_stints.py merge a whole staging table
+-- with a single INSERT ... ON CONFLICT instead of checking rows one at a time.
+--
+-- This migration:
+-- 1. Removes duplicate rows on the natural key (keeping the oldest by identity id)
+-- 2. Adds the unique constraints used as ON CONFLICT targets
+
+-- Step 1: Deduplicate pit_stops on (session_id, driver_id, date, lap_number)
+DELETE FROM silver.pit_stops
+WHERE pit_stop_id IN (
+    SELECT pit_stop_id
+    FROM (
+        SELECT
+            pit_stop_id,
+            ROW_NUMBER() OVER (
+                PARTITION BY session_id, driver_id, date, lap_number
+                ORDER BY pit_stop_id
+            ) AS rn
+        FROM silver.pit_stops
+    ) ranked
+    WHERE rn > 1
+);
+
+-- Step 2: Deduplicate stints on (session_id, driver_id, lap_start)
+DELETE FROM silver.stints
+WHERE stint_id IN (
+    SELECT stint_id
+    FROM (
+        SELECT
+            stint_id,
+            ROW_NUMBER() OVER (
+                PARTITION BY session_id, driver_id, lap_start
+                ORDER BY stint_id
+            ) AS rn
+        FROM silver.stints
+    ) ranked
+    WHERE rn > 1
+);
+
+-- Step 3: Add unique constraints (idempotent)
+DO $$ BEGIN
+    ALTER TABLE silver.pit_stops
+        ADD CONSTRAINT pit_stops_unique_session_driver_date_lap
+        UNIQUE (session_id, driver_id, date, lap_number);
+EXCEPTION
+    WHEN duplicate_table OR duplicate_object THEN null;
+END $$;
+
+DO $$ BEGIN
+    ALTER TABLE silver.stints
+        ADD CONSTRAINT stints_unique_session_driver_lap_start
+        UNIQUE (session_id, driver_id, lap_start);
+EXCEPTION
+    WHEN duplicate_table OR duplicate_object THEN null;
+END $$;
@@ -0,0 +1,124 @@
+-- Migration: Materialize silver.driver_id_by_session into an indexed table
+-- Purpose: driver_id_by_session is read in full by most silver upserts, looked up
+-- row by row by upsert_race_control.py and joined into the gold views. As a plain
+-- view it re-joins sessions, meetings, driver_numbers_by_season, drivers,
+-- driver_teams_by_session and team_branding on every read.
+--
+-- This migration:
+-- 1. Keeps the original join as silver.driver_id_by_session_source
+-- 2. Stores its rows in silver.driver_id_by_session_mat, indexed on
+--    (openf1_session_key, driver_number) and (session_id, driver_id)
+-- 3. Re-points silver.driver_id_by_session at the table. CREATE OR REPLACE keeps
+--    the existing gold views that depend on it, and the planner inlines the view,
+--    so every consumer reads the indexed table without code changes
+-- 4. Adds silver.refresh_driver_id_by_session(), which rewrites only the sessions
+--    whose source rows differ from the stored ones. Finding them reads the whole source
+--    join, so the silver pipeline calls it once per run, after sessions, drivers, driver
+--    numbers, driver teams and team branding have been upserted
+--    (pitwall_silver/refresh_driver_id_by_session.py).
+
+-- Step 1: Source view (same definition as 04-create-driver-id-by-session-view.sql)
+CREATE OR REPLACE VIEW silver.driver_id_by_session_source AS
+SELECT
+    s.openf1_session_key,
+    s.session_id,
+    s.meeting_id,
+    m.season,
+    dns.driver_number,
+    dns.driver_id,
+    d.name_acronym,
+    dtbs.team_id,
+    tb.team_name,
+    tb.display_name,
+    tb.color_hex,
+    tb.logo_url,
+    tb.car_image_url,
+    d.full_name AS driver_name
+FROM silver.sessions s
+INNER JOIN silver.meetings m
+    ON s.meeting_id = m.meeting_id
+INNER JOIN silver.driver_numbers_by_season dns
+    ON m.season = dns.season
+LEFT JOIN silver.drivers d
+    ON dns.driver_id = d.driver_id
+LEFT JOIN silver.driver_teams_by_session dtbs
+    ON s.session_id = dtbs.session_id
+    AND dns.driver_id = dtbs.driver_id
+LEFT JOIN silver.team_branding tb
+    ON dtbs.team_id = tb.team_id
+    AND m.season = tb.season;
+
+-- Step 2: Materialized rows
+-- No primary key: a team can have several team_branding rows in a season, so the
+-- source may legitimately return more than one row per (session, driver).
+CREATE TABLE IF NOT EXISTS silver.driver_id_by_session_mat AS
+SELECT * FROM silver.driver_id_by_session_source
+WITH NO DATA;
+
+INSERT INTO silver.driver_id_by_session_mat
+SELECT * FROM silver.driver_id_by_session_source
+WHERE NOT EXISTS (SELECT 1 FROM silver.driver_id_by_session_mat);
+
+CREATE INDEX IF NOT EXISTS idx_driver_id_by_session_mat_key_number
+    ON silver.driver_id_by_session_mat(openf1_session_key, driver_number);
+
+CREATE INDEX IF NOT EXISTS idx_driver_id_by_session_mat_session_driver
+    ON silver.driver_id_by_session_mat(session_id, driver_id);
+
+-- Step 3: Re-point the public view at the table
+CREATE OR REPLACE VIEW silver.driver_id_by_session AS
+SELECT
+    openf1_session_key,
+    session_id,
+    meeting_id,
+    season,
+    driver_number,
+    driver_id,
+    name_acronym,
+    team_id,
+    team_name,
+    display_name,
+    color_hex,
+    logo_url,
+    car_image_url,
+    driver_name
+FROM silver.driver_id_by_session_mat;
+
+-- Step 4: Incremental refresh
+-- Compares source and table per session (EXCEPT ALL in both directions) and
+-- replaces the rows of changed sessions only. Returns the number of sessions rewritten.
+CREATE OR REPLACE FUNCTION silver.refresh_driver_id_by_session()
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    changed_sessions INTEGER;
+BEGIN
+    WITH changed AS (
+        SELECT DISTINCT session_id
+        FROM (
+            (SELECT * FROM silver.driver_id_by_session_source
+             EXCEPT ALL
+             SELECT * FROM silver.driver_id_by_session_mat)
+            UNION ALL
+            (SELECT * FROM silver.driver_id_by_session_mat
+             EXCEPT ALL
+             SELECT * FROM silver.driver_id_by_session_source)
+        ) diff
+    ),
+    removed AS (
+        DELETE FROM silver.driver_id_by_session_mat mat
+        USING changed c
+        WHERE mat.session_id = c.session_id
+    ),
+    added AS (
+        INSERT INTO silver.driver_id_by_session_mat
+        SELECT src.*
+        FROM silver.driver_id_by_session_source src
+        INNER JOIN changed c ON src.session_id = c.session_id
+    )
+    SELECT COUNT(*) INTO changed_sessions FROM changed;
+
+    RETURN changed_sessions;
+END;
+$$;
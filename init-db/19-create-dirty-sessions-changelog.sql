@@ -0,0 +1,101 @@
+-- Migration: Dirty-session changelog
+-- Purpose: Let each pipeline stage work only on the sessions that changed since it
+-- last ran, instead of re-reading all of bronze / silver on every update.
+--
+-- This migration:
+-- 1. Creates silver.dirty_sessions, an append-only log of (layer, source table, session)
+-- 2. Creates silver.dirty_session_cursors, the last change each consumer has processed
+-- 3. Adds statement-level triggers so that
+--    - every bronze ingest marks the openf1_session_keys it inserted (layer 'bronze')
+--    - every silver write marks the session_ids it inserted or updated (layer 'silver'),
+--      which forwards the change to downstream silver stages and the gold refresh
+--
+-- Consumers (see run_silver_pipeline.py and update_database.py) read changes with
+-- change_id above their cursor and advance the cursor once they have succeeded.
+-- A consumer without a cursor does a full run first.
+
+-- Step 1: Changelog
+CREATE TABLE IF NOT EXISTS silver.dirty_sessions (
+    change_id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    layer TEXT NOT NULL,                 -- 'bronze' or 'silver'
+    source TEXT NOT NULL,                -- schema-qualified table that changed
+    openf1_session_key TEXT,             -- set for bronze changes
+    session_id TEXT,                     -- set for silver changes
+    marked_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_dirty_sessions_source_change
+    ON silver.dirty_sessions(source, change_id);
+
+-- Step 2: Consumer cursors
+CREATE TABLE IF NOT EXISTS silver.dirty_session_cursors (
+    consumer TEXT NOT NULL PRIMARY KEY,
+    last_change_id BIGINT NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Step 3: Trigger functions (read the statement's transition table "changed_rows")
+CREATE OR REPLACE FUNCTION silver.mark_dirty_bronze_sessions()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO silver.dirty_sessions (layer, source, openf1_session_key)
+    SELECT DISTINCT 'bronze', TG_TABLE_SCHEMA || '.' || TG_TABLE_NAME, openf1_session_key
+    FROM changed_rows
+    WHERE openf1_session_key IS NOT NULL;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION silver.mark_dirty_silver_sessions()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO silver.dirty_sessions (layer, source, session_id)
+    SELECT DISTINCT 'silver', TG_TABLE_SCHEMA || '.' || TG_TABLE_NAME, session_id
+    FROM changed_rows
+    WHERE session_id IS NOT NULL;
+    RETURN NULL;
+END;
+$$;
+
+-- Step 4: Triggers (idempotent). Transition tables need one trigger per event.
+DO $$
+DECLARE
+    t TEXT;
+    ev TEXT;
+BEGIN
+    -- Bronze: every raw table keyed by openf1_session_key (ingest only inserts)
+    FOREACH t IN ARRAY ARRAY[
+        'sessions_raw', 'drivers_raw', 'laps_raw', 'results_raw', 'race_control_raw',
+        'starting_grid_raw', 'pit_stops_raw', 'stints_raw', 'weather_raw', 'overtakes_raw',
+        'intervals_raw', 'position_raw', 'car_telemetry_raw', 'car_gps_raw'
+    ]
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS mark_dirty_insert ON bronze.%I', t);
+        EXECUTE format(
+            'CREATE TRIGGER mark_dirty_insert AFTER INSERT ON bronze.%I '
+            'REFERENCING NEW TABLE AS changed_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION silver.mark_dirty_bronze_sessions()', t);
+    END LOOP;
+
+    -- Silver: every session-scoped table
+    FOREACH t IN ARRAY ARRAY[
+        'sessions', 'driver_teams_by_session', 'driver_id_by_session_mat', 'laps', 'results',
+        'race_control', 'pit_stops', 'stints', 'weather', 'overtakes', 'intervals', 'position',
+        'car_telemetry', 'car_gps'
+    ]
+    LOOP
+        FOREACH ev IN ARRAY ARRAY['insert', 'update']
+        LOOP
+            EXECUTE format('DROP TRIGGER IF EXISTS %I ON silver.%I', 'mark_dirty_' || ev, t);
+            EXECUTE format(
+                'CREATE TRIGGER %I AFTER %s ON silver.%I '
+                'REFERENCING NEW TABLE AS changed_rows '
+                'FOR EACH STATEMENT EXECUTE FUNCTION silver.mark_dirty_silver_sessions()',
+                'mark_dirty_' || ev, upper(ev), t);
+        END LOOP;
+    END LOOP;
+END $$;
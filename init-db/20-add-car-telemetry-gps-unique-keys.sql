@@ -0,0 +1,68 @@
+-- Migration: Natural-key unique constraints for silver.car_telemetry and silver.car_gps
+-- Purpose: Make upsert_car_telemetry.py and upsert_car_gps.py idempotent. They COPY
+-- each session into a staging table and merge it with INSERT ... ON CONFLICT DO NOTHING,
+-- so re-running a partly processed session no longer inserts duplicate samples and the
+-- offline dedupe_and_add_constraints.py pass is not needed.
+--
+-- This migration:
+-- 1. Removes duplicate rows on (session_id, driver_id, date), keeping the oldest by
+--    identity id. Skipped when the constraint already exists (the tables are large)
+-- 2. Adds the unique constraints used as ON CONFLICT targets (same names as
+--    dedupe_and_add_constraints.py, so databases that already ran it are unaffected)
+-- 3. Drops the plain (session_id, driver_id, date) indexes, now covered by the constraints
+
+-- Step 1 and 2: car_telemetry
+DO $$ BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'car_telemetry_unique_session_driver_date'
+    ) THEN
+        DELETE FROM silver.car_telemetry
+        WHERE car_telemetry_id IN (
+            SELECT car_telemetry_id
+            FROM (
+                SELECT
+                    car_telemetry_id,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY session_id, driver_id, date
+                        ORDER BY car_telemetry_id
+                    ) AS rn
+                FROM silver.car_telemetry
+            ) ranked
+            WHERE rn > 1
+        );
+
+        ALTER TABLE silver.car_telemetry
+            ADD CONSTRAINT car_telemetry_unique_session_driver_date
+            UNIQUE (session_id, driver_id, date);
+    END IF;
+END $$;
+
+-- Step 1 and 2: car_gps
+DO $$ BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'car_gps_unique_session_driver_date'
+    ) THEN
+        DELETE FROM silver.car_gps
+        WHERE car_gps_id IN (
+            SELECT car_gps_id
+            FROM (
+                SELECT
+                    car_gps_id,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY session_id, driver_id, date
+                        ORDER BY car_gps_id
+                    ) AS rn
+                FROM silver.car_gps
+            ) ranked
+            WHERE rn > 1
+        );
+
+        ALTER TABLE silver.car_gps
+            ADD CONSTRAINT car_gps_unique_session_driver_date
+            UNIQUE (session_id, driver_id, date);
+    END IF;
+END $$;
+
+-- Step 3: Redundant indexes (see 14-ensure-telemetry-indexes.sql)
+DROP INDEX IF EXISTS silver.idx_car_telemetry_session_driver_date;
+DROP INDEX IF EXISTS silver.idx_car_gps_session_driver_date;
@@ -0,0 +1,321 @@
+-- Migration: Partition silver.car_telemetry and silver.car_gps by session
+-- Purpose: Both tables are single heaps of ~100M rows, but every reader and writer
+-- (gold.telemetry_trace, the loaders' get_unprocessed_sessions, reloads) works one
+-- session at a time. With one LIST partition per session_id, session-level reads,
+-- reloads and deletes touch a single partition, and the indexes shrink to:
+-- - a BRIN index on date (declared on the parent, inherited by every partition)
+-- - a unique btree on (driver_id, date) per partition, the ON CONFLICT DO NOTHING
+--   arbiter for upsert_car_telemetry.py / upsert_car_gps.py. session_id is constant
+--   inside a partition, so it is left out of the key
+--
+-- This migration:
+-- 1. Adds silver.create_session_partition() / silver.ensure_session_partition(), which
+--    create a session's partition on demand (the loaders call the latter before COPY)
+-- 2. Adds the conversion tooling for existing tables:
+--    - silver.begin_partition_migration(table): creates silver.<table>_partitioned and
+--      records the current max id as the copy high-water mark
+--    - silver.copy_session_partition(table, session_id): copies one session (up to the
+--      high-water mark) into its own partition, one transaction per session
+--    - silver.finish_partition_migration(table, keep_old): under an exclusive lock, copies
+--      rows written since the high-water mark, swaps the tables and recreates dependent
+--      views (e.g. gold.telemetry_trace), their indexes and the table's triggers
+--    migrate_telemetry_partitions.py drives these for databases that already hold data
+-- 3. Converts the tables directly when they are empty (fresh databases)
+--
+-- Postgres requires the partition key in any unique index on the parent, so the
+-- identity primary key on *_id becomes a plain BIGINT column fed by a sequence.
+
+-- Step 1: Migration state (copy high-water mark per table)
+CREATE TABLE IF NOT EXISTS silver.partition_migrations (
+    table_name TEXT NOT NULL PRIMARY KEY,
+    high_water BIGINT NOT NULL,
+    started_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Step 2: Per-session partitions
+-- Partitions are named <prefix>_s<openf1_session_key> (prefix defaults to the parent).
+CREATE OR REPLACE FUNCTION silver.session_partition_name(p_prefix TEXT, p_session_id TEXT)
+RETURNS TEXT
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT p_prefix || '_' || COALESCE(
+        (SELECT 's' || regexp_replace(openf1_session_key, '[^A-Za-z0-9]+', '_', 'g')
+         FROM silver.sessions
+         WHERE session_id = p_session_id),
+        'h' || substr(md5(p_session_id), 1, 12)
+    );
+$$;
+
+CREATE OR REPLACE FUNCTION silver.create_session_partition(
+    p_parent TEXT,
+    p_session_id TEXT,
+    p_prefix TEXT DEFAULT NULL
+)
+RETURNS TEXT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    partition_name TEXT := silver.session_partition_name(COALESCE(p_prefix, p_parent), p_session_id);
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS silver.%I PARTITION OF silver.%I FOR VALUES IN (%L)',
+        partition_name, p_parent, p_session_id);
+    EXECUTE format(
+        'CREATE UNIQUE INDEX IF NOT EXISTS %I ON silver.%I (driver_id, date)',
+        partition_name || '_driver_date', partition_name);
+
+    RETURN partition_name;
+END;
+$$;
+
+-- No-op while the table is not partitioned yet, so the loaders work before and after
+-- the conversion.
+CREATE OR REPLACE FUNCTION silver.ensure_session_partition(p_table TEXT, p_session_id TEXT)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_partitioned_table
+        WHERE partrelid = to_regclass(format('silver.%I', p_table))
+    ) THEN
+        PERFORM silver.create_session_partition(p_table, p_session_id);
+    END IF;
+END;
+$$;
+
+-- Step 3: Conversion tooling
+CREATE OR REPLACE FUNCTION silver.begin_partition_migration(p_table TEXT)
+RETURNS BIGINT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    new_table TEXT := p_table || '_partitioned';
+    id_column TEXT := p_table || '_id';
+    id_sequence TEXT := p_table || '_id_seq';
+    fk RECORD;
+    water BIGINT;
+BEGIN
+    IF to_regclass(format('silver.%I', new_table)) IS NULL THEN
+        -- Same columns and NOT NULLs; the identity becomes a sequence default
+        EXECUTE format(
+            'CREATE TABLE silver.%I (LIKE silver.%I) PARTITION BY LIST (session_id)',
+            new_table, p_table);
+        EXECUTE format('CREATE SEQUENCE IF NOT EXISTS silver.%I OWNED BY silver.%I.%I',
+                       id_sequence, new_table, id_column);
+        EXECUTE format('ALTER TABLE silver.%I ALTER COLUMN %I SET DEFAULT nextval(%L)',
+                       new_table, id_column, 'silver.' || id_sequence);
+
+        FOR fk IN
+            SELECT conname, pg_get_constraintdef(oid) AS def
+            FROM pg_constraint
+            WHERE conrelid = format('silver.%I', p_table)::regclass
+              AND contype = 'f'
+        LOOP
+            EXECUTE format('ALTER TABLE silver.%I ADD CONSTRAINT %I %s',
+                           new_table, fk.conname, fk.def);
+        END LOOP;
+
+        EXECUTE format('CREATE INDEX IF NOT EXISTS %I ON silver.%I USING brin (date)',
+                       'idx_' || p_table || '_date_brin', new_table);
+    END IF;
+
+    EXECUTE format('SELECT COALESCE(MAX(%I), 0) FROM silver.%I', id_column, p_table)
+    INTO water;
+
+    INSERT INTO silver.partition_migrations (table_name, high_water)
+    VALUES (p_table, water)
+    ON CONFLICT (table_name) DO NOTHING;
+
+    SELECT high_water INTO water
+    FROM silver.partition_migrations
+    WHERE table_name = p_table;
+
+    RETURN water;
+END;
+$$;
+
+-- Returns the rows copied, or NULL when the session was already copied.
+CREATE OR REPLACE FUNCTION silver.copy_session_partition(p_table TEXT, p_session_id TEXT)
+RETURNS BIGINT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    new_table TEXT := p_table || '_partitioned';
+    id_column TEXT := p_table || '_id';
+    water BIGINT;
+    has_rows BOOLEAN;
+    copied BIGINT;
+BEGIN
+    SELECT high_water INTO water
+    FROM silver.partition_migrations
+    WHERE table_name = p_table;
+
+    IF water IS NULL THEN
+        RAISE EXCEPTION 'No partition migration in progress for silver.%', p_table;
+    END IF;
+
+    -- Each session is copied in one transaction, so an existing partition is complete
+    IF to_regclass(format('silver.%I', silver.session_partition_name(p_table, p_session_id))) IS NOT NULL THEN
+        RETURN NULL;
+    END IF;
+
+    EXECUTE format('SELECT EXISTS (SELECT 1 FROM silver.%I WHERE session_id = $1 AND %I <= $2)',
+                   p_table, id_column)
+    INTO has_rows
+    USING p_session_id, water;
+
+    IF NOT has_rows THEN
+        RETURN 0;
+    END IF;
+
+    PERFORM silver.create_session_partition(new_table, p_session_id, p_table);
+
+    EXECUTE format('INSERT INTO silver.%I SELECT * FROM silver.%I WHERE session_id = $1 AND %I <= $2',
+                   new_table, p_table, id_column)
+    USING p_session_id, water;
+    GET DIAGNOSTICS copied = ROW_COUNT;
+
+    RETURN copied;
+END;
+$$;
+
+-- Returns the rows copied during catch-up.
+CREATE OR REPLACE FUNCTION silver.finish_partition_migration(p_table TEXT, p_keep_old BOOLEAN DEFAULT FALSE)
+RETURNS BIGINT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    new_table TEXT := p_table || '_partitioned';
+    id_column TEXT := p_table || '_id';
+    old_oid REGCLASS := format('silver.%I', p_table)::regclass;
+    water BIGINT;
+    max_id BIGINT;
+    caught_up BIGINT;
+    session_row RECORD;
+    dep RECORD;
+    drop_statements TEXT[] := '{}';
+    create_statements TEXT[] := '{}';
+    statement TEXT;
+BEGIN
+    SELECT high_water INTO water
+    FROM silver.partition_migrations
+    WHERE table_name = p_table;
+
+    IF water IS NULL THEN
+        RAISE EXCEPTION 'No partition migration in progress for silver.%', p_table;
+    END IF;
+
+    EXECUTE format('LOCK TABLE silver.%I IN ACCESS EXCLUSIVE MODE', p_table);
+
+    -- Catch up: rows written since the high-water mark
+    FOR session_row IN EXECUTE format(
+        'SELECT DISTINCT session_id FROM silver.%I WHERE %I > $1', p_table, id_column)
+        USING water
+    LOOP
+        PERFORM silver.create_session_partition(new_table, session_row.session_id, p_table);
+    END LOOP;
+
+    EXECUTE format('INSERT INTO silver.%I SELECT * FROM silver.%I WHERE %I > $1',
+                   new_table, p_table, id_column)
+    USING water;
+    GET DIAGNOSTICS caught_up = ROW_COUNT;
+
+    -- Dependent views and materialized views, with their indexes
+    FOR dep IN
+        SELECT DISTINCT
+            c.oid,
+            n.nspname,
+            c.relname,
+            c.relkind,
+            rtrim(pg_get_viewdef(c.oid), E'; \n') AS def,
+            COALESCE(mv.ispopulated, TRUE) AS populated
+        FROM pg_depend d
+        INNER JOIN pg_rewrite r ON d.classid = 'pg_rewrite'::regclass AND d.objid = r.oid
+        INNER JOIN pg_class c ON r.ev_class = c.oid
+        INNER JOIN pg_namespace n ON c.relnamespace = n.oid
+        LEFT JOIN pg_matviews mv ON mv.schemaname = n.nspname AND mv.matviewname = c.relname
+        WHERE d.refobjid = old_oid
+          AND c.oid <> old_oid
+    LOOP
+        IF dep.relkind = 'm' THEN
+            drop_statements := drop_statements
+                || format('DROP MATERIALIZED VIEW %I.%I', dep.nspname, dep.relname);
+            create_statements := create_statements
+                || format('CREATE MATERIALIZED VIEW %I.%I AS %s WITH %s',
+                          dep.nspname, dep.relname, dep.def,
+                          CASE WHEN dep.populated THEN 'DATA' ELSE 'NO DATA' END);
+        ELSE
+            drop_statements := drop_statements
+                || format('DROP VIEW %I.%I', dep.nspname, dep.relname);
+            create_statements := create_statements
+                || format('CREATE VIEW %I.%I AS %s', dep.nspname, dep.relname, dep.def);
+        END IF;
+
+        SELECT create_statements || COALESCE(array_agg(pg_get_indexdef(indexrelid)), '{}')
+        INTO create_statements
+        FROM pg_index
+        WHERE indrelid = dep.oid;
+    END LOOP;
+
+    -- Table triggers (e.g. the dirty-session triggers from 19-create-dirty-sessions-changelog.sql)
+    SELECT create_statements || COALESCE(array_agg(pg_get_triggerdef(oid)), '{}')
+    INTO create_statements
+    FROM pg_trigger
+    WHERE tgrelid = old_oid
+      AND NOT tgisinternal;
+
+    FOREACH statement IN ARRAY drop_statements
+    LOOP
+        EXECUTE statement;
+    END LOOP;
+
+    -- Swap
+    EXECUTE format('SELECT COALESCE(MAX(%I), 0) FROM silver.%I', id_column, p_table)
+    INTO max_id;
+
+    IF p_keep_old THEN
+        EXECUTE format('ALTER TABLE silver.%I RENAME TO %I', p_table, p_table || '_unpartitioned');
+    ELSE
+        EXECUTE format('DROP TABLE silver.%I', p_table);
+    END IF;
+    EXECUTE format('ALTER TABLE silver.%I RENAME TO %I', new_table, p_table);
+
+    IF max_id > 0 THEN
+        PERFORM setval(format('silver.%I', p_table || '_id_seq')::regclass, max_id);
+    END IF;
+
+    FOREACH statement IN ARRAY create_statements
+    LOOP
+        EXECUTE statement;
+    END LOOP;
+
+    DELETE FROM silver.partition_migrations WHERE table_name = p_table;
+
+    RETURN caught_up;
+END;
+$$;
+
+-- Step 4: Convert empty tables right away (fresh databases)
+DO $$
+DECLARE
+    t TEXT;
+    has_rows BOOLEAN;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['car_telemetry', 'car_gps']
+    LOOP
+        CONTINUE WHEN EXISTS (
+            SELECT 1 FROM pg_partitioned_table
+            WHERE partrelid = format('silver.%I', t)::regclass
+        );
+
+        EXECUTE format('SELECT EXISTS (SELECT 1 FROM silver.%I)', t) INTO has_rows;
+        IF has_rows THEN
+            RAISE NOTICE 'silver.% holds data: run migrate_telemetry_partitions.py to partition it', t;
+        ELSE
+            PERFORM silver.begin_partition_migration(t);
+            PERFORM silver.finish_partition_migration(t);
+        END IF;
+    END LOOP;
+END $$;
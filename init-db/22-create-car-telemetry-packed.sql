@@ -0,0 +1,168 @@
+-- Migration: Packed per-lap telemetry storage
+-- Purpose: silver.car_telemetry stores one row per sample (~3.7 Hz per car). The tuple
+-- header, identity id and session/driver text keys outweigh the 6 small channel values.
+-- Packing a lap into one row of arrays cuts storage roughly 10x (arrays are TOAST
+-- compressed) and turns a per-lap read into a single-row lookup.
+--
+-- This migration:
+-- 1. Creates silver.car_telemetry_packed: one row per (session_id, driver_id, lap_number),
+--    holding millisecond offsets from date_start plus one SMALLINT array per channel.
+--    lap_number 0 holds the samples before a driver's first lap; samples after the last
+--    lap start belong to the last lap, so packing is lossless
+-- 2. Adds silver.pack_car_telemetry(session_id), which moves a session's rows from
+--    silver.car_telemetry into packed rows (merging with rows packed earlier). Used by
+--    pitwall_silver/pack_car_telemetry.py; packing is optional and per session
+-- 3. Creates silver.car_telemetry_samples, a compatibility view with the sample-level
+--    columns of silver.car_telemetry over both representations. Readers that should see
+--    packed sessions use it instead of the table
+-- 4. Logs packed sessions to silver.dirty_sessions (see 19-create-dirty-sessions-changelog.sql)
+
+-- Step 1: Packed table
+CREATE TABLE IF NOT EXISTS silver.car_telemetry_packed (
+    session_id TEXT NOT NULL REFERENCES silver.sessions(session_id),
+    driver_id TEXT NOT NULL REFERENCES silver.drivers(driver_id),
+    lap_number INT NOT NULL,
+    date_start TIMESTAMPTZ NOT NULL,       -- first sample of the lap
+    sample_count INT NOT NULL,
+    offset_ms INT[] NOT NULL,              -- sample time - date_start, ascending
+    drs SMALLINT[] NOT NULL,
+    n_gear SMALLINT[] NOT NULL,
+    rpm SMALLINT[] NOT NULL,
+    speed_kph SMALLINT[] NOT NULL,
+    throttle SMALLINT[] NOT NULL,
+    brake SMALLINT[] NOT NULL,
+    PRIMARY KEY (session_id, driver_id, lap_number)
+);
+
+-- Step 2: Packing
+-- Returns the number of (driver, lap) rows written for the session.
+CREATE OR REPLACE FUNCTION silver.pack_car_telemetry(p_session_id TEXT)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    packed_laps INTEGER;
+BEGIN
+    -- Samples already packed for the session are merged with the new raw rows.
+    -- Offsets are stored in milliseconds, so timestamps are truncated to match.
+    CREATE TEMP TABLE car_telemetry_pack_samples ON COMMIT DROP AS
+    SELECT DISTINCT ON (driver_id, date)
+        driver_id, date, drs, n_gear, rpm, speed_kph, throttle, brake
+    FROM (
+        SELECT driver_id, date_trunc('milliseconds', date) AS date,
+               drs, n_gear, rpm, speed_kph, throttle, brake
+        FROM silver.car_telemetry
+        WHERE session_id = p_session_id
+        UNION ALL
+        SELECT driver_id, date, drs, n_gear, rpm, speed_kph, throttle, brake
+        FROM silver.car_telemetry_samples
+        WHERE session_id = p_session_id
+          AND from_packed
+    ) s
+    ORDER BY driver_id, date;
+
+    DELETE FROM silver.car_telemetry_packed WHERE session_id = p_session_id;
+
+    WITH lap_bounds AS (
+        SELECT
+            driver_id,
+            lap_number,
+            date_start,
+            LEAD(date_start) OVER (PARTITION BY driver_id ORDER BY lap_number) AS next_start
+        FROM silver.laps
+        WHERE session_id = p_session_id
+          AND date_start IS NOT NULL
+    ),
+    assigned AS (
+        SELECT
+            s.*,
+            COALESCE(lb.lap_number, 0) AS lap_number
+        FROM car_telemetry_pack_samples s
+        LEFT JOIN lap_bounds lb
+            ON lb.driver_id = s.driver_id
+            AND s.date >= lb.date_start
+            AND (lb.next_start IS NULL OR s.date < lb.next_start)
+    ),
+    lap_starts AS (
+        SELECT
+            a.*,
+            MIN(a.date) OVER (PARTITION BY a.driver_id, a.lap_number) AS date_start
+        FROM assigned a
+    )
+    INSERT INTO silver.car_telemetry_packed (
+        session_id, driver_id, lap_number, date_start, sample_count,
+        offset_ms, drs, n_gear, rpm, speed_kph, throttle, brake
+    )
+    SELECT
+        p_session_id,
+        driver_id,
+        lap_number,
+        date_start,
+        COUNT(*),
+        array_agg((EXTRACT(EPOCH FROM (date - date_start)) * 1000)::INT ORDER BY date),
+        array_agg(drs::SMALLINT ORDER BY date),
+        array_agg(n_gear::SMALLINT ORDER BY date),
+        array_agg(rpm::SMALLINT ORDER BY date),
+        array_agg(speed_kph::SMALLINT ORDER BY date),
+        array_agg(throttle::SMALLINT ORDER BY date),
+        array_agg(brake::SMALLINT ORDER BY date)
+    FROM lap_starts
+    GROUP BY driver_id, lap_number, date_start;
+
+    GET DIAGNOSTICS packed_laps = ROW_COUNT;
+
+    -- One partition (see 21-partition-car-telemetry-gps.sql)
+    DELETE FROM silver.car_telemetry WHERE session_id = p_session_id;
+
+    DROP TABLE car_telemetry_pack_samples;
+
+    RETURN packed_laps;
+END;
+$$;
+
+-- Step 3: Compatibility view
+CREATE OR REPLACE VIEW silver.car_telemetry_samples AS
+SELECT
+    ct.session_id,
+    ct.driver_id,
+    ct.date,
+    ct.drs,
+    ct.n_gear,
+    ct.rpm,
+    ct.speed_kph,
+    ct.throttle,
+    ct.brake,
+    FALSE AS from_packed
+FROM silver.car_telemetry ct
+UNION ALL
+SELECT
+    p.session_id,
+    p.driver_id,
+    p.date_start + s.offset_ms * INTERVAL '1 millisecond' AS date,
+    s.drs::INT,
+    s.n_gear::INT,
+    s.rpm::INT,
+    s.speed_kph::INT,
+    s.throttle::INT,
+    s.brake::INT,
+    TRUE AS from_packed
+FROM silver.car_telemetry_packed p
+CROSS JOIN LATERAL unnest(
+    p.offset_ms, p.drs, p.n_gear, p.rpm, p.speed_kph, p.throttle, p.brake
+) AS s(offset_ms, drs, n_gear, rpm, speed_kph, throttle, brake);
+
+-- Step 4: Dirty-session triggers
+DO $$
+DECLARE
+    ev TEXT;
+BEGIN
+    FOREACH ev IN ARRAY ARRAY['insert', 'update']
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON silver.car_telemetry_packed', 'mark_dirty_' || ev);
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER %s ON silver.car_telemetry_packed '
+            'REFERENCING NEW TABLE AS changed_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION silver.mark_dirty_silver_sessions()',
+            'mark_dirty_' || ev, upper(ev));
+    END LOOP;
+END $$;
@@ -0,0 +1,38 @@
+-- Migration: Multi-resolution telemetry (level of detail) for charting
+-- Purpose: A whole race of speed/throttle for 20 cars at ~3.7 Hz is far more than a chart
+-- can draw. gold.telemetry_lod stores downsampled min/max/mean buckets per driver so any
+-- time range can be served at the resolution the viewport needs:
+-- - full: silver.car_telemetry_samples (raw or packed samples, not stored here)
+-- - '1s': 1 second buckets (~1 Hz)
+-- - '5s': 5 second buckets (~0.2 Hz)
+-- - 'lap': one bucket per lap
+-- Buckets never span a lap boundary. bucket_start / bucket_end are the first and last
+-- sample in the bucket.
+--
+-- Built per session by pitwall_silver/build_telemetry_lod.py, which only rebuilds the
+-- sessions whose telemetry or laps changed (silver.dirty_sessions).
+
+CREATE TABLE IF NOT EXISTS gold.telemetry_lod (
+    session_id TEXT NOT NULL REFERENCES silver.sessions(session_id),
+    driver_id TEXT NOT NULL REFERENCES silver.drivers(driver_id),
+    level TEXT NOT NULL,                 -- '1s', '5s' or 'lap'
+    bucket_start TIMESTAMPTZ NOT NULL,
+    bucket_end TIMESTAMPTZ NOT NULL,
+    lap_number INT NOT NULL,             -- 0 before the driver's first lap or after the last
+    sample_count INT NOT NULL,
+    speed_min INT,
+    speed_max INT,
+    speed_mean REAL,
+    rpm_min INT,
+    rpm_max INT,
+    rpm_mean REAL,
+    throttle_min INT,
+    throttle_max INT,
+    throttle_mean REAL,
+    brake_max INT,
+    brake_mean REAL,
+    n_gear_min INT,
+    n_gear_max INT,
+    drs_max INT,
+    PRIMARY KEY (session_id, driver_id, level, bucket_start)
+);
@@ -0,0 +1,334 @@
+-- Migration: Set-based telemetry <-> GPS <-> lap alignment for gold.telemetry_trace
+-- Purpose: 14-create-telemetry-trace-view.sql matches every telemetry sample to GPS with a
+-- LATERAL subquery (±0.3 s range probe ordered by ABS(EXTRACT(EPOCH ...))), then probes
+-- laps with a second LATERAL, then DISTINCT ON-sorts both. That is one index probe per
+-- sample per step, and the full refresh does not finish on the whole history.
+--
+-- This migration:
+-- 1. Adds gold.align_telemetry(session_ids), which produces the telemetry_trace rows with
+--    sorted merge ("as-of") joins instead of probes:
+--    - telemetry samples and GPS fixes of a (session, driver) are unioned into one stream
+--      ordered by time. A running COUNT of GPS fixes (forwards and backwards) groups each
+--      sample with its previous and next fix, and the closer one within 0.3 s is kept
+--    - the same trick against lap start times assigns each sample to the lap whose
+--      [date_start, date_end) contains it
+--    Every step is a handful of window sorts over the stream, O(n log n) overall.
+--    Reads silver.car_telemetry_samples, so packed sessions are included. NULL = all sessions
+-- 2. Re-creates gold.telemetry_trace on top of it with the same columns and indexes
+--
+-- Results match the LATERAL version except for exact ties (equidistant GPS fixes, laps
+-- sharing a start time), where either choice was arbitrary before.
+-- benchmark_telemetry_alignment.py compares both on real sessions.
+
+-- Step 1: Alignment function
+CREATE OR REPLACE FUNCTION gold.align_telemetry(p_session_ids TEXT[] DEFAULT NULL)
+RETURNS TABLE (
+    season INT,
+    round_number INT,
+    meeting_official_name TEXT,
+    circuit_name TEXT,
+    session_type silver.session_type_enum,
+    session_id TEXT,
+    driver_id TEXT,
+    driver_number INT,
+    driver_name TEXT,
+    name_acronym CHAR(3),
+    team_id TEXT,
+    team_name TEXT,
+    display_name TEXT,
+    color_hex TEXT,
+    sample_timestamp TIMESTAMPTZ,
+    lap_id BIGINT,
+    lap_number INT,
+    drs INT,
+    n_gear INT,
+    rpm INT,
+    speed_kph INT,
+    throttle INT,
+    brake INT,
+    x INT,
+    y INT,
+    z INT,
+    pit_date TIMESTAMPTZ,
+    pit_duration_ms INT,
+    is_slow_stop BOOLEAN,
+    is_early_stop BOOLEAN,
+    is_late_stop BOOLEAN
+)
+LANGUAGE sql
+STABLE
+AS $$
+WITH trace_sessions AS (
+    SELECT s.session_id
+    FROM silver.sessions s
+    WHERE s.session_type IN ('race', 'sprint', 'quali', 'sprint_quali')
+      AND (p_session_ids IS NULL OR s.session_id = ANY(p_session_ids))
+),
+gps_stream AS (
+    -- Telemetry samples and GPS fixes as one stream per (session, driver)
+    SELECT
+        ct.session_id, ct.driver_id, ct.date, TRUE AS is_sample,
+        ct.drs, ct.n_gear, ct.rpm, ct.speed_kph, ct.throttle, ct.brake,
+        NULL::INT AS x, NULL::INT AS y, NULL::INT AS z
+    FROM silver.car_telemetry_samples ct
+    INNER JOIN trace_sessions ts ON ct.session_id = ts.session_id
+    WHERE p_session_ids IS NULL OR ct.session_id = ANY(p_session_ids)
+    UNION ALL
+    SELECT
+        cg.session_id, cg.driver_id, cg.date, FALSE,
+        NULL, NULL, NULL, NULL, NULL, NULL,
+        cg.x, cg.y, cg.z
+    FROM silver.car_gps cg
+    INNER JOIN trace_sessions ts ON cg.session_id = ts.session_id
+    WHERE p_session_ids IS NULL OR cg.session_id = ANY(p_session_ids)
+),
+gps_groups AS (
+    -- Every GPS fix opens a group: prev_grp in time order, next_grp in reverse order.
+    -- Fixes sort before samples at the same timestamp.
+    SELECT
+        g.*,
+        COUNT(*) FILTER (WHERE NOT g.is_sample) OVER (
+            PARTITION BY g.session_id, g.driver_id ORDER BY g.date, g.is_sample
+        ) AS prev_grp,
+        COUNT(*) FILTER (WHERE NOT g.is_sample) OVER (
+            PARTITION BY g.session_id, g.driver_id ORDER BY g.date DESC, g.is_sample
+        ) AS next_grp
+    FROM gps_stream g
+),
+gps_neighbours AS (
+    -- Carry each group's fix to the samples in it
+    SELECT
+        g.*,
+        MAX(g.date) FILTER (WHERE NOT g.is_sample) OVER prev_fix AS prev_date,
+        MAX(g.x) FILTER (WHERE NOT g.is_sample) OVER prev_fix AS prev_x,
+        MAX(g.y) FILTER (WHERE NOT g.is_sample) OVER prev_fix AS prev_y,
+        MAX(g.z) FILTER (WHERE NOT g.is_sample) OVER prev_fix AS prev_z,
+        MAX(g.date) FILTER (WHERE NOT g.is_sample) OVER next_fix AS next_date,
+        MAX(g.x) FILTER (WHERE NOT g.is_sample) OVER next_fix AS next_x,
+        MAX(g.y) FILTER (WHERE NOT g.is_sample) OVER next_fix AS next_y,
+        MAX(g.z) FILTER (WHERE NOT g.is_sample) OVER next_fix AS next_z
+    FROM gps_groups g
+    WINDOW
+        prev_fix AS (PARTITION BY g.session_id, g.driver_id, g.prev_grp),
+        next_fix AS (PARTITION BY g.session_id, g.driver_id, g.next_grp)
+),
+gps_choice AS (
+    -- Nearest fix within 0.3 s (the earlier one on ties)
+    SELECT
+        n.*,
+        CASE
+            WHEN n.prev_date IS NOT NULL
+                 AND n.date - n.prev_date < INTERVAL '0.3 seconds'
+                 AND (n.next_date IS NULL OR n.date - n.prev_date <= n.next_date - n.date)
+            THEN 'prev'
+            WHEN n.next_date IS NOT NULL
+                 AND n.next_date - n.date < INTERVAL '0.3 seconds'
+            THEN 'next'
+        END AS fix
+    FROM gps_neighbours n
+    WHERE n.is_sample
+),
+telemetry_with_gps AS (
+    SELECT
+        c.session_id,
+        c.driver_id,
+        c.date AS sample_timestamp,
+        c.drs, c.n_gear, c.rpm, c.speed_kph, c.throttle, c.brake,
+        CASE c.fix WHEN 'prev' THEN c.prev_x WHEN 'next' THEN c.next_x END AS x,
+        CASE c.fix WHEN 'prev' THEN c.prev_y WHEN 'next' THEN c.next_y END AS y,
+        CASE c.fix WHEN 'prev' THEN c.prev_z WHEN 'next' THEN c.next_z END AS z
+    FROM gps_choice c
+),
+laps_with_end AS (
+    -- Calculate lap end time from next lap's start or lap duration
+    SELECT
+        l.session_id,
+        l.driver_id,
+        l.lap_id,
+        l.lap_number,
+        l.date_start,
+        COALESCE(
+            LEAD(l.date_start) OVER (
+                PARTITION BY l.session_id, l.driver_id
+                ORDER BY l.lap_number
+            ),
+            CASE
+                WHEN l.lap_duration_ms IS NOT NULL
+                THEN l.date_start + (l.lap_duration_ms || ' milliseconds')::INTERVAL
+                ELSE l.date_start + INTERVAL '2 minutes'  -- Fallback for missing duration
+            END
+        ) AS date_end
+    FROM silver.laps l
+    INNER JOIN trace_sessions ts ON l.session_id = ts.session_id
+),
+lap_stream AS (
+    -- Samples and lap starts as one stream per (session, driver)
+    SELECT
+        t.session_id, t.driver_id, t.sample_timestamp AS date, TRUE AS is_sample,
+        t.drs, t.n_gear, t.rpm, t.speed_kph, t.throttle, t.brake, t.x, t.y, t.z,
+        NULL::BIGINT AS lap_id, NULL::INT AS lap_number, NULL::TIMESTAMPTZ AS date_end
+    FROM telemetry_with_gps t
+    UNION ALL
+    SELECT
+        lwe.session_id, lwe.driver_id, lwe.date_start, FALSE,
+        NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL,
+        lwe.lap_id, lwe.lap_number, lwe.date_end
+    FROM laps_with_end lwe
+),
+lap_groups AS (
+    -- Every lap start opens a group (lap starts sort before samples at the same timestamp)
+    SELECT
+        ls.*,
+        COUNT(*) FILTER (WHERE NOT ls.is_sample) OVER (
+            PARTITION BY ls.session_id, ls.driver_id ORDER BY ls.date, ls.is_sample
+        ) AS lap_grp
+    FROM lap_stream ls
+),
+lap_carried AS (
+    SELECT
+        lg.*,
+        MAX(lg.lap_id) FILTER (WHERE NOT lg.is_sample) OVER current_lap AS grp_lap_id,
+        MAX(lg.lap_number) FILTER (WHERE NOT lg.is_sample) OVER current_lap AS grp_lap_number,
+        MAX(lg.date_end) FILTER (WHERE NOT lg.is_sample) OVER current_lap AS grp_date_end
+    FROM lap_groups lg
+    WINDOW current_lap AS (PARTITION BY lg.session_id, lg.driver_id, lg.lap_grp)
+),
+telemetry_with_lap AS (
+    -- Map telemetry samples to lap context ([date_start, date_end) of the latest lap start)
+    SELECT
+        lc.session_id,
+        lc.driver_id,
+        lc.date AS sample_timestamp,
+        lc.drs, lc.n_gear, lc.rpm, lc.speed_kph, lc.throttle, lc.brake,
+        lc.x, lc.y, lc.z,
+        CASE WHEN lc.date < lc.grp_date_end THEN lc.grp_lap_id END AS lap_id,
+        CASE WHEN lc.date < lc.grp_date_end THEN lc.grp_lap_number END AS lap_number
+    FROM lap_carried lc
+    WHERE lc.is_sample
+),
+pit_stop_session_stats AS (
+    -- Calculate session-level pit stop statistics for derived flags
+    SELECT
+        ps.session_id,
+        PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY ps.pit_duration_ms) AS median_pit_duration_ms,
+        PERCENTILE_CONT(0.1) WITHIN GROUP (ORDER BY EXTRACT(EPOCH FROM ps.date)) AS early_pit_threshold_epoch,
+        PERCENTILE_CONT(0.9) WITHIN GROUP (ORDER BY EXTRACT(EPOCH FROM ps.date)) AS late_pit_threshold_epoch
+    FROM silver.pit_stops ps
+    INNER JOIN silver.sessions s ON ps.session_id = s.session_id
+    INNER JOIN trace_sessions ts ON ps.session_id = ts.session_id
+    WHERE s.session_type IN ('race', 'sprint')
+      AND ps.pit_duration_ms IS NOT NULL
+    GROUP BY ps.session_id
+),
+pit_stop_data AS (
+    -- Get pit stop data with session statistics
+    SELECT
+        ps.session_id,
+        ps.driver_id,
+        ps.lap_number,
+        ps.date AS pit_date,
+        ps.pit_duration_ms,
+        psss.median_pit_duration_ms,
+        to_timestamp(psss.early_pit_threshold_epoch) AS early_pit_threshold,
+        to_timestamp(psss.late_pit_threshold_epoch) AS late_pit_threshold
+    FROM silver.pit_stops ps
+    INNER JOIN silver.sessions s ON ps.session_id = s.session_id
+    INNER JOIN trace_sessions ts ON ps.session_id = ts.session_id
+    LEFT JOIN pit_stop_session_stats psss ON ps.session_id = psss.session_id
+    WHERE s.session_type IN ('race', 'sprint')
+)
+SELECT
+    -- Meeting metadata
+    m.season,
+    m.round_number,
+    m.meeting_official_name,
+    c.circuit_name,
+    s.session_type,
+
+    -- Session and sample identifiers
+    twl.session_id,
+    twl.driver_id,
+    dis.driver_number,
+    dis.driver_name,
+    dis.name_acronym,
+    dis.team_id,
+    dis.team_name,
+    dis.display_name,
+    dis.color_hex,
+    twl.sample_timestamp,
+
+    -- Lap context
+    twl.lap_id,
+    twl.lap_number,
+
+    -- Telemetry data
+    twl.drs,
+    twl.n_gear,
+    twl.rpm,
+    twl.speed_kph,
+    twl.throttle,
+    twl.brake,
+
+    -- GPS coordinates
+    twl.x,
+    twl.y,
+    twl.z,
+
+    -- Pit stop data (from lap context)
+    psd.pit_date,
+    psd.pit_duration_ms,
+
+    -- Derived flags
+    CASE
+        WHEN psd.pit_duration_ms IS NOT NULL
+             AND psd.pit_duration_ms > psd.median_pit_duration_ms
+        THEN true
+        ELSE false
+    END AS is_slow_stop,
+    CASE
+        WHEN psd.pit_date IS NOT NULL
+             AND psd.pit_date <= psd.early_pit_threshold
+        THEN true
+        ELSE false
+    END AS is_early_stop,
+    CASE
+        WHEN psd.pit_date IS NOT NULL
+             AND psd.pit_date >= psd.late_pit_threshold
+        THEN true
+        ELSE false
+    END AS is_late_stop
+FROM telemetry_with_lap twl
+INNER JOIN silver.sessions s ON twl.session_id = s.session_id
+INNER JOIN silver.meetings m ON s.meeting_id = m.meeting_id
+INNER JOIN silver.circuits c ON m.circuit_id = c.circuit_id
+INNER JOIN silver.driver_id_by_session dis
+    ON twl.session_id = dis.session_id
+    AND twl.driver_id = dis.driver_id
+LEFT JOIN pit_stop_data psd
+    ON twl.session_id = psd.session_id
+    AND twl.driver_id = psd.driver_id
+    AND twl.lap_number = psd.lap_number
+$$;
+
+-- Step 2: Re-create gold.telemetry_trace on the set-based alignment
+DROP MATERIALIZED VIEW IF EXISTS gold.telemetry_trace CASCADE;
+
+CREATE MATERIALIZED VIEW gold.telemetry_trace AS
+SELECT *
+FROM gold.align_telemetry()
+ORDER BY
+    season,
+    session_id,
+    driver_id,
+    sample_timestamp;
+
+CREATE INDEX IF NOT EXISTS idx_telemetry_trace_session_driver_timestamp
+    ON gold.telemetry_trace(session_id, driver_id, sample_timestamp);
+CREATE INDEX IF NOT EXISTS idx_telemetry_trace_session_lap
+    ON gold.telemetry_trace(session_id, lap_number);
+CREATE INDEX IF NOT EXISTS idx_telemetry_trace_season
+    ON gold.telemetry_trace(season);
+CREATE INDEX IF NOT EXISTS idx_telemetry_trace_session_type
+    ON gold.telemetry_trace(session_type);
+CREATE INDEX IF NOT EXISTS idx_telemetry_trace_lap_id
+    ON gold.telemetry_trace(lap_id) WHERE lap_id IS NOT NULL;
@@ -0,0 +1,70 @@
+-- Migration: gold.telemetry_trace as an incrementally maintained table
+-- Purpose: As a materialized view, every refresh of gold.telemetry_trace re-aligned all
+-- telemetry ever loaded (and sorted it). Sessions never change once settled, so the trace
+-- is now a plain table rebuilt one session at a time.
+--
+-- This migration:
+-- 1. Drops the gold.telemetry_trace materialized view (24-create-telemetry-alignment.sql)
+-- 2. Creates gold.telemetry_trace as a table with the same columns, keyed by
+--    (session_id, driver_id, sample_timestamp), and the same secondary indexes
+--
+-- pitwall_silver/build_telemetry_trace.py fills it: per session, a delete and an insert
+-- from gold.align_telemetry() in one transaction. It runs as a dirty-session stage with
+-- the high-volume scripts, so only sessions whose telemetry, GPS, laps, pit stops or
+-- driver mapping changed are rebuilt. Its first run (no cursor yet) builds every session.
+
+-- Step 1: Drop the materialized view
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_matviews
+        WHERE schemaname = 'gold' AND matviewname = 'telemetry_trace'
+    ) THEN
+        DROP MATERIALIZED VIEW gold.telemetry_trace CASCADE;
+    END IF;
+END $$;
+
+-- Step 2: Trace table
+CREATE TABLE IF NOT EXISTS gold.telemetry_trace (
+    season INT,
+    round_number INT,
+    meeting_official_name TEXT,
+    circuit_name TEXT,
+    session_type silver.session_type_enum,
+    session_id TEXT NOT NULL,
+    driver_id TEXT NOT NULL,
+    driver_number INT,
+    driver_name TEXT,
+    name_acronym CHAR(3),
+    team_id TEXT,
+    team_name TEXT,
+    display_name TEXT,
+    color_hex TEXT,
+    sample_timestamp TIMESTAMPTZ NOT NULL,
+    lap_id BIGINT,
+    lap_number INT,
+    drs INT,
+    n_gear INT,
+    rpm INT,
+    speed_kph INT,
+    throttle INT,
+    brake INT,
+    x INT,
+    y INT,
+    z INT,
+    pit_date TIMESTAMPTZ,
+    pit_duration_ms INT,
+    is_slow_stop BOOLEAN,
+    is_early_stop BOOLEAN,
+    is_late_stop BOOLEAN,
+    PRIMARY KEY (session_id, driver_id, sample_timestamp)
+);
+
+CREATE INDEX IF NOT EXISTS idx_telemetry_trace_session_lap
+    ON gold.telemetry_trace(session_id, lap_number);
+CREATE INDEX IF NOT EXISTS idx_telemetry_trace_season
+    ON gold.telemetry_trace(season);
+CREATE INDEX IF NOT EXISTS idx_telemetry_trace_session_type
+    ON gold.telemetry_trace(session_type);
+CREATE INDEX IF NOT EXISTS idx_telemetry_trace_lap_id
+    ON gold.telemetry_trace(lap_id) WHERE lap_id IS NOT NULL;
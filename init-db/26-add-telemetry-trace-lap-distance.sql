@@ -0,0 +1,165 @@
+-- Migration: Distance-along-lap channel for gold.telemetry_trace
+-- Purpose: Comparing laps needs samples aligned by track position, but telemetry and GPS
+-- only carry timestamps. Deriving distance per request means re-reading and integrating
+-- a whole lap each time; storing it with the trace turns it into a column lookup.
+--
+-- This migration:
+-- 1. Adds lap_distance_m (metres since the lap's start line crossing) and lap_fraction
+--    (lap_distance_m / full lap length, 0-1) to gold.telemetry_trace
+-- 2. Adds gold.telemetry_trace_rows(session_ids), gold.align_telemetry() plus the two
+--    channels, returning gold.telemetry_trace rows. pitwall_silver/build_telemetry_trace.py
+--    inserts from it.
+--    align_telemetry() can return a sample more than once: a lap with two pit stop rows,
+--    or a driver with several driver_id_by_session rows (two driver numbers in a season,
+--    several team_branding rows). One row per (session, driver, sample) is kept: the
+--    lowest driver number, then team name, display name and colour, then the lap's first
+--    pit stop. Per (session, driver, lap), with window functions:
+--    - distance is the trapezoidal integral of speed over time, anchored at
+--      silver.laps.date_start: the first sample's speed times the gap from the lap start
+--      is added, since the first sample usually comes a few hundred ms after the line
+--    - the lap length adds the last sample's speed times the gap to the lap end
+--      (date_start + lap_duration_ms, else the next lap's start), so lap_fraction
+--      reaches 1 at the line rather than at the last sample
+--    - the GPS path length (x/y are in 1/10 m) over the steps where both samples have a
+--      position, divided by the speed integral over the same steps, gives a scale factor
+--      that corrects speed sensor bias. It is only applied between 0.8 and 1.2, so laps
+--      with sparse or jumpy GPS keep the plain integral
+--    Samples without a lap get NULLs
+--
+-- Existing trace rows keep NULL channels until their session is rebuilt
+-- (python3 pitwall_silver/build_telemetry_trace.py). Every statement here can be re-run, so
+-- applying this file again picks up changes to the function.
+
+-- Step 1: Columns
+ALTER TABLE gold.telemetry_trace ADD COLUMN IF NOT EXISTS lap_distance_m REAL;
+ALTER TABLE gold.telemetry_trace ADD COLUMN IF NOT EXISTS lap_fraction REAL;
+
+-- Step 2: Trace rows with the distance channels
+CREATE OR REPLACE FUNCTION gold.telemetry_trace_rows(p_session_ids TEXT[] DEFAULT NULL)
+RETURNS SETOF gold.telemetry_trace
+LANGUAGE sql
+STABLE
+AS $$
+WITH aligned AS (
+    -- One row per sample (the table's key), preferring the same row on every build
+    SELECT DISTINCT ON (a.session_id, a.driver_id, a.sample_timestamp)
+        a.*
+    FROM gold.align_telemetry(p_session_ids) a
+    ORDER BY
+        a.session_id,
+        a.driver_id,
+        a.sample_timestamp,
+        a.driver_number,
+        a.team_name NULLS LAST,
+        a.display_name NULLS LAST,
+        a.color_hex NULLS LAST,
+        a.pit_date NULLS LAST,
+        a.pit_duration_ms NULLS LAST
+),
+lap_bounds AS (
+    SELECT
+        l.lap_id,
+        l.date_start,
+        COALESCE(
+            l.date_start + l.lap_duration_ms * INTERVAL '1 millisecond',
+            LEAD(l.date_start) OVER (PARTITION BY l.session_id, l.driver_id ORDER BY l.lap_number)
+        ) AS date_end
+    FROM silver.laps l
+    WHERE p_session_ids IS NULL OR l.session_id = ANY(p_session_ids)
+),
+steps AS (
+    SELECT
+        a.*,
+        lb.date_start AS lap_start,
+        lb.date_end AS lap_end,
+        EXTRACT(EPOCH FROM a.sample_timestamp - LAG(a.sample_timestamp) OVER lap_order) AS step_s,
+        (a.speed_kph + LAG(a.speed_kph) OVER lap_order) / 2.0 / 3.6 AS step_speed_ms,
+        SQRT(
+            POWER(a.x - LAG(a.x) OVER lap_order, 2) + POWER(a.y - LAG(a.y) OVER lap_order, 2)
+        ) / 10.0 AS gps_step_m
+    FROM aligned a
+    LEFT JOIN lap_bounds lb ON a.lap_id = lb.lap_id
+    WINDOW lap_order AS (
+        PARTITION BY a.session_id, a.driver_id, a.lap_number ORDER BY a.sample_timestamp
+    )
+),
+integrated AS (
+    SELECT
+        s.*,
+        SUM(COALESCE(s.step_speed_ms * s.step_s, 0)) OVER lap_running AS speed_distance_m,
+        SUM(COALESCE(s.step_speed_ms * s.step_s, 0)) OVER lap_total AS speed_total_m,
+        -- Distance covered between the line and the first sample, and after the last one
+        COALESCE(FIRST_VALUE(s.speed_kph) OVER lap_span / 3.6, 0) * GREATEST(
+            COALESCE(EXTRACT(EPOCH FROM MIN(s.sample_timestamp) OVER lap_total - s.lap_start), 0), 0
+        ) AS lead_in_m,
+        COALESCE(LAST_VALUE(s.speed_kph) OVER lap_span / 3.6, 0) * GREATEST(
+            COALESCE(EXTRACT(EPOCH FROM s.lap_end - MAX(s.sample_timestamp) OVER lap_total), 0), 0
+        ) AS lead_out_m,
+        SUM(s.gps_step_m) OVER lap_total
+            / NULLIF(SUM(s.step_speed_ms * s.step_s) FILTER (WHERE s.gps_step_m IS NOT NULL) OVER lap_total, 0)
+            AS gps_scale
+    FROM steps s
+    WINDOW
+        lap_running AS (
+            PARTITION BY s.session_id, s.driver_id, s.lap_number ORDER BY s.sample_timestamp
+            ROWS UNBOUNDED PRECEDING
+        ),
+        lap_total AS (PARTITION BY s.session_id, s.driver_id, s.lap_number),
+        lap_span AS (
+            PARTITION BY s.session_id, s.driver_id, s.lap_number ORDER BY s.sample_timestamp
+            ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING
+        )
+),
+scaled AS (
+    SELECT
+        i.*,
+        CASE WHEN i.gps_scale BETWEEN 0.8 AND 1.2 THEN i.gps_scale ELSE 1 END AS scale
+    FROM integrated i
+),
+distances AS (
+    SELECT
+        sc.*,
+        CASE WHEN sc.lap_number IS NOT NULL
+            THEN (sc.lead_in_m + sc.speed_distance_m) * sc.scale
+        END AS distance_m,
+        CASE WHEN sc.lap_number IS NOT NULL
+            THEN (sc.lead_in_m + sc.speed_total_m + sc.lead_out_m) * sc.scale
+        END AS lap_length_m
+    FROM scaled sc
+)
+SELECT
+    d.season,
+    d.round_number,
+    d.meeting_official_name,
+    d.circuit_name,
+    d.session_type,
+    d.session_id,
+    d.driver_id,
+    d.driver_number,
+    d.driver_name,
+    d.name_acronym,
+    d.team_id,
+    d.team_name,
+    d.display_name,
+    d.color_hex,
+    d.sample_timestamp,
+    d.lap_id,
+    d.lap_number,
+    d.drs,
+    d.n_gear,
+    d.rpm,
+    d.speed_kph,
+    d.throttle,
+    d.brake,
+    d.x,
+    d.y,
+    d.z,
+    d.pit_date,
+    d.pit_duration_ms,
+    d.is_slow_stop,
+    d.is_early_stop,
+    d.is_late_stop,
+    d.distance_m::REAL AS lap_distance_m,
+    (d.distance_m / NULLIF(d.lap_length_m, 0))::REAL AS lap_fraction
+FROM distances d
+$$;
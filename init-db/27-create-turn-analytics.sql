@@ -0,0 +1,37 @@
+-- Migration: Per-lap, per-turn corner analytics
+-- Purpose: silver.turns has the position of every corner but nothing ties it to car data,
+-- so "who was fastest through Turn 1" meant scanning gold.telemetry_trace. This table
+-- stores one row per driver lap and turn:
+-- - apex: the lap's trace sample closest to the turn's position (within 50 m), snapped with
+--   a 100 m spatial grid so each sample is only compared with the turns in its neighbourhood.
+--   silver.turns.x/y are track map (SVG) coordinates, so positions in car_gps coordinates
+--   come from the session's fastest valid lap: its position at the turn's
+--   track_distance_m or, on circuits without track distances, its braking corners (speed
+--   minima), numbered in lap order
+-- - entry / exit speed: speed 100 m before / after the apex (by lap_distance_m)
+-- - apex speed / min gear: lowest speed and gear within 50 m of the apex
+-- - braking point: lap distance of the first braking sample in the 300 m before the apex
+--   (NULL when the turn is taken without braking)
+-- Sessions without a valid timed lap in the trace, and laps that never pass within 50 m of a
+-- turn, have no rows.
+--
+-- Built per session by pitwall_silver/build_turn_analytics.py from gold.telemetry_trace,
+-- after the trace itself has been rebuilt.
+
+CREATE TABLE IF NOT EXISTS gold.turn_analytics (
+    session_id TEXT NOT NULL REFERENCES silver.sessions(session_id),
+    driver_id TEXT NOT NULL REFERENCES silver.drivers(driver_id),
+    lap_number INT NOT NULL,
+    turn_number INT NOT NULL,
+    apex_timestamp TIMESTAMPTZ NOT NULL,
+    apex_distance_m REAL NOT NULL,
+    entry_speed_kph INT,
+    apex_speed_kph INT,
+    exit_speed_kph INT,
+    min_gear INT,
+    braking_point_m REAL,
+    PRIMARY KEY (session_id, driver_id, lap_number, turn_number)
+);
+
+CREATE INDEX IF NOT EXISTS idx_turn_analytics_session_turn
+    ON gold.turn_analytics(session_id, turn_number, apex_speed_kph DESC);
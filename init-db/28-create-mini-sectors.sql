@@ -0,0 +1,37 @@
+-- Migration: Mini-sector timing
+-- Purpose: silver.laps only has three sector times. Mini-sector dominance maps need every
+-- driver's time through N equal-length slices of the lap, which is too much to compute
+-- from telemetry per request.
+--
+-- This migration:
+-- 1. Creates gold.mini_sector_layouts: per session, the number of mini-sectors and the
+--    reference lap (the fastest valid lap that is not an out lap) whose length sets the
+--    mini-sector length
+-- 2. Creates gold.mini_sectors: one row per driver lap with the time through each
+--    mini-sector as an INT[] of milliseconds (element k = mini-sector k, 1-based).
+--    Boundaries sit at equal fractions of the lap (gold.telemetry_trace.lap_fraction), so
+--    mini-sector k of every lap covers the same stretch of track as on the reference lap.
+--    Crossing times are interpolated linearly between the samples either side. Only laps
+--    within 5% of the reference lap's length are stored
+--
+-- Built per session by pitwall_silver/build_mini_sectors.py from gold.telemetry_trace,
+-- after the trace itself has been rebuilt.
+
+-- Step 1: Layouts
+CREATE TABLE IF NOT EXISTS gold.mini_sector_layouts (
+    session_id TEXT PRIMARY KEY REFERENCES silver.sessions(session_id),
+    sector_count INT NOT NULL,
+    reference_driver_id TEXT NOT NULL REFERENCES silver.drivers(driver_id),
+    reference_lap_number INT NOT NULL,
+    reference_length_m REAL NOT NULL,
+    sector_length_m REAL NOT NULL
+);
+
+-- Step 2: Mini-sector times
+CREATE TABLE IF NOT EXISTS gold.mini_sectors (
+    session_id TEXT NOT NULL REFERENCES silver.sessions(session_id),
+    driver_id TEXT NOT NULL REFERENCES silver.drivers(driver_id),
+    lap_number INT NOT NULL,
+    sector_ms INT[] NOT NULL,
+    PRIMARY KEY (session_id, driver_id, lap_number)
+);
@@ -0,0 +1,46 @@
+-- Migration: Unique indexes on the gold materialized views
+-- Purpose: A plain REFRESH MATERIALIZED VIEW holds an ACCESS EXCLUSIVE lock for the whole
+-- rebuild, so every API read of the view waits for it. REFRESH ... CONCURRENTLY only
+-- blocks other refreshes, but needs a unique index on plain columns with no WHERE clause.
+--
+-- This migration:
+-- 1. Adds a unique index idx_<view>_key on the natural key of every gold materialized view
+-- 2. Drops the non-unique index the key index replaces, where there was one with the
+--    same columns
+--
+-- If a view holds duplicate keys, its index is skipped with a NOTICE. gold_refresh.py then
+-- rebuilds that view into a shadow copy and swaps it in, or runs a plain REFRESH if other
+-- views depend on it.
+
+DO $$
+DECLARE
+    k RECORD;
+BEGIN
+    FOR k IN
+        SELECT * FROM (VALUES
+            ('dim_drivers', 'driver_id, season', 'idx_dim_drivers_driver_season'),
+            ('dim_teams', 'team_id, season', 'idx_dim_teams_team_season'),
+            ('dim_circuits', 'circuit_id', 'idx_dim_circuits_circuit_id'),
+            ('dim_meetings', 'meeting_id', 'idx_dim_meetings_meeting_id'),
+            ('dim_segment_meaning', 'segment_value', 'idx_dim_segment_meaning_segment_value'),
+            ('driver_session_results', 'session_id, driver_id', 'idx_driver_session_results_session_driver'),
+            ('session_classification', 'session_id, driver_id', 'idx_session_classification_session_driver'),
+            ('session_summary', 'session_id', 'idx_session_summary_session'),
+            ('lap_times', 'session_id, driver_id, lap_number', 'idx_lap_times_session_driver_lap'),
+            ('lap_intervals', 'session_id, driver_id, lap_number', 'idx_lap_intervals_session_driver_lap'),
+            ('driver_standings_progression', 'session_id, driver_id', NULL::TEXT),
+            ('constructor_standings_progression', 'session_id, team_id', NULL::TEXT),
+            ('circuit_overtake_stats', 'circuit_id', 'idx_circuit_overtake_stats_circuit_id')
+        ) AS v(view_name, key_columns, replaces_index)
+    LOOP
+        BEGIN
+            EXECUTE format('CREATE UNIQUE INDEX IF NOT EXISTS %I ON gold.%I (%s)',
+                           'idx_' || k.view_name || '_key', k.view_name, k.key_columns);
+            IF k.replaces_index IS NOT NULL THEN
+                EXECUTE format('DROP INDEX IF EXISTS gold.%I', k.replaces_index);
+            END IF;
+        EXCEPTION WHEN unique_violation THEN
+            RAISE NOTICE 'gold.% has duplicate (%) rows, no unique index', k.view_name, k.key_columns;
+        END;
+    END LOOP;
+END $$;
@@ -0,0 +1,21 @@
+-- Migration: Change markers for the gold refresh
+-- Purpose: The gold phase refreshed all twelve views whenever any silver row changed.
+-- gold_refresh.plan_refresh() now refreshes only the views whose silver tables changed
+-- (found through pg_depend), plus the views that select from those.
+--
+-- This migration:
+-- 1. Creates gold.refresh_source_markers, a content hash per silver table that the gold
+--    views read but silver.dirty_sessions does not log (drivers, teams, circuits,
+--    meetings, team branding, ...). Their upserts rewrite every row on each run, so only a
+--    changed hash means changed data. Changelog tables are compared through the
+--    'gold_refresh' cursor in silver.dirty_session_cursors instead
+--
+-- Markers are saved by update_database.py after every successful gold refresh. A table
+-- without a marker counts as changed.
+
+-- Step 1: Markers
+CREATE TABLE IF NOT EXISTS gold.refresh_source_markers (
+    source TEXT NOT NULL PRIMARY KEY,    -- schema-qualified table
+    marker TEXT NOT NULL,                -- md5 of the table's rows
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
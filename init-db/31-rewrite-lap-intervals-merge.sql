@@ -0,0 +1,124 @@
+-- Migration: Single-pass lap assignment for gold.lap_intervals
+-- Purpose: gold.lap_intervals picked each lap's interval with a LATERAL subquery against
+-- silver.intervals (latest row in the lap's time window), i.e. one probe per race lap.
+-- silver.intervals has no (session_id, driver_id, date) index, so every probe scanned the
+-- table, and this was the slowest gold view to refresh.
+--
+-- This migration:
+-- 1. Re-creates gold.lap_intervals with the same columns and rows, but assigns intervals
+--    to laps in one sorted pass: lap starts and intervals are merged into one stream per
+--    (session, driver), a running MAX(lap_number) gives each interval its lap, and the
+--    interval right before the next lap start (LEAD) is the lap's last one. DISTINCT ON
+--    then only has to pick among those few rows
+-- 2. Re-creates the view's unique key index (29-add-gold-unique-indexes.sql) and the
+--    season / session_type indexes
+--
+-- benchmark_lap_intervals.py compares both definitions on a synthetic multi-season
+-- dataset.
+
+-- Step 1: Re-create the view
+DROP MATERIALIZED VIEW IF EXISTS gold.lap_intervals;
+
+CREATE MATERIALIZED VIEW gold.lap_intervals AS
+WITH race_sessions AS (
+    SELECT session_id
+    FROM silver.sessions
+    WHERE session_type IN ('race', 'sprint')
+),
+lap_events AS (
+    -- Lap starts and intervals as one stream per driver. A lap start sorts before an
+    -- interval at the same instant (intervals from date_start on belong to the new lap)
+    SELECT
+        l.session_id,
+        l.driver_id,
+        l.date_start AS event_at,
+        0 AS event_order,
+        l.lap_number,
+        NULL::INT AS gap_to_leader_ms,
+        NULL::INT AS interval_ms
+    FROM silver.laps l
+    INNER JOIN race_sessions rs ON l.session_id = rs.session_id
+    UNION ALL
+    SELECT
+        i.session_id,
+        i.driver_id,
+        i.date,
+        1,
+        NULL,
+        i.gap_to_leader_ms,
+        i.interval_ms
+    FROM silver.intervals i
+    INNER JOIN race_sessions rs ON i.session_id = rs.session_id
+    WHERE i.gap_to_leader_ms IS NOT NULL
+),
+event_stream AS (
+    SELECT
+        le.*,
+        -- Lap the event falls in: the latest lap started so far
+        MAX(le.lap_number) OVER driver_events AS current_lap,
+        LEAD(le.event_order) OVER driver_events AS next_event_order
+    FROM lap_events le
+    WINDOW driver_events AS (
+        PARTITION BY le.session_id, le.driver_id
+        ORDER BY le.event_at, le.event_order
+        ROWS UNBOUNDED PRECEDING
+    )
+),
+interval_lap_mapping AS (
+    -- Each lap's latest interval: the last interval before the next lap start
+    SELECT DISTINCT ON (es.session_id, es.driver_id, es.current_lap)
+        es.session_id,
+        es.driver_id,
+        es.current_lap AS lap_number,
+        es.gap_to_leader_ms,
+        es.interval_ms
+    FROM event_stream es
+    WHERE es.event_order = 1
+      AND es.current_lap IS NOT NULL
+      AND es.next_event_order IS DISTINCT FROM 1
+    ORDER BY es.session_id, es.driver_id, es.current_lap, es.event_at DESC
+)
+SELECT
+    m.season,
+    m.round_number,
+    m.meeting_official_name,
+    s.session_type,
+    ilm.session_id,
+    ilm.driver_id,
+    dis.driver_number,
+    dis.driver_name,
+    dis.name_acronym,
+    dis.team_id,
+    dis.team_name,
+    dis.display_name,
+    dis.color_hex,
+    ilm.lap_number,
+    ilm.gap_to_leader_ms,
+    ilm.interval_ms,
+    -- Derived fields
+    ilm.gap_to_leader_ms / 1000.0 AS gap_to_leader_s,
+    ilm.interval_ms / 1000.0 AS interval_s,
+    -- Position derived by ranking gap_to_leader_ms per (session_id, lap_number)
+    DENSE_RANK() OVER (
+        PARTITION BY ilm.session_id, ilm.lap_number
+        ORDER BY ilm.gap_to_leader_ms NULLS LAST
+    ) AS position
+FROM interval_lap_mapping ilm
+INNER JOIN silver.sessions s ON ilm.session_id = s.session_id
+INNER JOIN silver.meetings m ON s.meeting_id = m.meeting_id
+INNER JOIN silver.driver_id_by_session dis 
+    ON ilm.session_id = dis.session_id 
+    AND ilm.driver_id = dis.driver_id
+ORDER BY 
+    m.season,
+    ilm.session_id,
+    ilm.lap_number,
+    position;
+
+-- Step 2: Indexes
+CREATE UNIQUE INDEX IF NOT EXISTS idx_lap_intervals_key
+    ON gold.lap_intervals(session_id, driver_id, lap_number);
+CREATE INDEX IF NOT EXISTS idx_lap_intervals_season 
+    ON gold.lap_intervals(season);
+CREATE INDEX IF NOT EXISTS idx_lap_intervals_session_type 
+    ON gold.lap_intervals(session_type);
@@ -0,0 +1,197 @@
+-- Migration: Precomputed championship standings grid
+-- Purpose: /api/standings/drivers built a driver x round cross join on every request, filling
+-- rounds without a finish through a correlated MAX() subquery per cell, and the driver and
+-- team detail endpoints re-ranked the whole season to find one championship position.
+--
+-- This migration:
+-- 1. Creates gold.championship_grid: one row per season, round and driver or constructor
+--    (entity_type 'driver' / 'constructor', entity_id = driver_id / team_id), for every
+--    round of the season whether or not the entity scored in it
+--    - cumulative_points is carried forward from the last round with a result (0 before)
+--    - position is the championship position after the round
+--    - identity and branding come from the entity's latest round of the season
+--    - rounds_entered / participation_rank rank entities by rounds with a result, which
+--      the standings endpoints use to keep the regular drivers and teams
+-- 2. Adds a unique index on (season, entity_type, entity_id, round_number), so the view can
+--    be refreshed concurrently and every endpoint read is an index range scan
+--
+-- Refreshed with the other gold views (gold_refresh.GOLD_VIEWS), after the standings
+-- standings progression and dim_teams views it reads.
+
+-- Step 1: Grid
+CREATE MATERIALIZED VIEW IF NOT EXISTS gold.championship_grid AS
+WITH season_rounds AS (
+    SELECT DISTINCT ON (season, round_number)
+        season,
+        round_number,
+        meeting_name,
+        meeting_short_name,
+        country_code,
+        emoji_flag,
+        flag_url
+    FROM gold.constructor_standings_progression
+    ORDER BY season, round_number
+),
+team_logos AS (
+    SELECT DISTINCT ON (season, team_id) season, team_id, logo_url
+    FROM gold.dim_teams
+    ORDER BY season, team_id, logo_url
+),
+driver_rounds AS (
+    SELECT
+        season,
+        driver_id,
+        round_number,
+        SUM(session_points) AS round_points,
+        MAX(cumulative_points) AS cumulative_points
+    FROM gold.driver_standings_progression
+    GROUP BY season, driver_id, round_number
+),
+team_rounds AS (
+    SELECT
+        season,
+        team_id,
+        round_number,
+        SUM(session_points) AS round_points,
+        MAX(cumulative_points) AS cumulative_points
+    FROM gold.constructor_standings_progression
+    GROUP BY season, team_id, round_number
+),
+entities AS (
+    -- Drivers as of their latest round of the season
+    SELECT
+        dl.season,
+        'driver'::TEXT AS entity_type,
+        dl.driver_id AS entity_id,
+        dl.driver_id,
+        dl.driver_number,
+        dl.driver_name,
+        dl.name_acronym,
+        d.first_name,
+        d.last_name,
+        d.headshot_url,
+        d.headshot_override,
+        dl.team_id,
+        dl.team_name,
+        dl.display_name,
+        dl.color_hex,
+        dt.logo_url
+    FROM (
+        SELECT DISTINCT ON (season, driver_id) *
+        FROM gold.driver_standings_progression
+        ORDER BY season, driver_id, round_number DESC,
+                 CASE WHEN session_type = 'sprint' THEN 0 ELSE 1 END DESC
+    ) dl
+    LEFT JOIN silver.drivers d ON dl.driver_id = d.driver_id
+    LEFT JOIN team_logos dt ON dl.team_id = dt.team_id AND dt.season = dl.season
+    UNION ALL
+    -- Constructors as of their latest round of the season
+    SELECT
+        tl.season,
+        'constructor',
+        tl.team_id,
+        NULL,
+        NULL,
+        NULL,
+        NULL,
+        NULL,
+        NULL,
+        NULL,
+        NULL,
+        tl.team_id,
+        tl.team_name,
+        tl.display_name,
+        tl.color_hex,
+        dt.logo_url
+    FROM (
+        SELECT DISTINCT ON (season, team_id) *
+        FROM gold.constructor_standings_progression
+        ORDER BY season, team_id, round_number DESC,
+                 CASE WHEN session_type = 'sprint' THEN 0 ELSE 1 END DESC
+    ) tl
+    LEFT JOIN team_logos dt ON tl.team_id = dt.team_id AND dt.season = tl.season
+),
+entity_rounds AS (
+    SELECT season, 'driver'::TEXT AS entity_type, driver_id AS entity_id,
+           round_number, round_points, cumulative_points
+    FROM driver_rounds
+    UNION ALL
+    SELECT season, 'constructor', team_id, round_number, round_points, cumulative_points
+    FROM team_rounds
+),
+grid AS (
+    SELECT
+        sr.season,
+        sr.round_number,
+        e.entity_type,
+        e.entity_id,
+        COALESCE(er.round_points, 0) AS round_points,
+        -- Cumulative points never decrease, so the running MAX carries them forward
+        COALESCE(MAX(er.cumulative_points) OVER (
+            PARTITION BY sr.season, e.entity_type, e.entity_id
+            ORDER BY sr.round_number
+            ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+        ), 0) AS cumulative_points,
+        COUNT(er.round_number) OVER (
+            PARTITION BY sr.season, e.entity_type, e.entity_id
+        ) AS rounds_entered
+    FROM entities e
+    INNER JOIN season_rounds sr ON sr.season = e.season
+    LEFT JOIN entity_rounds er
+        ON er.season = sr.season
+        AND er.entity_type = e.entity_type
+        AND er.entity_id = e.entity_id
+        AND er.round_number = sr.round_number
+),
+ranked AS (
+    SELECT
+        g.*,
+        ROW_NUMBER() OVER (
+            PARTITION BY g.season, g.entity_type, g.round_number
+            ORDER BY g.cumulative_points DESC, g.entity_id
+        ) AS position,
+        DENSE_RANK() OVER (
+            PARTITION BY g.season, g.entity_type
+            ORDER BY g.rounds_entered DESC, g.entity_id
+        ) AS participation_rank
+    FROM grid g
+)
+SELECT
+    r.season,
+    r.round_number,
+    sr.meeting_name,
+    sr.meeting_short_name,
+    sr.country_code,
+    sr.emoji_flag,
+    sr.flag_url,
+    r.entity_type,
+    r.entity_id,
+    e.driver_id,
+    e.driver_number,
+    e.driver_name,
+    e.name_acronym,
+    e.first_name,
+    e.last_name,
+    e.headshot_url,
+    e.headshot_override,
+    e.team_id,
+    e.team_name,
+    e.display_name,
+    e.color_hex,
+    e.logo_url,
+    r.rounds_entered,
+    r.participation_rank,
+    r.round_points,
+    r.cumulative_points,
+    r.position
+FROM ranked r
+INNER JOIN season_rounds sr ON sr.season = r.season AND sr.round_number = r.round_number
+INNER JOIN entities e
+    ON e.season = r.season
+    AND e.entity_type = r.entity_type
+    AND e.entity_id = r.entity_id
+ORDER BY r.season, r.entity_type, r.round_number, r.position;
+
+-- Step 2: Indexes
+CREATE UNIQUE INDEX IF NOT EXISTS idx_championship_grid_key
+    ON gold.championship_grid(season, entity_type, entity_id, round_number);
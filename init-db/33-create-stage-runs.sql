@@ -0,0 +1,43 @@
+-- Migration: Pipeline stage run history
+-- Purpose: Stage timings were only in the JSON printed for one run and in per-script log
+-- files, so a view or upsert that got slower after a data or schema change went unnoticed.
+--
+-- This migration:
+-- 1. Creates the ops schema for pipeline bookkeeping
+-- 2. Creates ops.stage_runs, one row per executed stage: bronze and silver scripts
+--    (update_database.py, run_silver_pipeline.py) and gold view refreshes
+--    (gold_refresh.py, also used by the API). Metrics a runner cannot measure are NULL:
+--    - rows_read: source rows read by the refresh transaction (gold)
+--    - rows_written: rows upserted (in-process silver) or rows in the view (gold).
+--      Subprocess stages only report an exit status, so they have no row counts
+--    - bytes_written: size of the view with its indexes after the refresh (gold)
+--    - peak_rss_kb: peak RSS of the script (subprocess stages). In-process stages share
+--      the runner, whose peak never drops after its heaviest stage, so they have none
+--
+-- GET /api/ops/stage-runs lists runs, GET /api/ops/stage-runs/trends compares each stage's
+-- latest run with its recent median.
+
+-- Step 1: Schema
+CREATE SCHEMA IF NOT EXISTS ops;
+
+-- Step 2: Stage runs
+CREATE TABLE IF NOT EXISTS ops.stage_runs (
+    stage_run_id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    phase TEXT NOT NULL,                 -- 'bronze', 'silver' or 'gold'
+    stage TEXT NOT NULL,                 -- script name or schema-qualified gold view
+    mode TEXT,                           -- 'subprocess' / 'in-process', or the gold refresh mode
+    started_at TIMESTAMPTZ NOT NULL,
+    finished_at TIMESTAMPTZ NOT NULL,
+    duration_ms BIGINT NOT NULL,
+    success BOOLEAN NOT NULL,
+    rows_read BIGINT,
+    rows_written BIGINT,
+    bytes_written BIGINT,
+    peak_rss_kb BIGINT,
+    error TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_stage_runs_phase_stage_started
+    ON ops.stage_runs(phase, stage, started_at DESC);
+CREATE INDEX IF NOT EXISTS idx_stage_runs_started
+    ON ops.stage_runs(started_at);
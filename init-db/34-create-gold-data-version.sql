@@ -0,0 +1,21 @@
+-- Migration: Gold data version
+-- Purpose: The API caches responses built from the gold views in memory. Gold only
+-- changes when the views are refreshed, so a counter bumped by every refresh tells the
+-- API when its cached responses are stale without comparing any data.
+--
+-- This migration:
+-- 1. Creates gold.data_version, a single row holding the version and the time of the
+--    refresh that set it
+--
+-- Bumped by gold_refresh.refresh_views() after any view refreshed successfully, and read
+-- by api/response_cache.py.
+
+-- Step 1: Version row
+CREATE TABLE IF NOT EXISTS gold.data_version (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),    -- at most one row
+    version BIGINT NOT NULL DEFAULT 1,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+INSERT INTO gold.data_version (id) VALUES (TRUE)
+ON CONFLICT (id) DO NOTHING;
@@ -0,0 +1,31 @@
+-- Migration: Tag derived-column writes in the dirty-session changelog
+-- Purpose: backfill_lap_validity.py rewrites silver.laps.is_pit_in_lap / is_valid after
+-- pit stops and race control have been upserted. Logged as plain 'silver.laps' changes,
+-- those writes made the stages that read silver.laps for lap ids (race control, stints,
+-- pit stops) reprocess the session on the next run, although they never read the flags.
+--
+-- This migration:
+-- 1. Replaces silver.mark_dirty_silver_sessions() so that a transaction which sets
+--    pitwall.dirty_tag logs its changes as '<table>:<tag>' instead of '<table>'.
+--    backfill_lap_validity.py sets it to 'validity', so only the consumers of the flags
+--    (results, points awarding, mini-sectors, turn analytics) subscribe to 'silver.laps:validity'.
+--    The gold refresh strips the tag and treats it as a silver.laps change
+
+-- Step 1: Trigger function (the triggers from 19-create-dirty-sessions-changelog.sql keep
+-- pointing at it)
+CREATE OR REPLACE FUNCTION silver.mark_dirty_silver_sessions()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO silver.dirty_sessions (layer, source, session_id)
+    SELECT DISTINCT
+        'silver',
+        TG_TABLE_SCHEMA || '.' || TG_TABLE_NAME
+            || COALESCE(':' || NULLIF(current_setting('pitwall.dirty_tag', true), ''), ''),
+        session_id
+    FROM changed_rows
+    WHERE session_id IS NOT NULL;
+    RETURN NULL;
+END;
+$$;
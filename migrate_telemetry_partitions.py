@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Convert silver.car_telemetry and silver.car_gps into per-session partitioned tables.
+
+Uses the tooling from init-db/21-partition-car-telemetry-gps.sql:
+1. silver.begin_partition_migration() creates silver.<table>_partitioned and records the
+   current max id as the copy high-water mark
+2. silver.copy_session_partition() copies one session per transaction. The loaders can keep
+   running meanwhile, and an interrupted run resumes with the next uncopied session
+3. silver.finish_partition_migration() locks the old table, copies the rows written since the
+   high-water mark, swaps the tables and recreates gold.telemetry_trace (and any other
+   dependent views), their indexes and the dirty-session triggers
+
+Do not run update_driver_id_format.py while a migration is in progress: updates to rows
+that were already copied are not carried over.
+
+Usage:
+    python3 migrate_telemetry_partitions.py                      # Both tables
+    python3 migrate_telemetry_partitions.py --table car_gps      # One table
+    python3 migrate_telemetry_partitions.py --keep-old           # Keep silver.<table>_unpartitioned
+"""
+
+import os
+import argparse
+import logging
+import time
+from typing import List
+
+import psycopg
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+TABLES = ['car_telemetry', 'car_gps']
+
+
+def get_db_connection():
+    """Create and return a database connection."""
+    try:
+        conn = psycopg.connect(
+            host=os.getenv('PGHOST', 'localhost'),
+            port=os.getenv('PGPORT', '5433'),
+            dbname=os.getenv('PGDATABASE', 'pitwall'),
+            user=os.getenv('PGUSER', 'pitwall'),
+            password=os.getenv('PGPASSWORD', 'pitwall')
+        )
+        return conn
+    except Exception as e:
+        logger.error(f"Failed to connect to database: {e}")
+        raise
+
+
+def is_partitioned(conn, table_name: str) -> bool:
+    """Check whether silver.<table_name> is already partitioned."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT EXISTS (
+                SELECT 1 FROM pg_partitioned_table
+                WHERE partrelid = to_regclass(%s)
+            )
+        """, (f"silver.{table_name}",))
+        return cur.fetchone()[0]
+
+
+def get_session_ids(conn) -> List[str]:
+    """Get all session_ids, oldest first."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT session_id
+            FROM silver.sessions
+            ORDER BY start_time
+        """)
+        return [row[0] for row in cur.fetchall()]
+
+
+def migrate_table(conn, table_name: str, keep_old: bool) -> int:
+    """
+    Copy silver.<table_name> session by session into its partitioned replacement and swap.
+
+    Returns:
+        Number of rows copied
+    """
+    logger.info("\n" + "="*70)
+    logger.info(f"PROCESSING: silver.{table_name}")
+    logger.info("="*70)
+
+    if is_partitioned(conn, table_name):
+        logger.info(f"  ℹ️  silver.{table_name} is already partitioned")
+        return 0
+
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT silver.begin_partition_migration(%s)", (table_name,))
+            high_water = cur.fetchone()[0]
+        conn.commit()
+        logger.info(f"  Copy high-water mark: {high_water:,}")
+
+        session_ids = get_session_ids(conn)
+        total_copied = 0
+        start = time.time()
+
+        for idx, session_id in enumerate(session_ids, 1):
+            with conn.cursor() as cur:
+                cur.execute("SELECT silver.copy_session_partition(%s, %s)", (table_name, session_id))
+                copied = cur.fetchone()[0]
+            conn.commit()
+
+            if copied is None:
+                logger.info(f"  [{idx}/{len(session_ids)}] {session_id}: already copied")
+            elif copied > 0:
+                total_copied += copied
+                logger.info(f"  [{idx}/{len(session_ids)}] {session_id}: {copied:,} rows "
+                            f"(total {total_copied:,}, {time.time() - start:.0f}s)")
+
+        logger.info("  Swapping tables (rows written since the high-water mark are copied first)...")
+        with conn.cursor() as cur:
+            cur.execute("SELECT silver.finish_partition_migration(%s, %s)", (table_name, keep_old))
+            caught_up = cur.fetchone()[0]
+        conn.commit()
+        total_copied += caught_up
+        logger.info(f"  ✅ silver.{table_name} is partitioned ({caught_up:,} rows caught up)")
+
+        with conn.cursor() as cur:
+            cur.execute(f"ANALYZE silver.{table_name}")
+        conn.commit()
+
+        return total_copied
+
+    except psycopg.Error as e:
+        conn.rollback()
+        logger.error(f"Failed to partition silver.{table_name}: {e}")
+        raise
+
+
+def main():
+    """Main function to partition the telemetry tables."""
+    parser = argparse.ArgumentParser(description="Partition silver.car_telemetry / silver.car_gps by session")
+    parser.add_argument(
+        '--table',
+        choices=TABLES,
+        action='append',
+        dest='tables',
+        help='Table to convert (repeatable; default both)'
+    )
+    parser.add_argument(
+        '--keep-old',
+        action='store_true',
+        help='Keep the old table as silver.<table>_unpartitioned instead of dropping it'
+    )
+    args = parser.parse_args()
+
+    logger.info("="*70)
+    logger.info("TELEMETRY PARTITION MIGRATION")
+    logger.info("="*70)
+
+    conn = get_db_connection()
+
+    try:
+        for table_name in args.tables or TABLES:
+            copied = migrate_table(conn, table_name, args.keep_old)
+            logger.info(f"  Rows copied into silver.{table_name}: {copied:,}")
+
+        logger.info("\n" + "="*70)
+        logger.info("✅ PARTITION MIGRATION COMPLETE")
+        logger.info("="*70)
+
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,11 +10,23 @@ Derives is_valid based on lap validity rules:
 - FALSE if is_pit_in_lap = TRUE
 - FALSE if race_control message contains "deleted" (case insensitive) and race_control.referenced_lap_id matches lap_id
 - TRUE otherwise
+
+Both flags are recomputed with one set-based UPDATE that only writes laps whose
+flags change. The in-process pipeline (run_silver_pipeline.py) limits it to the
+sessions whose laps, pit stops or race control messages changed since its last run.
+Its writes are logged to silver.dirty_sessions as 'silver.laps:validity'
+(init-db/35-tag-lap-validity-changes.sql), so only stages that read the flags pick
+them up.
+
+Usage:
+    python3 pitwall_silver/backfill_lap_validity.py                        # All sessions
+    python3 pitwall_silver/backfill_lap_validity.py --session-id <id> ...  # Selected sessions
 """
 
 import os
+import argparse
 import logging
-from typing import Set
+from typing import List, Optional
 
 import psycopg
 from dotenv import load_dotenv
@@ -46,157 +58,75 @@ def get_db_connection():
         raise
 
 
-def get_pit_in_lap_ids(conn) -> Set[int]:
-    """
-    Get set of lap_ids that have matching pit stops.
-    
-    Returns:
-        Set of lap_id values (as integers)
-    """
-    pit_in_lap_ids = set()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT DISTINCT lap_id
-                FROM silver.pit_stops
-                WHERE lap_id IS NOT NULL
-            """)
-            for row in cur.fetchall():
-                pit_in_lap_ids.add(row[0])
-        logger.info(f"Found {len(pit_in_lap_ids)} lap_ids with pit stops")
-    except psycopg.Error as e:
-        logger.error(f"Failed to fetch pit in lap IDs: {e}")
-        raise
-    return pit_in_lap_ids
+# Changelog tag for the flag updates ('silver.laps:validity' in silver.dirty_sessions)
+DIRTY_TAG = 'validity'
+
+# Recompute is_pit_in_lap / is_valid for the laps of the selected sessions in one pass.
+# Pit-in laps (pit_stops.lap_id) and deleted laps (race_control referenced_lap_id with a
+# "deleted" message) are unioned into per-lap flags; laps without either get FALSE.
+# Only rows whose flags actually change are written.
+LAP_VALIDITY_UPDATE_SQL = """
+    WITH lap_flags AS (
+        SELECT
+            lap_id,
+            BOOL_OR(is_pit_in) AS is_pit_in,
+            BOOL_OR(is_deleted) AS is_deleted
+        FROM (
+            SELECT ps.lap_id, TRUE AS is_pit_in, FALSE AS is_deleted
+            FROM silver.pit_stops ps
+            WHERE ps.lap_id IS NOT NULL
+              AND (%(session_ids)s::text[] IS NULL OR ps.session_id = ANY(%(session_ids)s::text[]))
+            UNION ALL
+            SELECT rc.referenced_lap_id, FALSE, TRUE
+            FROM silver.race_control rc
+            WHERE rc.referenced_lap_id IS NOT NULL
+              AND rc.message IS NOT NULL
+              AND LOWER(rc.message) LIKE '%%deleted%%'
+              AND (%(session_ids)s::text[] IS NULL OR rc.session_id = ANY(%(session_ids)s::text[]))
+        ) flagged
+        GROUP BY lap_id
+    ),
+    computed AS (
+        SELECT
+            l.lap_id,
+            COALESCE(f.is_pit_in, FALSE) AS is_pit_in_lap,
+            NOT (
+                COALESCE(l.is_pit_out_lap, FALSE)
+                OR COALESCE(f.is_pit_in, FALSE)
+                OR COALESCE(f.is_deleted, FALSE)
+            ) AS is_valid
+        FROM silver.laps l
+        LEFT JOIN lap_flags f ON l.lap_id = f.lap_id
+        WHERE %(session_ids)s::text[] IS NULL OR l.session_id = ANY(%(session_ids)s::text[])
+    )
+    UPDATE silver.laps l
+    SET is_pit_in_lap = c.is_pit_in_lap,
+        is_valid = c.is_valid
+    FROM computed c
+    WHERE l.lap_id = c.lap_id
+      AND (l.is_pit_in_lap IS DISTINCT FROM c.is_pit_in_lap
+           OR l.is_valid IS DISTINCT FROM c.is_valid)
+"""
 
 
-def get_deleted_lap_ids(conn) -> Set[int]:
+def update_lap_validity(conn, session_ids: Optional[List[str]] = None) -> int:
     """
-    Get set of lap_ids that are marked as deleted in race_control messages.
+    Update is_pit_in_lap and is_valid with a single set-based UPDATE.
     
-    Returns:
-        Set of lap_id values (as integers) that are deleted
-    """
-    deleted_lap_ids = set()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT DISTINCT referenced_lap_id
-                FROM silver.race_control
-                WHERE referenced_lap_id IS NOT NULL
-                  AND message IS NOT NULL
-                  AND LOWER(message) LIKE '%deleted%'
-            """)
-            for row in cur.fetchall():
-                deleted_lap_ids.add(row[0])
-        logger.info(f"Found {len(deleted_lap_ids)} lap_ids marked as deleted in race control")
-    except psycopg.Error as e:
-        logger.error(f"Failed to fetch deleted lap IDs: {e}")
-        raise
-    return deleted_lap_ids
-
-
-def update_lap_validity(conn, pit_in_lap_ids: Set[int], deleted_lap_ids: Set[int]) -> tuple[int, int]:
-    """
-    Update is_pit_in_lap and is_valid for all laps.
+    Args:
+        session_ids: Only recompute laps of these sessions (all laps if None)
     
     Returns:
-        Tuple of (pit_in_laps_updated, validity_updated)
+        Number of laps whose flags changed
     """
     try:
         with conn.cursor() as cur:
-            # Step 1: Update is_pit_in_lap based on pit_stops
-            logger.info("Updating is_pit_in_lap based on pit_stops...")
-            cur.execute("""
-                UPDATE silver.laps
-                SET is_pit_in_lap = TRUE
-                WHERE lap_id IN (
-                    SELECT DISTINCT lap_id
-                    FROM silver.pit_stops
-                    WHERE lap_id IS NOT NULL
-                )
-            """)
-            pit_in_updated = cur.rowcount
-            logger.info(f"  Set is_pit_in_lap = TRUE for {pit_in_updated} laps")
-            
-            # Step 2: Set is_pit_in_lap = FALSE for all other laps
-            cur.execute("""
-                UPDATE silver.laps
-                SET is_pit_in_lap = FALSE
-                WHERE lap_id NOT IN (
-                    SELECT DISTINCT lap_id
-                    FROM silver.pit_stops
-                    WHERE lap_id IS NOT NULL
-                )
-            """)
-            logger.info(f"  Set is_pit_in_lap = FALSE for {cur.rowcount} laps")
-            
-            # Step 3: Update is_valid based on all rules
-            logger.info("Updating is_valid based on validity rules...")
-            
-            # First, set all laps to valid (TRUE) by default
-            cur.execute("""
-                UPDATE silver.laps
-                SET is_valid = TRUE
-            """)
-            logger.info(f"  Set is_valid = TRUE for all {cur.rowcount} laps (default)")
-            
-            # Then, set invalid for pit out laps
-            cur.execute("""
-                UPDATE silver.laps
-                SET is_valid = FALSE
-                WHERE is_pit_out_lap = TRUE
-            """)
-            pit_out_invalid = cur.rowcount
-            logger.info(f"  Set is_valid = FALSE for {pit_out_invalid} pit out laps")
-            
-            # Set invalid for pit in laps
-            cur.execute("""
-                UPDATE silver.laps
-                SET is_valid = FALSE
-                WHERE is_pit_in_lap = TRUE
-            """)
-            pit_in_invalid = cur.rowcount
-            logger.info(f"  Set is_valid = FALSE for {pit_in_invalid} pit in laps")
-            
-            # Set invalid for deleted laps (from race_control)
-            if deleted_lap_ids:
-                # Convert set to list for SQL IN clause
-                deleted_lap_ids_list = list(deleted_lap_ids)
-                cur.execute("""
-                    UPDATE silver.laps
-                    SET is_valid = FALSE
-                    WHERE lap_id = ANY(%s)
-                """, (deleted_lap_ids_list,))
-                deleted_invalid = cur.rowcount
-                logger.info(f"  Set is_valid = FALSE for {deleted_invalid} deleted laps")
-            else:
-                deleted_invalid = 0
-                logger.info("  No deleted laps found in race control")
-            
-            conn.commit()
-            
-            # Summary counts
-            cur.execute("""
-                SELECT 
-                    COUNT(*) as total_laps,
-                    COUNT(CASE WHEN is_pit_in_lap = TRUE THEN 1 END) as pit_in_laps,
-                    COUNT(CASE WHEN is_pit_out_lap = TRUE THEN 1 END) as pit_out_laps,
-                    COUNT(CASE WHEN is_valid = TRUE THEN 1 END) as valid_laps,
-                    COUNT(CASE WHEN is_valid = FALSE THEN 1 END) as invalid_laps
-                FROM silver.laps
-            """)
-            total, pit_in, pit_out, valid, invalid = cur.fetchone()
-            
-            logger.info("")
-            logger.info("Final Summary:")
-            logger.info(f"  Total laps: {total}")
-            logger.info(f"  Pit in laps: {pit_in}")
-            logger.info(f"  Pit out laps: {pit_out}")
-            logger.info(f"  Valid laps: {valid}")
-            logger.info(f"  Invalid laps: {invalid}")
-            
-            return (pit_in_updated, invalid)
+            cur.execute("SELECT set_config('pitwall.dirty_tag', %s, true)", (DIRTY_TAG,))
+            cur.execute(LAP_VALIDITY_UPDATE_SQL, {'session_ids': session_ids})
+            laps_updated = cur.rowcount
+        conn.commit()
+        logger.info(f"Updated is_pit_in_lap / is_valid for {laps_updated} laps")
+        return laps_updated
             
     except psycopg.Error as e:
         conn.rollback()
@@ -206,30 +136,50 @@ def update_lap_validity(conn, pit_in_lap_ids: Set[int], deleted_lap_ids: Set[int
 
 def main():
     """Main function."""
+    parser = argparse.ArgumentParser(description="Backfill is_pit_in_lap and is_valid in silver.laps")
+    parser.add_argument(
+        '--session-id',
+        action='append',
+        dest='session_ids',
+        help='Only recompute laps of this session (repeatable; default all sessions)'
+    )
+    args = parser.parse_args()
+    
     logger.info("Starting lap validity backfill")
     logger.info("="*60)
     
     conn = get_db_connection()
     
     try:
-        # Get pit in lap IDs
-        logger.info("Loading pit in lap IDs from silver.pit_stops...")
-        pit_in_lap_ids = get_pit_in_lap_ids(conn)
-        
-        # Get deleted lap IDs from race control
-        logger.info("Loading deleted lap IDs from silver.race_control...")
-        deleted_lap_ids = get_deleted_lap_ids(conn)
-        
-        # Update lap validity
         logger.info("Updating lap validity...")
-        pit_in_updated, validity_updated = update_lap_validity(conn, pit_in_lap_ids, deleted_lap_ids)
+        laps_updated = update_lap_validity(conn, args.session_ids)
         
         logger.info("")
         logger.info("="*60)
         logger.info("LAP VALIDITY BACKFILL COMPLETE")
         logger.info("="*60)
-        logger.info(f"Updated is_pit_in_lap for {pit_in_updated} laps")
-        logger.info(f"Updated is_valid for all laps")
+        logger.info(f"Updated flags for {laps_updated} laps")
+        
+        # Summary counts
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT 
+                    COUNT(*) as total_laps,
+                    COUNT(CASE WHEN is_pit_in_lap = TRUE THEN 1 END) as pit_in_laps,
+                    COUNT(CASE WHEN is_pit_out_lap = TRUE THEN 1 END) as pit_out_laps,
+                    COUNT(CASE WHEN is_valid = TRUE THEN 1 END) as valid_laps,
+                    COUNT(CASE WHEN is_valid = FALSE THEN 1 END) as invalid_laps
+                FROM silver.laps
+            """)
+            total, pit_in, pit_out, valid, invalid = cur.fetchone()
+        
+        logger.info("")
+        logger.info("Final Summary:")
+        logger.info(f"  Total laps: {total}")
+        logger.info(f"  Pit in laps: {pit_in}")
+        logger.info(f"  Pit out laps: {pit_out}")
+        logger.info(f"  Valid laps: {valid}")
+        logger.info(f"  Invalid laps: {invalid}")
         
         # Show some sample invalid laps
         logger.info("")
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Build gold.mini_sectors, every driver lap's time through N equal-length mini-sectors.
+
+For each session, picks the reference lap (fastest valid, not an out lap) for
+gold.mini_sector_layouts, then interpolates the time each lap in gold.telemetry_trace
+crosses every boundary at lap_fraction k/N and stores the per-mini-sector times as one
+array per lap (see init-db/28-create-mini-sectors.sql). A session is rebuilt with a
+delete-and-insert in one transaction.
+
+lap_fraction runs from the line (silver.laps.date_start) to the lap end, which fall
+before the lap's first and after its last sample. Each lap's samples are bracketed by
+those two points (fractions 0 and 1), so boundary 0 is the line and boundary N the lap
+end. Lap lengths are full-lap lengths (lap_distance_m / lap_fraction), on the same scale
+as lap_fraction.
+
+run_silver_pipeline.py runs this as a dirty-session stage after build_telemetry_trace.py,
+so after a normal update only the sessions whose trace was rebuilt are recomputed.
+
+Usage:
+    python3 pitwall_silver/build_mini_sectors.py                        # All sessions with a trace
+    python3 pitwall_silver/build_mini_sectors.py --sectors 100
+    python3 pitwall_silver/build_mini_sectors.py --session-id <id> ...  # Selected sessions
+"""
+
+import os
+import argparse
+import logging
+from typing import List, Optional
+
+import psycopg
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Mini-sectors per lap (~100 m each on a 5 km circuit)
+DEFAULT_SECTOR_COUNT = 50
+
+# Laps whose measured length differs more than this from the reference lap (partial laps,
+# laps cut short by missing telemetry) get no mini-sectors
+LAP_LENGTH_TOLERANCE = 0.05
+
+LAYOUT_SQL = """
+    INSERT INTO gold.mini_sector_layouts (
+        session_id, sector_count, reference_driver_id, reference_lap_number,
+        reference_length_m, sector_length_m
+    )
+    SELECT
+        %(session_id)s,
+        %(sector_count)s,
+        l.driver_id,
+        l.lap_number,
+        MAX(t.lap_distance_m) / MAX(t.lap_fraction),
+        MAX(t.lap_distance_m) / MAX(t.lap_fraction) / %(sector_count)s
+    FROM silver.laps l
+    INNER JOIN gold.telemetry_trace t
+        ON t.session_id = l.session_id
+        AND t.driver_id = l.driver_id
+        AND t.lap_number = l.lap_number
+    WHERE l.session_id = %(session_id)s
+      AND l.lap_duration_ms IS NOT NULL
+      AND l.is_valid
+      AND l.is_pit_out_lap IS NOT TRUE
+    GROUP BY l.driver_id, l.lap_number, l.lap_duration_ms
+    HAVING MAX(t.lap_fraction) > 0
+    ORDER BY l.lap_duration_ms
+    LIMIT 1
+"""
+
+MINI_SECTORS_SQL = """
+    WITH session_laps AS (
+        -- Lap end as in gold.telemetry_trace_rows(): start + duration, else the next start
+        SELECT
+            l.lap_id,
+            l.date_start,
+            COALESCE(
+                l.date_start + l.lap_duration_ms * INTERVAL '1 millisecond',
+                LEAD(l.date_start) OVER (PARTITION BY l.driver_id ORDER BY l.lap_number)
+            ) AS date_end
+        FROM silver.laps l
+        WHERE l.session_id = %(session_id)s
+    ),
+    trace_laps AS (
+        -- Laps that cover the reference lap's length (within LAP_LENGTH_TOLERANCE)
+        SELECT
+            t.driver_id,
+            t.lap_number,
+            sl.date_start,
+            -- Without a known end, the last sample is at fraction 1
+            COALESCE(sl.date_end, MAX(t.sample_timestamp)) AS date_end
+        FROM gold.telemetry_trace t
+        INNER JOIN session_laps sl ON t.lap_id = sl.lap_id
+        INNER JOIN gold.mini_sector_layouts msl ON msl.session_id = %(session_id)s
+        WHERE t.session_id = %(session_id)s
+          AND t.lap_fraction IS NOT NULL
+        GROUP BY t.driver_id, t.lap_number, sl.date_start, sl.date_end, msl.reference_length_m
+        HAVING MAX(t.lap_fraction) > 0
+           AND ABS(MAX(t.lap_distance_m) / MAX(t.lap_fraction) - msl.reference_length_m)
+               <= msl.reference_length_m * %(length_tolerance)s
+    ),
+    lap_points AS (
+        -- The line, the lap's samples and the lap end
+        SELECT driver_id, lap_number, date_start AS sample_timestamp, 0::FLOAT8 AS lap_fraction
+        FROM trace_laps
+        UNION ALL
+        SELECT t.driver_id, t.lap_number, t.sample_timestamp, t.lap_fraction::FLOAT8
+        FROM gold.telemetry_trace t
+        INNER JOIN trace_laps tl ON t.driver_id = tl.driver_id AND t.lap_number = tl.lap_number
+        WHERE t.session_id = %(session_id)s
+          AND t.lap_fraction IS NOT NULL
+        UNION ALL
+        SELECT driver_id, lap_number, date_end, 1::FLOAT8
+        FROM trace_laps
+    ),
+    steps AS (
+        SELECT
+            driver_id,
+            lap_number,
+            sample_timestamp,
+            lap_fraction,
+            LEAD(sample_timestamp) OVER lap_order AS next_timestamp,
+            LEAD(lap_fraction) OVER lap_order AS next_fraction
+        FROM lap_points
+        WINDOW lap_order AS (
+            PARTITION BY driver_id, lap_number ORDER BY sample_timestamp, lap_fraction
+        )
+    ),
+    crossings AS (
+        -- Boundary 0 is the line
+        SELECT driver_id, lap_number, 0 AS boundary, date_start AS crossed_at
+        FROM trace_laps
+        UNION ALL
+        -- Boundaries k/N crossed between a sample and the next, interpolated in time
+        SELECT
+            s.driver_id,
+            s.lap_number,
+            b.boundary,
+            s.sample_timestamp + (s.next_timestamp - s.sample_timestamp)
+                * ((b.boundary::FLOAT8 / %(sector_count)s - s.lap_fraction)
+                   / (s.next_fraction - s.lap_fraction))
+        FROM steps s
+        CROSS JOIN LATERAL generate_series(
+            FLOOR(s.lap_fraction * %(sector_count)s)::INT + 1,
+            FLOOR(s.next_fraction * %(sector_count)s)::INT
+        ) AS b(boundary)
+        WHERE s.next_fraction > s.lap_fraction
+    ),
+    sector_times AS (
+        SELECT
+            driver_id,
+            lap_number,
+            boundary,
+            (EXTRACT(EPOCH FROM crossed_at - LAG(crossed_at) OVER (
+                PARTITION BY driver_id, lap_number ORDER BY boundary
+            )) * 1000)::INT AS sector_ms
+        FROM crossings
+    )
+    INSERT INTO gold.mini_sectors (session_id, driver_id, lap_number, sector_ms)
+    SELECT
+        %(session_id)s,
+        driver_id,
+        lap_number,
+        array_agg(sector_ms ORDER BY boundary)
+    FROM sector_times
+    WHERE boundary > 0
+    GROUP BY driver_id, lap_number
+    HAVING COUNT(*) = %(sector_count)s
+"""
+
+
+def get_db_connection():
+    """Create and return a database connection."""
+    try:
+        conn = psycopg.connect(
+            host=os.getenv('PGHOST', 'localhost'),
+            port=os.getenv('PGPORT', '5433'),
+            dbname=os.getenv('PGDATABASE', 'pitwall'),
+            user=os.getenv('PGUSER', 'pitwall'),
+            password=os.getenv('PGPASSWORD', 'pitwall')
+        )
+        return conn
+    except Exception as e:
+        logger.error(f"Failed to connect to database: {e}")
+        raise
+
+
+def get_mini_sector_sessions(conn, session_ids: Optional[List[str]] = None) -> List[str]:
+    """
+    Get the sessions to (re)build, oldest first.
+
+    Args:
+        session_ids: Only these sessions (every session with a trace if None). Sessions
+            whose trace is gone are kept so their rows are removed.
+    """
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT s.session_id
+                FROM silver.sessions s
+                WHERE CASE
+                    WHEN %(session_ids)s::text[] IS NULL THEN
+                        EXISTS (SELECT 1 FROM gold.telemetry_trace t WHERE t.session_id = s.session_id)
+                    ELSE s.session_id = ANY(%(session_ids)s::text[])
+                END
+                ORDER BY s.start_time
+            """, {'session_ids': session_ids})
+            return [row[0] for row in cur.fetchall()]
+    except psycopg.Error as e:
+        logger.error(f"Failed to get mini-sector sessions: {e}")
+        raise
+
+
+def build_session_mini_sectors(conn, session_id: str, sector_count: int = DEFAULT_SECTOR_COUNT) -> int:
+    """
+    Rebuild the mini-sector layout and lap times of one session.
+
+    Returns:
+        Number of laps written (0 when the session has no reference lap)
+    """
+    params = {
+        'session_id': session_id,
+        'sector_count': sector_count,
+        'length_tolerance': LAP_LENGTH_TOLERANCE,
+    }
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM gold.mini_sectors WHERE session_id = %s", (session_id,))
+            cur.execute("DELETE FROM gold.mini_sector_layouts WHERE session_id = %s", (session_id,))
+            cur.execute(LAYOUT_SQL, params)
+            laps = 0
+            if cur.rowcount:
+                cur.execute(MINI_SECTORS_SQL, params)
+                laps = cur.rowcount
+        conn.commit()
+        return laps
+    except psycopg.Error as e:
+        conn.rollback()
+        logger.error(f"Failed to build mini-sectors for {session_id}: {e}")
+        raise
+
+
+def build_mini_sectors(conn, session_ids: Optional[List[str]] = None,
+                       sector_count: int = DEFAULT_SECTOR_COUNT) -> int:
+    """
+    Rebuild the mini-sectors of the given sessions.
+
+    Args:
+        session_ids: Sessions to rebuild (every session with a trace if None)
+        sector_count: Mini-sectors per lap
+
+    Returns:
+        Number of laps written
+    """
+    sessions = get_mini_sector_sessions(conn, session_ids)
+    logger.info(f"Building {sector_count} mini-sectors for {len(sessions)} sessions")
+
+    total_laps = 0
+    for idx, session_id in enumerate(sessions, 1):
+        laps = build_session_mini_sectors(conn, session_id, sector_count)
+        total_laps += laps
+        if laps:
+            logger.info(f"  [{idx}/{len(sessions)}] {session_id}: {laps:,} laps")
+        else:
+            logger.warning(
+                f"  [{idx}/{len(sessions)}] {session_id}: no laps "
+                "(no reference lap, or no lap within the length tolerance)"
+            )
+
+    return total_laps
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Build gold.mini_sectors")
+    parser.add_argument(
+        '--session-id',
+        action='append',
+        dest='session_ids',
+        help='Only rebuild this session (repeatable; default all sessions with a trace)'
+    )
+    parser.add_argument(
+        '--sectors',
+        type=int,
+        default=DEFAULT_SECTOR_COUNT,
+        help=f'Mini-sectors per lap (default {DEFAULT_SECTOR_COUNT})'
+    )
+    args = parser.parse_args()
+
+    logger.info("Starting mini-sector build")
+    logger.info("="*60)
+
+    conn = get_db_connection()
+
+    try:
+        total_laps = build_mini_sectors(conn, args.session_ids, args.sectors)
+
+        logger.info("="*60)
+        logger.info("MINI-SECTOR BUILD COMPLETE")
+        logger.info("="*60)
+        logger.info(f"Laps written: {total_laps:,}")
+
+        # Show summary
+        logger.info("\nSummary:")
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT COUNT(*), COALESCE(AVG(sector_length_m), 0)
+                FROM gold.mini_sector_layouts
+            """)
+            sessions, avg_length = cur.fetchone()
+            logger.info(f"  Sessions with a layout: {sessions}")
+            logger.info(f"  Average mini-sector length: {avg_length:.0f} m")
+
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
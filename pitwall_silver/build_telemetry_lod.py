@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Build gold.telemetry_lod, the downsampled telemetry levels used for charting.
+
+For each session, reads silver.car_telemetry_samples (raw and packed telemetry), assigns
+each sample to its lap from silver.laps and stores min/max/mean buckets per driver at
+each level in LOD_LEVELS plus one bucket per lap (see init-db/23-create-telemetry-lod.sql).
+A session is rebuilt with a delete-and-insert in one transaction.
+
+run_silver_pipeline.py runs this as a dirty-session stage, so after a normal update only
+the sessions whose telemetry or laps changed are rebuilt.
+
+Usage:
+    python3 pitwall_silver/build_telemetry_lod.py                        # All sessions with telemetry
+    python3 pitwall_silver/build_telemetry_lod.py --session-id <id> ...  # Selected sessions
+"""
+
+import os
+import argparse
+import logging
+from typing import List, Optional
+
+import psycopg
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Time-bucketed levels: (level, bucket width in seconds). 'lap' is always built as well.
+LOD_LEVELS = [
+    ('1s', 1),
+    ('5s', 5),
+]
+
+LOD_BUILD_SQL = """
+    WITH lap_bounds AS (
+        -- Lap end as in gold.align_telemetry(): the next lap's start, else the lap's own
+        -- duration, so the cool-down lap and post-session samples stay out of the last lap
+        SELECT
+            driver_id,
+            lap_number,
+            date_start,
+            COALESCE(
+                LEAD(date_start) OVER (PARTITION BY driver_id ORDER BY lap_number),
+                CASE
+                    WHEN lap_duration_ms IS NOT NULL
+                    THEN date_start + lap_duration_ms * INTERVAL '1 millisecond'
+                    ELSE date_start + INTERVAL '2 minutes'  -- Fallback for missing duration
+                END
+            ) AS date_end
+        FROM silver.laps
+        WHERE session_id = %(session_id)s
+          AND date_start IS NOT NULL
+    ),
+    first_laps AS (
+        SELECT driver_id, MIN(date_start) AS first_start
+        FROM lap_bounds
+        GROUP BY driver_id
+    ),
+    samples AS (
+        SELECT
+            ts.driver_id,
+            ts.date,
+            ts.speed_kph,
+            ts.rpm,
+            ts.throttle,
+            ts.brake,
+            ts.n_gear,
+            ts.drs,
+            COALESCE(lb.lap_number, 0) AS lap_number,
+            -- Outside every lap but after the first one starts: after the last lap
+            lb.lap_number IS NULL AND ts.date >= fl.first_start AS after_laps
+        FROM silver.car_telemetry_samples ts
+        LEFT JOIN lap_bounds lb
+            ON lb.driver_id = ts.driver_id
+            AND ts.date >= lb.date_start
+            AND ts.date < lb.date_end
+        LEFT JOIN first_laps fl ON fl.driver_id = ts.driver_id
+        WHERE ts.session_id = %(session_id)s
+    ),
+    levels AS (
+        SELECT level, bucket_seconds
+        FROM unnest(%(levels)s::text[], %(bucket_seconds)s::int[]) AS l(level, bucket_seconds)
+        UNION ALL
+        SELECT 'lap', NULL
+    ),
+    bucketed AS (
+        SELECT
+            s.*,
+            lv.level,
+            CASE
+                -- One 'lap' bucket per lap; lap 0 splits into before and after the laps
+                WHEN lv.bucket_seconds IS NULL THEN CASE WHEN s.after_laps THEN 1 END
+                ELSE FLOOR(EXTRACT(EPOCH FROM s.date) / lv.bucket_seconds)
+            END AS bucket
+        FROM samples s
+        CROSS JOIN levels lv
+    )
+    INSERT INTO gold.telemetry_lod (
+        session_id, driver_id, level, bucket_start, bucket_end, lap_number, sample_count,
+        speed_min, speed_max, speed_mean,
+        rpm_min, rpm_max, rpm_mean,
+        throttle_min, throttle_max, throttle_mean,
+        brake_max, brake_mean,
+        n_gear_min, n_gear_max,
+        drs_max
+    )
+    SELECT
+        %(session_id)s,
+        driver_id,
+        level,
+        MIN(date),
+        MAX(date),
+        lap_number,
+        COUNT(*),
+        MIN(speed_kph), MAX(speed_kph), AVG(speed_kph)::REAL,
+        MIN(rpm), MAX(rpm), AVG(rpm)::REAL,
+        MIN(throttle), MAX(throttle), AVG(throttle)::REAL,
+        MAX(brake), AVG(brake)::REAL,
+        MIN(n_gear), MAX(n_gear),
+        MAX(drs)
+    FROM bucketed
+    GROUP BY driver_id, level, lap_number, bucket
+"""
+
+
+def get_db_connection():
+    """Create and return a database connection."""
+    try:
+        conn = psycopg.connect(
+            host=os.getenv('PGHOST', 'localhost'),
+            port=os.getenv('PGPORT', '5433'),
+            dbname=os.getenv('PGDATABASE', 'pitwall'),
+            user=os.getenv('PGUSER', 'pitwall'),
+            password=os.getenv('PGPASSWORD', 'pitwall')
+        )
+        return conn
+    except Exception as e:
+        logger.error(f"Failed to connect to database: {e}")
+        raise
+
+
+def get_telemetry_sessions(conn, session_ids: Optional[List[str]] = None) -> List[str]:
+    """
+    Get the sessions to (re)build, oldest first.
+
+    Args:
+        session_ids: Only these sessions (every session with telemetry if None). Sessions
+            whose telemetry is gone are kept so their levels are removed.
+    """
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT s.session_id
+                FROM silver.sessions s
+                WHERE CASE
+                    WHEN %(session_ids)s::text[] IS NULL THEN
+                        EXISTS (SELECT 1 FROM silver.car_telemetry ct WHERE ct.session_id = s.session_id)
+                        OR EXISTS (SELECT 1 FROM silver.car_telemetry_packed p WHERE p.session_id = s.session_id)
+                    ELSE s.session_id = ANY(%(session_ids)s::text[])
+                END
+                ORDER BY s.start_time
+            """, {'session_ids': session_ids})
+            return [row[0] for row in cur.fetchall()]
+    except psycopg.Error as e:
+        logger.error(f"Failed to get telemetry sessions: {e}")
+        raise
+
+
+def build_session_lod(conn, session_id: str) -> int:
+    """
+    Rebuild every level of one session.
+
+    Returns:
+        Number of buckets written
+    """
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM gold.telemetry_lod WHERE session_id = %s", (session_id,))
+            cur.execute(LOD_BUILD_SQL, {
+                'session_id': session_id,
+                'levels': [level for level, _ in LOD_LEVELS],
+                'bucket_seconds': [seconds for _, seconds in LOD_LEVELS],
+            })
+            buckets = cur.rowcount
+        conn.commit()
+        return buckets
+    except psycopg.Error as e:
+        conn.rollback()
+        logger.error(f"Failed to build telemetry levels for {session_id}: {e}")
+        raise
+
+
+def build_telemetry_lod(conn, session_ids: Optional[List[str]] = None) -> int:
+    """
+    Rebuild the telemetry levels of the given sessions.
+
+    Args:
+        session_ids: Sessions to rebuild (every session with telemetry if None)
+
+    Returns:
+        Number of buckets written
+    """
+    sessions = get_telemetry_sessions(conn, session_ids)
+    logger.info(f"Building telemetry levels for {len(sessions)} sessions")
+
+    total_buckets = 0
+    for idx, session_id in enumerate(sessions, 1):
+        buckets = build_session_lod(conn, session_id)
+        total_buckets += buckets
+        logger.info(f"  [{idx}/{len(sessions)}] {session_id}: {buckets:,} buckets")
+
+    return total_buckets
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Build gold.telemetry_lod")
+    parser.add_argument(
+        '--session-id',
+        action='append',
+        dest='session_ids',
+        help='Only rebuild this session (repeatable; default all sessions with telemetry)'
+    )
+    args = parser.parse_args()
+
+    logger.info("Starting telemetry level-of-detail build")
+    logger.info("="*60)
+
+    conn = get_db_connection()
+
+    try:
+        total_buckets = build_telemetry_lod(conn, args.session_ids)
+
+        logger.info("="*60)
+        logger.info("TELEMETRY LOD BUILD COMPLETE")
+        logger.info("="*60)
+        logger.info(f"Buckets written: {total_buckets:,}")
+
+        # Show summary
+        logger.info("\nSummary:")
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT level, COUNT(*), COUNT(DISTINCT session_id)
+                FROM gold.telemetry_lod
+                GROUP BY level
+                ORDER BY level
+            """)
+            for level, buckets, sessions in cur.fetchall():
+                logger.info(f"  {level}: {buckets:,} buckets across {sessions} sessions")
+
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Build gold.telemetry_trace, the telemetry samples aligned with GPS and lap context.
+
+Each session is rebuilt with a delete and an insert from gold.telemetry_trace_rows() in
+one transaction: the samples aligned by gold.align_telemetry()
+(init-db/24-create-telemetry-alignment.sql) plus the lap_distance_m / lap_fraction
+channels (init-db/26-add-telemetry-trace-lap-distance.sql), one row per sample. Sessions
+are independent, so --workers rebuilds several at once, each on its own connection.
+
+run_silver_pipeline.py runs this as a dirty-session stage, so after a normal update only
+the sessions whose telemetry, GPS, laps, pit stops or driver mapping changed are rebuilt.
+
+Usage:
+    python3 pitwall_silver/build_telemetry_trace.py                        # All sessions with telemetry
+    python3 pitwall_silver/build_telemetry_trace.py --workers 4
+    python3 pitwall_silver/build_telemetry_trace.py --session-id <id> ...  # Selected sessions
+"""
+
+import os
+import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import psycopg
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Session types included in the trace (same filter as gold.align_telemetry)
+TRACE_SESSION_TYPES = ['race', 'sprint', 'quali', 'sprint_quali']
+
+
+def get_db_connection():
+    """Create and return a database connection."""
+    try:
+        conn = psycopg.connect(
+            host=os.getenv('PGHOST', 'localhost'),
+            port=os.getenv('PGPORT', '5433'),
+            dbname=os.getenv('PGDATABASE', 'pitwall'),
+            user=os.getenv('PGUSER', 'pitwall'),
+            password=os.getenv('PGPASSWORD', 'pitwall')
+        )
+        return conn
+    except Exception as e:
+        logger.error(f"Failed to connect to database: {e}")
+        raise
+
+
+def get_trace_sessions(conn, session_ids: Optional[List[str]] = None) -> List[str]:
+    """
+    Get the sessions to (re)build, oldest first.
+
+    Args:
+        session_ids: Only these sessions (every trace session with telemetry if None).
+            Sessions whose telemetry is gone are kept so their rows are removed.
+    """
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT s.session_id
+                FROM silver.sessions s
+                WHERE CASE
+                    WHEN %(session_ids)s::text[] IS NULL THEN
+                        s.session_type::text = ANY(%(session_types)s::text[])
+                        AND (
+                            EXISTS (SELECT 1 FROM silver.car_telemetry ct WHERE ct.session_id = s.session_id)
+                            OR EXISTS (SELECT 1 FROM silver.car_telemetry_packed p WHERE p.session_id = s.session_id)
+                        )
+                    ELSE s.session_id = ANY(%(session_ids)s::text[])
+                END
+                ORDER BY s.start_time
+            """, {'session_ids': session_ids, 'session_types': TRACE_SESSION_TYPES})
+            return [row[0] for row in cur.fetchall()]
+    except psycopg.Error as e:
+        logger.error(f"Failed to get trace sessions: {e}")
+        raise
+
+
+def build_session_trace(conn, session_id: str) -> int:
+    """
+    Rebuild the trace of one session.
+
+    Returns:
+        Number of samples written
+    """
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM gold.telemetry_trace WHERE session_id = %s", (session_id,))
+            # telemetry_trace_rows() returns one row per sample, so a key conflict here
+            # is a real error
+            cur.execute("""
+                INSERT INTO gold.telemetry_trace
+                SELECT * FROM gold.telemetry_trace_rows(ARRAY[%s])
+            """, (session_id,))
+            samples = cur.rowcount
+        conn.commit()
+        return samples
+    except psycopg.Error as e:
+        conn.rollback()
+        logger.error(f"Failed to build telemetry trace for {session_id}: {e}")
+        raise
+
+
+def build_sessions(conn, sessions: List[str], total: int, offset: int = 0, step: int = 1) -> int:
+    """Rebuild sessions[offset::step] on one connection, logging progress against total."""
+    samples_written = 0
+    for idx in range(offset, len(sessions), step):
+        session_id = sessions[idx]
+        samples = build_session_trace(conn, session_id)
+        samples_written += samples
+        logger.info(f"  [{idx + 1}/{total}] {session_id}: {samples:,} samples")
+    return samples_written
+
+
+def build_telemetry_trace(conn, session_ids: Optional[List[str]] = None, workers: int = 1) -> int:
+    """
+    Rebuild the telemetry trace of the given sessions.
+
+    Args:
+        session_ids: Sessions to rebuild (every trace session with telemetry if None)
+        workers: Sessions rebuilt concurrently. Extra workers open their own connections.
+
+    Returns:
+        Number of samples written
+    """
+    sessions = get_trace_sessions(conn, session_ids)
+    logger.info(f"Building telemetry trace for {len(sessions)} sessions")
+
+    workers = max(1, min(workers, len(sessions)))
+    if workers == 1:
+        return build_sessions(conn, sessions, len(sessions))
+
+    def run_worker(offset: int) -> int:
+        if offset == 0:
+            return build_sessions(conn, sessions, len(sessions), offset, workers)
+        worker_conn = get_db_connection()
+        try:
+            return build_sessions(worker_conn, sessions, len(sessions), offset, workers)
+        finally:
+            worker_conn.close()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(run_worker, range(workers)))
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Build gold.telemetry_trace")
+    parser.add_argument(
+        '--session-id',
+        action='append',
+        dest='session_ids',
+        help='Only rebuild this session (repeatable; default all sessions with telemetry)'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Sessions to rebuild concurrently (default 1)'
+    )
+    args = parser.parse_args()
+
+    logger.info("Starting telemetry trace build")
+    logger.info("="*60)
+
+    conn = get_db_connection()
+
+    try:
+        total_samples = build_telemetry_trace(conn, args.session_ids, args.workers)
+
+        logger.info("="*60)
+        logger.info("TELEMETRY TRACE BUILD COMPLETE")
+        logger.info("="*60)
+        logger.info(f"Samples written: {total_samples:,}")
+
+        # Show summary
+        logger.info("\nSummary:")
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT s.session_type, COUNT(*)
+                FROM silver.sessions s
+                WHERE EXISTS (SELECT 1 FROM gold.telemetry_trace t WHERE t.session_id = s.session_id)
+                GROUP BY s.session_type
+                ORDER BY s.session_type
+            """)
+            for session_type, sessions in cur.fetchall():
+                logger.info(f"  {session_type}: {sessions} sessions")
+            cur.execute("SELECT pg_size_pretty(pg_total_relation_size('gold.telemetry_trace'))")
+            logger.info(f"  gold.telemetry_trace size: {cur.fetchone()[0]}")
+
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Build gold.turn_analytics, the per-lap entry/apex/exit speeds of every turn.
+
+For each session, snaps every lap in gold.telemetry_trace to the circuit's turns and
+stores entry, apex and exit speed, minimum gear and braking point per driver lap and turn
+(see init-db/27-create-turn-analytics.sql). A session is rebuilt with a delete-and-insert
+in one transaction.
+
+silver.turns.x/y are track map (SVG) coordinates, not car_gps ones, so turn positions are
+taken from the session's reference lap (its fastest valid lap with GPS in the trace):
+- turns with a silver.turns.track_distance_m sit at the reference lap's position at that
+  distance, keeping the circuit's turn numbers
+- on circuits without track distances, every braking corner of the reference lap (a speed
+  minimum at least MIN_SPEED_DROP_KPH below the fastest speed within CORNER_WINDOW_M) is
+  a turn, numbered in lap order. Flat-out kinks have no speed minimum, so these numbers
+  can run behind the circuit's official ones
+Sessions without a reference lap get no rows and are logged as a warning.
+
+run_silver_pipeline.py runs this as a dirty-session stage after build_telemetry_trace.py,
+so after a normal update only the sessions whose trace was rebuilt are recomputed.
+
+Usage:
+    python3 pitwall_silver/build_turn_analytics.py                        # All sessions with a trace
+    python3 pitwall_silver/build_turn_analytics.py --session-id <id> ...  # Selected sessions
+"""
+
+import os
+import argparse
+import logging
+from typing import List, Optional
+
+import psycopg
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# GPS x/y are in 1/10 m. A sample snaps to a turn within SNAP_RADIUS; the grid cell must
+# be at least that large so the 3x3 cells around a turn cover the whole radius.
+GRID_CELL = 1000        # 100 m
+SNAP_RADIUS = 500       # 50 m
+
+# Distances along the lap (metres) around the apex
+ENTRY_EXIT_M = 100      # entry / exit speed taken this far before / after the apex
+APEX_WINDOW_M = 50      # apex speed and min gear within this distance of the apex
+BRAKING_WINDOW_M = 300  # braking point searched this far before the apex
+
+# Braking corners on the reference lap, for circuits without turn track distances
+CORNER_WINDOW_M = 150     # a corner is the slowest sample within this distance either side
+MIN_SPEED_DROP_KPH = 25   # ... and at least this much slower than the fastest one there
+
+TURN_ANALYTICS_SQL = """
+    WITH reference_lap AS (
+        -- The session's fastest valid lap with GPS (not an out lap, as for the mini-sector
+        -- reference); its path locates the turns
+        SELECT l.driver_id, l.lap_number
+        FROM silver.laps l
+        WHERE l.session_id = %(session_id)s
+          AND l.lap_duration_ms IS NOT NULL
+          AND l.is_valid
+          AND l.is_pit_out_lap IS NOT TRUE
+          AND EXISTS (
+              SELECT 1
+              FROM gold.telemetry_trace t
+              WHERE t.session_id = l.session_id
+                AND t.driver_id = l.driver_id
+                AND t.lap_number = l.lap_number
+                AND t.lap_distance_m IS NOT NULL
+                AND t.x IS NOT NULL
+          )
+        ORDER BY l.lap_duration_ms, l.driver_id
+        LIMIT 1
+    ),
+    reference_samples AS (
+        SELECT t.lap_distance_m::FLOAT8 AS lap_distance_m, t.speed_kph, t.x, t.y
+        FROM gold.telemetry_trace t
+        INNER JOIN reference_lap r ON t.driver_id = r.driver_id AND t.lap_number = r.lap_number
+        WHERE t.session_id = %(session_id)s
+          AND t.lap_distance_m IS NOT NULL
+          AND t.x IS NOT NULL
+          AND t.y IS NOT NULL
+    ),
+    mapped_turns AS (
+        -- Turns with a track distance: the reference lap's position at that distance
+        SELECT DISTINCT ON (t.turn_number) t.turn_number, rs.x, rs.y
+        FROM silver.turns t
+        INNER JOIN silver.meetings m ON t.circuit_id = m.circuit_id
+        INNER JOIN silver.sessions s ON m.meeting_id = s.meeting_id
+        CROSS JOIN reference_samples rs
+        WHERE s.session_id = %(session_id)s
+          AND t.track_distance_m IS NOT NULL
+        ORDER BY t.turn_number, ABS(rs.lap_distance_m - t.track_distance_m)
+    ),
+    speed_minima AS (
+        SELECT
+            rs.*,
+            MIN(rs.speed_kph) OVER corner_window AS window_min_kph,
+            MAX(rs.speed_kph) OVER corner_window AS window_max_kph
+        FROM reference_samples rs
+        WINDOW corner_window AS (
+            ORDER BY rs.lap_distance_m
+            RANGE BETWEEN %(corner_window_m)s::FLOAT8 PRECEDING
+                      AND %(corner_window_m)s::FLOAT8 FOLLOWING
+        )
+    ),
+    corner_candidates AS (
+        SELECT
+            sm.lap_distance_m, sm.x, sm.y,
+            LAG(sm.lap_distance_m) OVER (ORDER BY sm.lap_distance_m) AS prev_distance_m
+        FROM speed_minima sm
+        WHERE sm.speed_kph = sm.window_min_kph
+          AND sm.window_max_kph - sm.speed_kph >= %(min_speed_drop_kph)s
+    ),
+    detected_turns AS (
+        -- Circuits without track distances: braking corners in lap order (the first
+        -- sample of a corner where several share its minimum speed)
+        SELECT ROW_NUMBER() OVER (ORDER BY cc.lap_distance_m)::INT AS turn_number, cc.x, cc.y
+        FROM corner_candidates cc
+        WHERE (cc.prev_distance_m IS NULL
+               OR cc.lap_distance_m - cc.prev_distance_m > %(corner_window_m)s)
+          AND NOT EXISTS (SELECT 1 FROM mapped_turns)
+    ),
+    session_turns AS (
+        SELECT turn_number, x, y FROM mapped_turns
+        UNION ALL
+        SELECT turn_number, x, y FROM detected_turns
+    ),
+    turn_cells AS (
+        -- Each turn is registered in its grid cell and the 8 around it
+        SELECT
+            st.turn_number, st.x, st.y,
+            FLOOR(st.x::NUMERIC / %(grid_cell)s)::INT + dx AS cell_x,
+            FLOOR(st.y::NUMERIC / %(grid_cell)s)::INT + dy AS cell_y
+        FROM session_turns st
+        CROSS JOIN generate_series(-1, 1) AS dx
+        CROSS JOIN generate_series(-1, 1) AS dy
+    ),
+    samples AS (
+        SELECT
+            driver_id, lap_number, sample_timestamp, lap_distance_m, x, y,
+            FLOOR(x::NUMERIC / %(grid_cell)s)::INT AS cell_x,
+            FLOOR(y::NUMERIC / %(grid_cell)s)::INT AS cell_y
+        FROM gold.telemetry_trace
+        WHERE session_id = %(session_id)s
+          AND lap_number IS NOT NULL
+          AND lap_distance_m IS NOT NULL
+          AND x IS NOT NULL
+          AND y IS NOT NULL
+    ),
+    apexes AS (
+        -- Closest sample of each lap to each turn
+        SELECT DISTINCT ON (s.driver_id, s.lap_number, tc.turn_number)
+            s.driver_id,
+            s.lap_number,
+            tc.turn_number,
+            s.sample_timestamp AS apex_timestamp,
+            s.lap_distance_m AS apex_distance_m
+        FROM samples s
+        INNER JOIN turn_cells tc ON s.cell_x = tc.cell_x AND s.cell_y = tc.cell_y
+        WHERE POWER(s.x - tc.x, 2) + POWER(s.y - tc.y, 2) <= POWER(%(snap_radius)s, 2)
+        ORDER BY s.driver_id, s.lap_number, tc.turn_number,
+                 POWER(s.x - tc.x, 2) + POWER(s.y - tc.y, 2)
+    )
+    INSERT INTO gold.turn_analytics (
+        session_id, driver_id, lap_number, turn_number, apex_timestamp, apex_distance_m,
+        entry_speed_kph, apex_speed_kph, exit_speed_kph, min_gear, braking_point_m
+    )
+    SELECT
+        %(session_id)s,
+        a.driver_id,
+        a.lap_number,
+        a.turn_number,
+        a.apex_timestamp,
+        a.apex_distance_m,
+        (array_agg(t.speed_kph ORDER BY t.lap_distance_m DESC)
+            FILTER (WHERE t.lap_distance_m <= a.apex_distance_m - %(entry_exit_m)s))[1],
+        MIN(t.speed_kph)
+            FILTER (WHERE ABS(t.lap_distance_m - a.apex_distance_m) <= %(apex_window_m)s),
+        (array_agg(t.speed_kph ORDER BY t.lap_distance_m)
+            FILTER (WHERE t.lap_distance_m >= a.apex_distance_m + %(entry_exit_m)s))[1],
+        MIN(t.n_gear)
+            FILTER (WHERE ABS(t.lap_distance_m - a.apex_distance_m) <= %(apex_window_m)s),
+        MIN(t.lap_distance_m)
+            FILTER (WHERE t.brake > 0 AND t.lap_distance_m <= a.apex_distance_m)
+    FROM apexes a
+    INNER JOIN gold.telemetry_trace t
+        ON t.session_id = %(session_id)s
+        AND t.driver_id = a.driver_id
+        AND t.lap_number = a.lap_number
+        AND t.lap_distance_m BETWEEN a.apex_distance_m - %(braking_window_m)s
+                                 AND a.apex_distance_m + 2 * %(entry_exit_m)s
+    GROUP BY a.driver_id, a.lap_number, a.turn_number, a.apex_timestamp, a.apex_distance_m
+"""
+
+
+def get_db_connection():
+    """Create and return a database connection."""
+    try:
+        conn = psycopg.connect(
+            host=os.getenv('PGHOST', 'localhost'),
+            port=os.getenv('PGPORT', '5433'),
+            dbname=os.getenv('PGDATABASE', 'pitwall'),
+            user=os.getenv('PGUSER', 'pitwall'),
+            password=os.getenv('PGPASSWORD', 'pitwall')
+        )
+        return conn
+    except Exception as e:
+        logger.error(f"Failed to connect to database: {e}")
+        raise
+
+
+def get_turn_sessions(conn, session_ids: Optional[List[str]] = None) -> List[str]:
+    """
+    Get the sessions to (re)build, oldest first.
+
+    Args:
+        session_ids: Only these sessions (every session with a trace if None). Sessions
+            whose trace is gone are kept so their rows are removed.
+    """
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT s.session_id
+                FROM silver.sessions s
+                WHERE CASE
+                    WHEN %(session_ids)s::text[] IS NULL THEN
+                        EXISTS (SELECT 1 FROM gold.telemetry_trace t WHERE t.session_id = s.session_id)
+                    ELSE s.session_id = ANY(%(session_ids)s::text[])
+                END
+                ORDER BY s.start_time
+            """, {'session_ids': session_ids})
+            return [row[0] for row in cur.fetchall()]
+    except psycopg.Error as e:
+        logger.error(f"Failed to get turn analytics sessions: {e}")
+        raise
+
+
+def build_session_turns(conn, session_id: str) -> int:
+    """
+    Rebuild the turn analytics of one session.
+
+    Returns:
+        Number of (driver, lap, turn) rows written
+    """
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM gold.turn_analytics WHERE session_id = %s", (session_id,))
+            cur.execute(TURN_ANALYTICS_SQL, {
+                'session_id': session_id,
+                'grid_cell': GRID_CELL,
+                'snap_radius': SNAP_RADIUS,
+                'entry_exit_m': ENTRY_EXIT_M,
+                'apex_window_m': APEX_WINDOW_M,
+                'braking_window_m': BRAKING_WINDOW_M,
+                'corner_window_m': CORNER_WINDOW_M,
+                'min_speed_drop_kph': MIN_SPEED_DROP_KPH,
+            })
+            rows = cur.rowcount
+        conn.commit()
+        return rows
+    except psycopg.Error as e:
+        conn.rollback()
+        logger.error(f"Failed to build turn analytics for {session_id}: {e}")
+        raise
+
+
+def build_turn_analytics(conn, session_ids: Optional[List[str]] = None) -> int:
+    """
+    Rebuild the turn analytics of the given sessions.
+
+    Args:
+        session_ids: Sessions to rebuild (every session with a trace if None)
+
+    Returns:
+        Number of (driver, lap, turn) rows written
+    """
+    sessions = get_turn_sessions(conn, session_ids)
+    logger.info(f"Building turn analytics for {len(sessions)} sessions")
+
+    total_rows = 0
+    for idx, session_id in enumerate(sessions, 1):
+        rows = build_session_turns(conn, session_id)
+        total_rows += rows
+        if rows:
+            logger.info(f"  [{idx}/{len(sessions)}] {session_id}: {rows:,} lap turns")
+        else:
+            logger.warning(
+                f"  [{idx}/{len(sessions)}] {session_id}: no lap turns "
+                "(no valid timed lap with GPS and lap distance in gold.telemetry_trace)"
+            )
+
+    return total_rows
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Build gold.turn_analytics")
+    parser.add_argument(
+        '--session-id',
+        action='append',
+        dest='session_ids',
+        help='Only rebuild this session (repeatable; default all sessions with a trace)'
+    )
+    args = parser.parse_args()
+
+    logger.info("Starting turn analytics build")
+    logger.info("="*60)
+
+    conn = get_db_connection()
+
+    try:
+        total_rows = build_turn_analytics(conn, args.session_ids)
+
+        logger.info("="*60)
+        logger.info("TURN ANALYTICS BUILD COMPLETE")
+        logger.info("="*60)
+        logger.info(f"Lap turns written: {total_rows:,}")
+
+        # Show summary
+        logger.info("\nSummary:")
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT COUNT(DISTINCT session_id), COUNT(*), COUNT(braking_point_m)
+                FROM gold.turn_analytics
+            """)
+            sessions, rows, braking = cur.fetchone()
+            logger.info(f"  Sessions: {sessions}")
+            logger.info(f"  Lap turns: {rows:,} ({braking:,} with a braking point)")
+
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -303,6 +303,11 @@ def main():
         logger.info("Inserting driver numbers into silver.driver_numbers_by_season...")
         inserted = insert_driver_numbers(conn, records, driver_id_mapping)
         
+        # Keep the materialized driver_id_by_session lookup in sync
+        with conn.cursor() as cur:
+            cur.execute("SELECT silver.refresh_driver_id_by_session()")
+        conn.commit()
+        
         logger.info("="*60)
         logger.info("DRIVER NUMBERS BY SEASON IMPORT COMPLETE")
         logger.info("="*60)
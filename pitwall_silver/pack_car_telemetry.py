@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Pack silver.car_telemetry samples into per-lap rows in silver.car_telemetry_packed.
+
+Optional storage step: one row per (session_id, driver_id, lap_number) holding millisecond
+offsets plus one SMALLINT array per channel, instead of one row per sample. The session's
+rows are moved out of silver.car_telemetry in the same transaction (see
+init-db/22-create-car-telemetry-packed.sql). Readers that need sample rows for packed
+sessions use the silver.car_telemetry_samples view.
+
+Only settled sessions are packed: the session must have laps in silver.laps (samples are
+grouped by lap) and must have ended at least --min-age-hours ago. Packing a session again
+merges new raw rows with the rows packed earlier.
+
+Usage:
+    python3 pitwall_silver/pack_car_telemetry.py                        # All settled sessions
+    python3 pitwall_silver/pack_car_telemetry.py --min-age-hours 72
+    python3 pitwall_silver/pack_car_telemetry.py --session-id <id> ...  # Selected sessions
+"""
+
+import os
+import argparse
+import logging
+from typing import List, Optional
+
+import psycopg
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Sessions that ended more recently may still receive telemetry
+DEFAULT_MIN_AGE_HOURS = 24
+
+
+def get_db_connection():
+    """Create and return a database connection."""
+    try:
+        conn = psycopg.connect(
+            host=os.getenv('PGHOST', 'localhost'),
+            port=os.getenv('PGPORT', '5433'),
+            dbname=os.getenv('PGDATABASE', 'pitwall'),
+            user=os.getenv('PGUSER', 'pitwall'),
+            password=os.getenv('PGPASSWORD', 'pitwall')
+        )
+        return conn
+    except Exception as e:
+        logger.error(f"Failed to connect to database: {e}")
+        raise
+
+
+def get_sessions_to_pack(conn, min_age_hours: int, session_ids: Optional[List[str]] = None) -> List[str]:
+    """
+    Get settled sessions that still have rows in silver.car_telemetry.
+
+    Args:
+        min_age_hours: Minimum hours since the session ended
+        session_ids: Only consider these sessions (all sessions if None)
+    """
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT s.session_id
+                FROM silver.sessions s
+                WHERE s.end_time < NOW() - make_interval(hours => %(min_age_hours)s)
+                  AND (%(session_ids)s::text[] IS NULL OR s.session_id = ANY(%(session_ids)s::text[]))
+                  AND EXISTS (SELECT 1 FROM silver.car_telemetry ct WHERE ct.session_id = s.session_id)
+                  AND EXISTS (SELECT 1 FROM silver.laps l WHERE l.session_id = s.session_id)
+                ORDER BY s.start_time
+            """, {'min_age_hours': min_age_hours, 'session_ids': session_ids})
+            sessions = [row[0] for row in cur.fetchall()]
+        logger.info(f"Found {len(sessions)} sessions to pack")
+        return sessions
+    except psycopg.Error as e:
+        logger.error(f"Failed to get sessions to pack: {e}")
+        raise
+
+
+def pack_session(conn, session_id: str) -> int:
+    """
+    Move one session's telemetry into packed per-lap rows.
+
+    Returns:
+        Number of (driver, lap) rows written
+    """
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT silver.pack_car_telemetry(%s)", (session_id,))
+            packed_laps = cur.fetchone()[0]
+        conn.commit()
+        return packed_laps
+    except psycopg.Error as e:
+        conn.rollback()
+        logger.error(f"Failed to pack session {session_id}: {e}")
+        raise
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Pack silver.car_telemetry into per-lap rows")
+    parser.add_argument(
+        '--session-id',
+        action='append',
+        dest='session_ids',
+        help='Only pack this session (repeatable; default all settled sessions)'
+    )
+    parser.add_argument(
+        '--min-age-hours',
+        type=int,
+        default=DEFAULT_MIN_AGE_HOURS,
+        help=f'Only pack sessions that ended at least this long ago (default {DEFAULT_MIN_AGE_HOURS})'
+    )
+    args = parser.parse_args()
+
+    logger.info("Starting car telemetry packing")
+    logger.info("="*60)
+
+    conn = get_db_connection()
+
+    try:
+        sessions = get_sessions_to_pack(conn, args.min_age_hours, args.session_ids)
+        if not sessions:
+            logger.info("No sessions to pack")
+            return
+
+        total_laps = 0
+        for idx, session_id in enumerate(sessions, 1):
+            packed_laps = pack_session(conn, session_id)
+            total_laps += packed_laps
+            logger.info(f"  [{idx}/{len(sessions)}] {session_id}: {packed_laps} laps packed")
+
+        logger.info("="*60)
+        logger.info("CAR TELEMETRY PACKING COMPLETE")
+        logger.info("="*60)
+        logger.info(f"Sessions packed: {len(sessions)}")
+        logger.info(f"Lap rows written: {total_laps}")
+
+        # Show summary
+        logger.info("\nSummary:")
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT COUNT(DISTINCT session_id),
+                       COUNT(*),
+                       COALESCE(SUM(sample_count), 0),
+                       pg_size_pretty(pg_total_relation_size('silver.car_telemetry_packed'))
+                FROM silver.car_telemetry_packed
+            """)
+            sessions_packed, lap_rows, samples, size = cur.fetchone()
+            logger.info(f"  Packed sessions: {sessions_packed}")
+            logger.info(f"  Packed lap rows: {lap_rows:,}")
+            logger.info(f"  Packed samples: {samples:,}")
+            logger.info(f"  silver.car_telemetry_packed size: {size}")
+
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
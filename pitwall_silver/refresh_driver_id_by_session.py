@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Refresh the materialized silver.driver_id_by_session lookup.
+
+silver.refresh_driver_id_by_session() (init-db/18-materialize-driver-id-by-session.sql)
+compares the full source join against silver.driver_id_by_session_mat and rewrites the
+sessions whose rows differ. The comparison reads the whole six-way join, so the pipeline
+runs it once, after every table it reads (sessions, drivers, driver numbers, driver teams,
+team branding) has been upserted, instead of after each of those upserts.
+
+Run it after any of those upsert scripts when running them on their own.
+"""
+
+import os
+import logging
+
+import psycopg
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def get_db_connection():
+    """Create and return a database connection."""
+    try:
+        conn = psycopg.connect(
+            host=os.getenv('PGHOST', 'localhost'),
+            port=os.getenv('PGPORT', '5433'),
+            dbname=os.getenv('PGDATABASE', 'pitwall'),
+            user=os.getenv('PGUSER', 'pitwall'),
+            password=os.getenv('PGPASSWORD', 'pitwall')
+        )
+        return conn
+    except Exception as e:
+        logger.error(f"Failed to connect to database: {e}")
+        raise
+
+
+def refresh_driver_id_by_session(conn) -> int:
+    """
+    Refresh the materialized driver_id_by_session lookup for sessions whose
+    drivers or teams changed.
+
+    Returns:
+        Number of sessions rewritten
+    """
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT silver.refresh_driver_id_by_session()")
+            changed = cur.fetchone()[0]
+        conn.commit()
+        logger.info(f"Refreshed driver_id_by_session for {changed} sessions")
+        return changed
+    except psycopg.Error as e:
+        conn.rollback()
+        logger.error(f"Failed to refresh driver_id_by_session: {e}")
+        raise
+
+
+def main():
+    """Main function."""
+    logger.info("Refreshing silver.driver_id_by_session_mat")
+
+    conn = get_db_connection()
+
+    try:
+        changed = refresh_driver_id_by_session(conn)
+        logger.info(f"Refresh complete: {changed} sessions rewritten")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,43 @@
 """
 Refresh the gold.driver_standings_progression and gold.constructor_standings_progression
 materialized views after schema changes.
+
+The views are recreated with the same indexes, including the unique idx_<view>_key
+indexes from init-db/29-add-gold-unique-indexes.sql that let gold_refresh.py refresh them
+concurrently.
 """
 import os
+from pathlib import Path
+
 import psycopg2
+from psycopg2 import errors
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# gold.championship_grid reads both views, so the CASCADE drops below drop it too
+CHAMPIONSHIP_GRID_SQL = Path(__file__).resolve().parent.parent / 'init-db' / '32-create-championship-grid.sql'
+
+
+def create_key_index(cur, view_name, key_columns):
+    """
+    Create the unique idx_<view>_key index on a gold view, as
+    init-db/29-add-gold-unique-indexes.sql does. Like the migration, a view with
+    duplicate keys is left without it (and refreshed without CONCURRENTLY).
+    """
+    cur.execute("SAVEPOINT key_index")
+    try:
+        cur.execute(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{view_name}_key ON gold.{view_name} ({key_columns})"
+        )
+    except errors.UniqueViolation:
+        cur.execute("ROLLBACK TO SAVEPOINT key_index")
+        print(f"  ⚠️  gold.{view_name} has duplicate ({key_columns}) rows, no unique index")
+    else:
+        cur.execute("RELEASE SAVEPOINT key_index")
+
+
 def refresh_standings_views():
     """Drop and recreate the standings progression views with new columns."""
     
@@ -102,6 +131,7 @@ def refresh_standings_views():
                     CREATE INDEX idx_driver_standings_progression_session 
                         ON gold.driver_standings_progression(session_id)
                 """)
+                create_key_index(cur, 'driver_standings_progression', 'session_id, driver_id')
                 print("  ✓ Created indexes for driver_standings_progression")
                 
                 # Recreate constructor_standings_progression
@@ -173,8 +203,12 @@ def refresh_standings_views():
                     CREATE INDEX idx_constructor_standings_progression_session 
                         ON gold.constructor_standings_progression(session_id)
                 """)
+                create_key_index(cur, 'constructor_standings_progression', 'session_id, team_id')
                 print("  ✓ Created indexes for constructor_standings_progression")
                 
+                cur.execute(CHAMPIONSHIP_GRID_SQL.read_text())
+                print("  ✓ Recreated gold.championship_grid")
+                
                 conn.commit()
                 
                 print("\n📊 Checking view data...")
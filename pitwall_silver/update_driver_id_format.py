@@ -34,6 +34,7 @@ DRIVER_ID_REFERENCE_TABLES = [
     'race_control',
     'laps',
     'car_telemetry',
+    'car_telemetry_packed',
     'car_gps',
     'position',
     'intervals',
@@ -350,6 +351,11 @@ def main():
         logger.info("\nUpdating driver_id in silver.drivers...")
         drivers_updated = update_drivers_table(conn, driver_id_mapping)
         
+        # Keep the materialized driver_id_by_session lookup in sync
+        with conn.cursor() as cur:
+            cur.execute("SELECT silver.refresh_driver_id_by_session()")
+        conn.commit()
+        
         logger.info("="*60)
         logger.info("DRIVER_ID FORMAT UPDATE COMPLETE")
         logger.info("="*60)
@@ -79,6 +79,9 @@ def update_team_car_images():
                             WHERE team_id = %s AND season = 2025
                         """, (car_url, team_id))
                     
+                    # Keep the materialized driver_id_by_session lookup in sync
+                    cur.execute("SELECT silver.refresh_driver_id_by_session()")
+                    
                     conn.commit()
                     print(f"✅ Successfully updated {len(updates)} team car images!")
                 else:
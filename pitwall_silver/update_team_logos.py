@@ -85,6 +85,9 @@ def update_team_logos():
                         """, (logo_url, team_name))
                         update_count += cur.rowcount
                     
+                    # Keep the materialized driver_id_by_session lookup in sync
+                    cur.execute("SELECT silver.refresh_driver_id_by_session()")
+                    
                     conn.commit()
                     print(f"✅ Successfully updated {update_count} rows!")
                 else:
@@ -13,7 +13,11 @@ Maps from bronze.car_gps_raw with conversions:
 
 Optimized for large datasets (~100M rows) with:
 - Session-based filtering (only processes unprocessed sessions)
-- COPY protocol for fast bulk inserts
+- COPY protocol for fast bulk inserts into a staging table
+- INSERT ... ON CONFLICT DO NOTHING on (session_id, driver_id, date), so re-running a
+  session is idempotent (see init-db/20-add-car-telemetry-gps-unique-keys.sql)
+- One partition per session, created before the merge
+  (see init-db/21-partition-car-telemetry-gps.sql)
 - Minimal JOIN overhead
 """
 
@@ -129,38 +133,33 @@ def get_unprocessed_sessions(conn) -> Set[str]:
     """
     Get list of sessions that have unprocessed GPS data.
     
-    Returns sessions where bronze has data but silver doesn't have complete data.
+    Returns sessions where bronze has more fixes of resolvable drivers (those in
+    driver_id_by_session, with a date; the rest are skipped on load) than silver.car_gps
+    holds. Counting skipped rows too would keep such sessions unprocessed forever, since
+    the merge never inserts them.
     """
     try:
         with conn.cursor() as cur:
-            # Get sessions with bronze data that aren't fully in silver
             cur.execute("""
-                WITH bronze_sessions AS (
-                    SELECT DISTINCT openf1_session_key
-                    FROM bronze.car_gps_raw
-                    WHERE openf1_session_key IS NOT NULL
+                WITH bronze_counts AS (
+                    SELECT cgr.openf1_session_key, COUNT(DISTINCT (cgr.driver_number, cgr.date)) AS fixes
+                    FROM bronze.car_gps_raw cgr
+                    INNER JOIN silver.driver_id_by_session dis
+                        ON dis.openf1_session_key = cgr.openf1_session_key
+                        AND dis.driver_number::text = cgr.driver_number
+                    WHERE cgr.date IS NOT NULL
+                    GROUP BY cgr.openf1_session_key
                 ),
-                silver_sessions AS (
-                    SELECT DISTINCT s.openf1_session_key
+                silver_counts AS (
+                    SELECT s.openf1_session_key, COUNT(*) AS fixes
                     FROM silver.car_gps cg
                     JOIN silver.sessions s ON cg.session_id = s.session_id
+                    GROUP BY s.openf1_session_key
                 )
-                SELECT bs.openf1_session_key
-                FROM bronze_sessions bs
-                LEFT JOIN silver_sessions ss ON bs.openf1_session_key = ss.openf1_session_key
-                WHERE ss.openf1_session_key IS NULL
-                   OR bs.openf1_session_key IN (
-                       -- Also include sessions where row counts don't match
-                       SELECT cgr.openf1_session_key
-                       FROM bronze.car_gps_raw cgr
-                       GROUP BY cgr.openf1_session_key
-                       HAVING COUNT(*) > (
-                           SELECT COUNT(*)
-                           FROM silver.car_gps cg
-                           JOIN silver.sessions s ON cg.session_id = s.session_id
-                           WHERE s.openf1_session_key = cgr.openf1_session_key
-                       )
-                   )
+                SELECT bc.openf1_session_key
+                FROM bronze_counts bc
+                LEFT JOIN silver_counts sc ON sc.openf1_session_key = bc.openf1_session_key
+                WHERE bc.fixes > COALESCE(sc.fixes, 0)
             """)
             sessions = {str(row[0]) for row in cur.fetchall()}
         logger.info(f"Found {len(sessions)} sessions with unprocessed GPS data")
@@ -218,6 +217,7 @@ def process_sessions(conn, session_keys: List[str], session_id_map: Dict[str, st
             copy_buffer = StringIO()
             skipped_count = 0
             processed_count = 0
+            session_ids = set()
             
             for row in cur.fetchall():
                 openf1_session_key = str(row[0]) if row[0] else None
@@ -265,13 +265,27 @@ def process_sessions(conn, session_keys: List[str], session_id_map: Dict[str, st
                 ]
                 copy_buffer.write('\t'.join(values) + '\n')
                 processed_count += 1
+                session_ids.add(session_id)
             
-            # Use COPY for fast bulk insert
+            # COPY into a per-call staging table, then merge on the (session_id, driver_id, date)
+            # unique key (per partition: (driver_id, date)). DO NOTHING also drops duplicates
+            # within the batch, so re-runs never duplicate samples
             inserted_count = 0
             if processed_count > 0:
+                cur.execute("""
+                    CREATE TEMP TABLE car_gps_staging (
+                        session_id TEXT NOT NULL,
+                        driver_id TEXT NOT NULL,
+                        date TIMESTAMPTZ NOT NULL,
+                        x INT,
+                        y INT,
+                        z INT
+                    ) ON COMMIT DROP
+                """)
+                
                 copy_buffer.seek(0)
                 with cur.copy("""
-                    COPY silver.car_gps (
+                    COPY car_gps_staging (
                         session_id, driver_id, date, x, y, z
                     ) FROM STDIN
                 """) as copy:
@@ -281,8 +295,23 @@ def process_sessions(conn, session_keys: List[str], session_id_map: Dict[str, st
                             break
                         copy.write(data)
                 
-                inserted_count = processed_count
+                # One partition per session (no-op before the table is partitioned)
+                for session_id in session_ids:
+                    cur.execute("SELECT silver.ensure_session_partition(%s, %s)", ('car_gps', session_id))
+                
+                cur.execute("""
+                    INSERT INTO silver.car_gps (
+                        session_id, driver_id, date, x, y, z
+                    )
+                    SELECT session_id, driver_id, date, x, y, z
+                    FROM car_gps_staging
+                    ON CONFLICT DO NOTHING
+                """)
+                inserted_count = cur.rowcount
                 conn.commit()
+                
+                if processed_count > inserted_count:
+                    logger.info(f"  {processed_count - inserted_count:,} records already in silver.car_gps (or duplicated in bronze)")
             
             return (inserted_count, skipped_count)
                     
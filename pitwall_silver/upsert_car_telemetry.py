@@ -16,8 +16,16 @@ Maps from bronze.car_telemetry_raw with conversions:
 
 Optimized for large datasets (~100M rows) with:
 - Session-based filtering (only processes unprocessed sessions)
-- COPY protocol for fast bulk inserts
+- COPY protocol for fast bulk inserts into a staging table
+- INSERT ... ON CONFLICT DO NOTHING on (session_id, driver_id, date), so re-running a
+  session is idempotent (see init-db/20-add-car-telemetry-gps-unique-keys.sql)
+- One partition per session, created before the merge
+  (see init-db/21-partition-car-telemetry-gps.sql)
 - Minimal JOIN overhead
+
+Samples already in silver.car_telemetry_packed (pack_car_telemetry.py) are never inserted
+again. Bronze rows that arrive after a session was packed are loaded into
+silver.car_telemetry as usual; packing the session again merges them in.
 """
 
 import os
@@ -132,38 +140,47 @@ def get_unprocessed_sessions(conn) -> Set[str]:
     """
     Get list of sessions that have unprocessed telemetry data.
     
-    Returns sessions where bronze has data but silver doesn't have complete data.
+    Returns sessions where bronze has more samples of resolvable drivers (those in
+    driver_id_by_session; the rest are skipped on load) than silver holds, counting
+    silver.car_telemetry and silver.car_telemetry_packed together. Packed samples are
+    stored to the millisecond, so both sides are counted at millisecond precision.
     """
     try:
         with conn.cursor() as cur:
-            # Get sessions with bronze data that aren't fully in silver
             cur.execute("""
-                WITH bronze_sessions AS (
-                    SELECT DISTINCT openf1_session_key
-                    FROM bronze.car_telemetry_raw
-                    WHERE openf1_session_key IS NOT NULL
+                WITH bronze_counts AS (
+                    SELECT
+                        ctr.openf1_session_key,
+                        COUNT(DISTINCT (ctr.driver_number, date_trunc('milliseconds', ctr.date::timestamptz)))
+                            AS samples
+                    FROM bronze.car_telemetry_raw ctr
+                    INNER JOIN silver.driver_id_by_session dis
+                        ON dis.openf1_session_key = ctr.openf1_session_key
+                        AND dis.driver_number::text = ctr.driver_number
+                    WHERE ctr.date IS NOT NULL
+                    GROUP BY ctr.openf1_session_key
                 ),
-                silver_sessions AS (
-                    SELECT DISTINCT s.openf1_session_key
-                    FROM silver.car_telemetry ct
-                    JOIN silver.sessions s ON ct.session_id = s.session_id
+                silver_counts AS (
+                    -- Rows loaded after packing never repeat a packed millisecond
+                    SELECT openf1_session_key, SUM(samples) AS samples
+                    FROM (
+                        SELECT s.openf1_session_key,
+                               COUNT(DISTINCT (ct.driver_id, date_trunc('milliseconds', ct.date))) AS samples
+                        FROM silver.car_telemetry ct
+                        JOIN silver.sessions s ON ct.session_id = s.session_id
+                        GROUP BY s.openf1_session_key
+                        UNION ALL
+                        SELECT s.openf1_session_key, SUM(ctp.sample_count)
+                        FROM silver.car_telemetry_packed ctp
+                        JOIN silver.sessions s ON ctp.session_id = s.session_id
+                        GROUP BY s.openf1_session_key
+                    ) c
+                    GROUP BY openf1_session_key
                 )
-                SELECT bs.openf1_session_key
-                FROM bronze_sessions bs
-                LEFT JOIN silver_sessions ss ON bs.openf1_session_key = ss.openf1_session_key
-                WHERE ss.openf1_session_key IS NULL
-                   OR bs.openf1_session_key IN (
-                       -- Also include sessions where row counts don't match
-                       SELECT ctr.openf1_session_key
-                       FROM bronze.car_telemetry_raw ctr
-                       GROUP BY ctr.openf1_session_key
-                       HAVING COUNT(*) > (
-                           SELECT COUNT(*)
-                           FROM silver.car_telemetry ct
-                           JOIN silver.sessions s ON ct.session_id = s.session_id
-                           WHERE s.openf1_session_key = ctr.openf1_session_key
-                       )
-                   )
+                SELECT bc.openf1_session_key
+                FROM bronze_counts bc
+                LEFT JOIN silver_counts sc ON sc.openf1_session_key = bc.openf1_session_key
+                WHERE bc.samples > COALESCE(sc.samples, 0)
             """)
             sessions = {str(row[0]) for row in cur.fetchall()}
         logger.info(f"Found {len(sessions)} sessions with unprocessed telemetry data")
@@ -224,6 +241,7 @@ def process_sessions(conn, session_keys: List[str], session_id_map: Dict[str, st
             copy_buffer = StringIO()
             skipped_count = 0
             processed_count = 0
+            session_ids = set()
             
             for row in cur.fetchall():
                 openf1_session_key = str(row[0]) if row[0] else None
@@ -277,13 +295,32 @@ def process_sessions(conn, session_keys: List[str], session_id_map: Dict[str, st
                 ]
                 copy_buffer.write('\t'.join(values) + '\n')
                 processed_count += 1
+                session_ids.add(session_id)
             
-            # Use COPY for fast bulk insert
+            # COPY into a per-call staging table, then merge on the (session_id, driver_id, date)
+            # unique key (per partition: (driver_id, date)). DO NOTHING also drops duplicates
+            # within the batch, so re-runs never duplicate samples. Samples already moved to
+            # silver.car_telemetry_packed are invisible to that key, so they are dropped
+            # explicitly (packed dates are truncated to the millisecond)
             inserted_count = 0
             if processed_count > 0:
+                cur.execute("""
+                    CREATE TEMP TABLE car_telemetry_staging (
+                        session_id TEXT NOT NULL,
+                        driver_id TEXT NOT NULL,
+                        date TIMESTAMPTZ NOT NULL,
+                        drs INT,
+                        n_gear INT,
+                        rpm INT,
+                        speed_kph INT,
+                        throttle INT,
+                        brake INT
+                    ) ON COMMIT DROP
+                """)
+                
                 copy_buffer.seek(0)
                 with cur.copy("""
-                    COPY silver.car_telemetry (
+                    COPY car_telemetry_staging (
                         session_id, driver_id, date, drs, n_gear, rpm, speed_kph, throttle, brake
                     ) FROM STDIN
                 """) as copy:
@@ -293,8 +330,32 @@ def process_sessions(conn, session_keys: List[str], session_id_map: Dict[str, st
                             break
                         copy.write(data)
                 
-                inserted_count = processed_count
+                # One partition per session (no-op before the table is partitioned)
+                for session_id in session_ids:
+                    cur.execute("SELECT silver.ensure_session_partition(%s, %s)", ('car_telemetry', session_id))
+                
+                cur.execute("""
+                    INSERT INTO silver.car_telemetry (
+                        session_id, driver_id, date, drs, n_gear, rpm, speed_kph, throttle, brake
+                    )
+                    SELECT st.session_id, st.driver_id, st.date, st.drs, st.n_gear, st.rpm,
+                           st.speed_kph, st.throttle, st.brake
+                    FROM car_telemetry_staging st
+                    WHERE NOT EXISTS (
+                        SELECT 1
+                        FROM silver.car_telemetry_samples cts
+                        WHERE cts.from_packed
+                          AND cts.session_id = st.session_id
+                          AND cts.driver_id = st.driver_id
+                          AND cts.date = date_trunc('milliseconds', st.date)
+                    )
+                    ON CONFLICT DO NOTHING
+                """)
+                inserted_count = cur.rowcount
                 conn.commit()
+                
+                if processed_count > inserted_count:
+                    logger.info(f"  {processed_count - inserted_count:,} records already in silver.car_telemetry (or duplicated in bronze)")
             
             return (inserted_count, skipped_count)
                     
@@ -9,6 +9,8 @@ Handles driver_number conflicts with priority:
 1. session_type: race > qualifying > practice
 2. Most frequent for that driver across sessions in that year
 3. Lowest number
+
+Run refresh_driver_id_by_session.py afterwards to update silver.driver_id_by_session.
 """
 
 import os
@@ -7,8 +7,10 @@ like driver substitutions or stand-ins.
 
 Resolves:
 - session_id from openf1_session_key
-- driver_id from driver_number + openf1_session_key (using driver_id_by_session view)
+- driver_id from driver_number + openf1_session_key (sessions x driver_numbers_by_season)
 - team_id from team_name (using team_alias table)
+
+Run refresh_driver_id_by_session.py afterwards to update silver.driver_id_by_session.
 """
 
 import os
@@ -47,7 +49,10 @@ def get_db_connection():
 
 def get_driver_id_map(conn) -> Dict[Tuple[str, int], str]:
     """
-    Get a mapping of (openf1_session_key, driver_number) -> driver_id from driver_id_by_session view.
+    Get a mapping of (openf1_session_key, driver_number) -> driver_id.
+    
+    Joins sessions and driver numbers directly rather than reading driver_id_by_session,
+    which is only refreshed once these driver teams have been written.
     
     Returns:
         Dictionary mapping (session_key, driver_number) -> driver_id
@@ -56,8 +61,10 @@ def get_driver_id_map(conn) -> Dict[Tuple[str, int], str]:
     try:
         with conn.cursor() as cur:
             cur.execute("""
-                SELECT openf1_session_key, driver_number, driver_id
-                FROM silver.driver_id_by_session
+                SELECT s.openf1_session_key, dns.driver_number, dns.driver_id
+                FROM silver.sessions s
+                INNER JOIN silver.meetings m ON s.meeting_id = m.meeting_id
+                INNER JOIN silver.driver_numbers_by_season dns ON m.season = dns.season
             """)
             for row in cur.fetchall():
                 key = (str(row[0]), row[1])
@@ -183,6 +190,7 @@ def upsert_driver_teams(conn, records: List[Dict],
         )
         ON CONFLICT (session_id, driver_id) DO UPDATE SET
             team_id = EXCLUDED.team_id
+        WHERE silver.driver_teams_by_session.team_id IS DISTINCT FROM EXCLUDED.team_id
     """
     
     upserted_count = 0
@@ -13,6 +13,8 @@ Maps from bronze.drivers_raw:
 Generates driver_id using format: drv:{firstname}-{lastname}
 IMPORTANT: Checks driver_alias table first before generating new driver_id.
 Only upserts existing drivers (no new drivers added).
+
+Run refresh_driver_id_by_session.py afterwards to update silver.driver_id_by_session.
 """
 
 import os
@@ -294,6 +296,12 @@ def upsert_drivers(conn, drivers: List[Dict], alias_map: Dict[str, str], country
             name_acronym = EXCLUDED.name_acronym,
             country_code = EXCLUDED.country_code,
             headshot_url = EXCLUDED.headshot_url
+        WHERE silver.drivers.first_name IS DISTINCT FROM EXCLUDED.first_name
+           OR silver.drivers.last_name IS DISTINCT FROM EXCLUDED.last_name
+           OR silver.drivers.full_name IS DISTINCT FROM EXCLUDED.full_name
+           OR silver.drivers.name_acronym IS DISTINCT FROM EXCLUDED.name_acronym
+           OR silver.drivers.country_code IS DISTINCT FROM EXCLUDED.country_code
+           OR silver.drivers.headshot_url IS DISTINCT FROM EXCLUDED.headshot_url
     """
     
     try:
@@ -383,7 +391,10 @@ def upsert_drivers(conn, drivers: List[Dict], alias_map: Dict[str, str], country
 
 def get_driver_id_map_for_teams(conn) -> Dict[Tuple[str, int], str]:
     """
-    Get a mapping of (openf1_session_key, driver_number) -> driver_id from driver_id_by_session view.
+    Get a mapping of (openf1_session_key, driver_number) -> driver_id.
+    
+    Joins sessions and driver numbers directly rather than reading driver_id_by_session,
+    which is only refreshed once these driver teams have been written.
     
     Returns:
         Dictionary mapping (session_key, driver_number) -> driver_id
@@ -392,8 +403,10 @@ def get_driver_id_map_for_teams(conn) -> Dict[Tuple[str, int], str]:
     try:
         with conn.cursor() as cur:
             cur.execute("""
-                SELECT openf1_session_key, driver_number, driver_id
-                FROM silver.driver_id_by_session
+                SELECT s.openf1_session_key, dns.driver_number, dns.driver_id
+                FROM silver.sessions s
+                INNER JOIN silver.meetings m ON s.meeting_id = m.meeting_id
+                INNER JOIN silver.driver_numbers_by_season dns ON m.season = dns.season
             """)
             for row in cur.fetchall():
                 key = (str(row[0]), row[1])
@@ -508,6 +521,7 @@ def upsert_driver_teams_by_session(conn, driver_id_map: Dict[Tuple[str, int], st
                 )
                 ON CONFLICT (session_id, driver_id) DO UPDATE SET
                     team_id = EXCLUDED.team_id
+                WHERE silver.driver_teams_by_session.team_id IS DISTINCT FROM EXCLUDED.team_id
             """
             
             inserts_data = []
@@ -103,9 +103,12 @@ def get_driver_id_map(conn) -> Dict[Tuple[str, int], str]:
     return driver_id_map
 
 
-def get_intervals_from_bronze(conn) -> List[Dict]:
+def get_intervals_from_bronze(conn, session_keys: Optional[List[str]] = None) -> List[Dict]:
     """
     Get interval records from bronze.intervals_raw with resolved session_id.
+    
+    Args:
+        session_keys: Only read these openf1_session_keys (all sessions if None)
     """
     try:
         with conn.cursor() as cur:
@@ -121,10 +124,12 @@ def get_intervals_from_bronze(conn) -> List[Dict]:
                 INNER JOIN silver.sessions s 
                     ON ir.openf1_session_key = s.openf1_session_key
                 WHERE ir.openf1_session_key IS NOT NULL
+                  AND (%(session_keys)s::text[] IS NULL
+                       OR ir.openf1_session_key = ANY(%(session_keys)s::text[]))
                   AND ir.driver_number IS NOT NULL
                   AND ir.date IS NOT NULL
                 ORDER BY ir.date
-            """)
+            """, {'session_keys': session_keys})
             
             records = []
             for row in cur.fetchall():
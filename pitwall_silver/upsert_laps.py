@@ -202,13 +202,16 @@ def convert_seconds_to_ms(seconds_str: Optional[str]) -> Optional[int]:
         return None
 
 
-def get_laps_from_bronze(conn) -> List[Dict]:
+def get_laps_from_bronze(conn, session_keys: Optional[List[str]] = None) -> List[Dict]:
     """
     Get lap records from bronze.laps_raw with resolved session_id and driver_id.
     
     Joins through sessions to get session_id and season, then through driver_numbers_by_season
     to get driver_id.
     
+    Args:
+        session_keys: Only read these openf1_session_keys (all sessions if None)
+    
     Returns:
         List of lap dictionaries with resolved session_id and driver_id
     """
@@ -243,11 +246,13 @@ def get_laps_from_bronze(conn) -> List[Dict]:
                     ON CAST(lr.driver_number AS INT) = dns.driver_number
                     AND m.season = dns.season
                 WHERE lr.openf1_session_key IS NOT NULL
+                  AND (%(session_keys)s::text[] IS NULL
+                       OR lr.openf1_session_key = ANY(%(session_keys)s::text[]))
                   AND lr.driver_number IS NOT NULL
                   AND lr.lap_number IS NOT NULL
                   AND lr.date_start IS NOT NULL
                 ORDER BY lr.date_start
-            """)
+            """, {'session_keys': session_keys})
             
             laps = []
             for row in cur.fetchall():
@@ -91,9 +91,12 @@ def get_driver_id_map(conn) -> Dict[Tuple[str, int], str]:
     return driver_id_map
 
 
-def get_overtakes_from_bronze(conn) -> List[Dict]:
+def get_overtakes_from_bronze(conn, session_keys: Optional[List[str]] = None) -> List[Dict]:
     """
     Get overtake records from bronze.overtakes_raw with resolved session_id.
+    
+    Args:
+        session_keys: Only read these openf1_session_keys (all sessions if None)
     """
     try:
         with conn.cursor() as cur:
@@ -109,11 +112,13 @@ def get_overtakes_from_bronze(conn) -> List[Dict]:
                 INNER JOIN silver.sessions s 
                     ON or_.openf1_session_key = s.openf1_session_key
                 WHERE or_.openf1_session_key IS NOT NULL
+                  AND (%(session_keys)s::text[] IS NULL
+                       OR or_.openf1_session_key = ANY(%(session_keys)s::text[]))
                   AND or_.overtaking_driver_number IS NOT NULL
                   AND or_.position IS NOT NULL
                   AND or_.date IS NOT NULL
                 ORDER BY or_.date
-            """)
+            """, {'session_keys': session_keys})
             
             records = []
             for row in cur.fetchall():
@@ -11,6 +11,10 @@ Maps from bronze.pit_stops_raw with conversions:
 - pit_duration_s → pit_duration_ms (convert seconds to milliseconds)
 
 Resolves lap_id by joining laps on (session_id, driver_id, lap_number).
+
+Records are staged with COPY and merged with a single INSERT ... ON CONFLICT
+on the natural key (session_id, driver_id, date, lap_number), see
+init-db/17-add-pit-stops-stints-natural-keys.sql.
 """
 
 import os
@@ -105,33 +109,12 @@ def get_driver_id_map(conn) -> Dict[Tuple[str, int], str]:
     return driver_id_map
 
 
-def get_lap_id_map(conn) -> Dict[Tuple[str, str, int], int]:
-    """
-    Get a mapping of (session_id, driver_id, lap_number) -> lap_id from laps table.
-    
-    Returns:
-        Dictionary mapping (session_id, driver_id, lap_number) -> lap_id
-    """
-    lap_id_map = {}
-    try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT session_id, driver_id, lap_number, lap_id
-                FROM silver.laps
-            """)
-            for row in cur.fetchall():
-                key = (row[0], row[1], row[2])
-                lap_id_map[key] = row[3]
-        logger.info(f"Loaded {len(lap_id_map)} lap_id mappings")
-    except psycopg.Error as e:
-        logger.error(f"Failed to fetch lap_id mappings: {e}")
-        raise
-    return lap_id_map
-
-
-def get_pit_stops_from_bronze(conn) -> List[Dict]:
+def get_pit_stops_from_bronze(conn, session_keys: Optional[List[str]] = None) -> List[Dict]:
     """
     Get pit stop records from bronze.pit_stops_raw with resolved session_id.
+    
+    Args:
+        session_keys: Only read these openf1_session_keys (all sessions if None)
     """
     try:
         with conn.cursor() as cur:
@@ -147,11 +130,13 @@ def get_pit_stops_from_bronze(conn) -> List[Dict]:
                 INNER JOIN silver.sessions s 
                     ON psr.openf1_session_key = s.openf1_session_key
                 WHERE psr.openf1_session_key IS NOT NULL
+                  AND (%(session_keys)s::text[] IS NULL
+                       OR psr.openf1_session_key = ANY(%(session_keys)s::text[]))
                   AND psr.driver_number IS NOT NULL
                   AND psr.date IS NOT NULL
                   AND psr.lap_number IS NOT NULL
                 ORDER BY psr.date
-            """)
+            """, {'session_keys': session_keys})
             
             records = []
             for row in cur.fetchall():
@@ -171,42 +156,20 @@ def get_pit_stops_from_bronze(conn) -> List[Dict]:
         raise
 
 
-def check_existing_record(conn, session_id: str, driver_id: str, date: datetime, lap_number: int) -> Optional[int]:
-    """
-    Check if a record with matching key already exists.
-    
-    Returns:
-        pit_stop_id if found, None otherwise
-    """
-    try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT pit_stop_id
-                FROM silver.pit_stops
-                WHERE session_id = %s
-                  AND driver_id = %s
-                  AND date = %s
-                  AND lap_number = %s
-                LIMIT 1
-            """, (session_id, driver_id, date, lap_number))
-            row = cur.fetchone()
-            if row:
-                return row[0]
-    except psycopg.Error as e:
-        logger.warning(f"Failed to check existing record: {e}")
-    
-    return None
-
-
-def upsert_pit_stops(conn, records: List[Dict], driver_id_map: Dict[Tuple[str, int], str], lap_id_map: Dict[Tuple[str, str, int], int]) -> int:
+def upsert_pit_stops(conn, records: List[Dict], driver_id_map: Dict[Tuple[str, int], str]) -> int:
     """
     Upsert pit stop records into silver.pit_stops table.
+
+    Parsed records are COPY'd into a temp staging table and merged with a single
+    INSERT ... ON CONFLICT on the (session_id, driver_id, date, lap_number) natural key.
+    lap_id is resolved in the same statement by joining silver.laps, so the whole
+    merge takes a constant number of round trips regardless of row count.
     """
     if not records:
         logger.warning("No pit stop records to upsert")
         return 0
     
-    insert_sql = """
+    merge_sql = """
         INSERT INTO silver.pit_stops (
             session_id,
             driver_id,
@@ -214,130 +177,115 @@ def upsert_pit_stops(conn, records: List[Dict], driver_id_map: Dict[Tuple[str, i
             lap_number,
             lap_id,
             pit_duration_ms
-        ) VALUES (
-            %s, %s, %s, %s, %s, %s
         )
+        SELECT DISTINCT ON (st.session_id, st.driver_id, st.date, st.lap_number)
+            st.session_id,
+            st.driver_id,
+            st.date,
+            st.lap_number,
+            l.lap_id,
+            st.pit_duration_ms
+        FROM pit_stops_staging st
+        INNER JOIN silver.laps l
+            ON l.session_id = st.session_id
+            AND l.driver_id = st.driver_id
+            AND l.lap_number = st.lap_number
+        ORDER BY st.session_id, st.driver_id, st.date, st.lap_number
+        ON CONFLICT (session_id, driver_id, date, lap_number) DO UPDATE SET
+            pit_duration_ms = EXCLUDED.pit_duration_ms,
+            lap_id = EXCLUDED.lap_id
+        WHERE silver.pit_stops.pit_duration_ms IS DISTINCT FROM EXCLUDED.pit_duration_ms
+           OR silver.pit_stops.lap_id IS DISTINCT FROM EXCLUDED.lap_id
     """
     
-    update_sql = """
-        UPDATE silver.pit_stops
-        SET
-            pit_duration_ms = %s,
-            lap_id = %s
-        WHERE pit_stop_id = %s
-    """
-    
-    inserted_count = 0
-    updated_count = 0
     skipped_count = 0
-    batch_size = 1000
-
+    staging_rows = []
+    
+    for record in records:
+        # Parse data types
+        date_parsed = parse_timestamp(record['date'])
+        if not date_parsed:
+            logger.warning(f"Skipping record due to invalid date: {record.get('date')}")
+            skipped_count += 1
+            continue
+        
+        lap_number_parsed = parse_int(record['lap_number'])
+        if lap_number_parsed is None:
+            logger.warning(f"Skipping record due to invalid lap_number: {record.get('lap_number')}")
+            skipped_count += 1
+            continue
+        
+        driver_number_parsed = parse_int(record['driver_number'])
+        if driver_number_parsed is None:
+            logger.warning(f"Skipping record due to invalid driver_number: {record.get('driver_number')}")
+            skipped_count += 1
+            continue
+        
+        # Resolve driver_id using pre-loaded map
+        driver_id_key = (record['openf1_session_key'], driver_number_parsed)
+        driver_id = driver_id_map.get(driver_id_key)
+        if not driver_id:
+            logger.debug(f"Skipping record due to unresolved driver_id for session {record.get('openf1_session_key')}, driver {driver_number_parsed}")
+            skipped_count += 1
+            continue
+        
+        # Convert pit_duration from seconds to milliseconds
+        pit_duration_ms = convert_seconds_to_ms(record['pit_duration_s'])
+        
+        staging_rows.append((
+            record['session_id'],
+            driver_id,
+            date_parsed,
+            lap_number_parsed,
+            pit_duration_ms
+        ))
+    
     try:
         with conn.cursor() as cur:
-            # Pre-fetch existing records for deduplication
-            logger.info("Checking for existing records...")
-            existing_records = {}
             cur.execute("""
-                SELECT session_id, driver_id, date, lap_number, pit_stop_id
-                FROM silver.pit_stops
+                CREATE TEMP TABLE pit_stops_staging (
+                    session_id TEXT NOT NULL,
+                    driver_id TEXT NOT NULL,
+                    date TIMESTAMPTZ NOT NULL,
+                    lap_number INT NOT NULL,
+                    pit_duration_ms INT
+                ) ON COMMIT DROP
             """)
-            for row in cur.fetchall():
-                key = (row[0], row[1], row[2], row[3])
-                existing_records[key] = row[4]
             
-            logger.info(f"Found {len(existing_records)} existing pit stop records")
+            logger.info(f"Staging {len(staging_rows)} parsed pit stop records...")
+            with cur.copy("""
+                COPY pit_stops_staging (session_id, driver_id, date, lap_number, pit_duration_ms)
+                FROM STDIN
+            """) as copy:
+                for row in staging_rows:
+                    copy.write_row(row)
             
-            inserts_data = []
-            updates_data = []
-            
-            for record in records:
-                # Parse data types
-                date_parsed = parse_timestamp(record['date'])
-                if not date_parsed:
-                    logger.warning(f"Skipping record due to invalid date: {record.get('date')}")
-                    skipped_count += 1
-                    continue
-                
-                lap_number_parsed = parse_int(record['lap_number'])
-                if lap_number_parsed is None:
-                    logger.warning(f"Skipping record due to invalid lap_number: {record.get('lap_number')}")
-                    skipped_count += 1
-                    continue
-                
-                driver_number_parsed = parse_int(record['driver_number'])
-                if driver_number_parsed is None:
-                    logger.warning(f"Skipping record due to invalid driver_number: {record.get('driver_number')}")
-                    skipped_count += 1
-                    continue
-                
-                # Resolve driver_id using pre-loaded map
-                driver_id_key = (record['openf1_session_key'], driver_number_parsed)
-                driver_id = driver_id_map.get(driver_id_key)
-                if not driver_id:
-                    logger.debug(f"Skipping record due to unresolved driver_id for session {record.get('openf1_session_key')}, driver {driver_number_parsed}")
-                    skipped_count += 1
-                    continue
-                
-                # Convert pit_duration from seconds to milliseconds
-                pit_duration_ms = convert_seconds_to_ms(record['pit_duration_s'])
-                
-                # Resolve lap_id using pre-loaded map
-                lap_id_key = (record['session_id'], driver_id, lap_number_parsed)
-                lap_id = lap_id_map.get(lap_id_key)
-                if not lap_id:
-                    logger.debug(f"Skipping record due to unresolved lap_id for session {record.get('session_id')}, driver {driver_id}, lap {lap_number_parsed}")
-                    skipped_count += 1
-                    continue
-                
-                # Check for existing record (deduplication)
-                dedup_key = (
-                    record['session_id'],
-                    driver_id,
-                    date_parsed,
-                    lap_number_parsed
+            # Rows whose lap does not exist (yet) in silver.laps cannot be merged
+            cur.execute("""
+                SELECT COUNT(*)
+                FROM pit_stops_staging st
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM silver.laps l
+                    WHERE l.session_id = st.session_id
+                      AND l.driver_id = st.driver_id
+                      AND l.lap_number = st.lap_number
                 )
-                
-                existing_pit_stop_id = existing_records.get(dedup_key)
-                
-                if existing_pit_stop_id:
-                    # Update existing record
-                    updates_data.append((
-                        pit_duration_ms,
-                        lap_id,
-                        existing_pit_stop_id
-                    ))
-                else:
-                    # Insert new record
-                    inserts_data.append((
-                        record['session_id'],
-                        driver_id,
-                        date_parsed,
-                        lap_number_parsed,
-                        lap_id,
-                        pit_duration_ms
-                    ))
-            
-            logger.info(f"Will insert {len(inserts_data)} new records and update {len(updates_data)} existing records")
-            
-            # Perform batch inserts
-            if inserts_data:
-                logger.info("Inserting new pit stop records...")
-                cur.executemany(insert_sql, inserts_data)
-                inserted_count = len(inserts_data)
-                logger.info(f"  Inserted {inserted_count} records")
+            """)
+            unresolved_laps = cur.fetchone()[0]
+            if unresolved_laps > 0:
+                logger.debug(f"{unresolved_laps} staged records have no matching lap_id")
+                skipped_count += unresolved_laps
             
-            # Perform batch updates
-            if updates_data:
-                logger.info("Updating existing pit stop records...")
-                cur.executemany(update_sql, updates_data)
-                updated_count = len(updates_data)
-                logger.info(f"  Updated {updated_count} records")
+            logger.info("Merging staged pit stops into silver.pit_stops...")
+            cur.execute(merge_sql)
+            upserted_count = cur.rowcount
             
             conn.commit()
-            logger.info(f"Successfully upserted {inserted_count + updated_count} pit stop records into silver.pit_stops")
+            logger.info(f"Successfully upserted {upserted_count} pit stop records into silver.pit_stops "
+                        f"({len(staging_rows) - unresolved_laps - upserted_count} unchanged)")
             if skipped_count > 0:
                 logger.warning(f"Skipped {skipped_count} records due to validation issues")
-            return inserted_count + updated_count
+            return upserted_count
                     
     except psycopg.Error as e:
         conn.rollback()
@@ -352,13 +300,10 @@ def main():
     conn = get_db_connection()
     
     try:
-        # Load driver_id and lap_id mappings
+        # Load driver_id mappings (lap_id is resolved in SQL during the merge)
         logger.info("Loading driver_id mappings...")
         driver_id_map = get_driver_id_map(conn)
         
-        logger.info("Loading lap_id mappings...")
-        lap_id_map = get_lap_id_map(conn)
-        
         # Get pit stop records from bronze with resolved session_id
         logger.info("Fetching pit stop records from bronze.pit_stops_raw with resolved session_id...")
         records = get_pit_stops_from_bronze(conn)
@@ -369,7 +314,7 @@ def main():
         
         # Upsert pit stops
         logger.info("Upserting pit stop records into silver.pit_stops...")
-        upserted = upsert_pit_stops(conn, records, driver_id_map, lap_id_map)
+        upserted = upsert_pit_stops(conn, records, driver_id_map)
         
         logger.info("="*60)
         logger.info("PIT STOPS UPSERT COMPLETE")
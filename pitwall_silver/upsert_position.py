@@ -91,9 +91,12 @@ def get_driver_id_map(conn) -> Dict[Tuple[str, int], str]:
     return driver_id_map
 
 
-def get_positions_from_bronze(conn) -> List[Dict]:
+def get_positions_from_bronze(conn, session_keys: Optional[List[str]] = None) -> List[Dict]:
     """
     Get position records from bronze.position_raw with resolved session_id.
+    
+    Args:
+        session_keys: Only read these openf1_session_keys (all sessions if None)
     """
     try:
         with conn.cursor() as cur:
@@ -108,10 +111,12 @@ def get_positions_from_bronze(conn) -> List[Dict]:
                 INNER JOIN silver.sessions s 
                     ON pr.openf1_session_key = s.openf1_session_key
                 WHERE pr.openf1_session_key IS NOT NULL
+                  AND (%(session_keys)s::text[] IS NULL
+                       OR pr.openf1_session_key = ANY(%(session_keys)s::text[]))
                   AND pr.driver_number IS NOT NULL
                   AND pr.date IS NOT NULL
                 ORDER BY pr.date
-            """)
+            """, {'session_keys': session_keys})
             
             records = []
             for row in cur.fetchall():
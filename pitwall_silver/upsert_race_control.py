@@ -211,9 +211,12 @@ def resolve_referenced_lap_id(conn, session_id: Optional[str], driver_id: Option
     return None
 
 
-def get_race_control_from_bronze(conn) -> List[Dict]:
+def get_race_control_from_bronze(conn, session_keys: Optional[List[str]] = None) -> List[Dict]:
     """
     Get race control records from bronze.race_control_raw with resolved session_id.
+    
+    Args:
+        session_keys: Only read these openf1_session_keys (all sessions if None)
     """
     try:
         with conn.cursor() as cur:
@@ -232,10 +235,12 @@ def get_race_control_from_bronze(conn) -> List[Dict]:
                 INNER JOIN silver.sessions s 
                     ON rcr.openf1_session_key = s.openf1_session_key
                 WHERE rcr.openf1_session_key IS NOT NULL
+                  AND (%(session_keys)s::text[] IS NULL
+                       OR rcr.openf1_session_key = ANY(%(session_keys)s::text[]))
                   AND rcr.category IS NOT NULL
                   AND rcr.date IS NOT NULL
                 ORDER BY rcr.date
-            """)
+            """, {'session_keys': session_keys})
             
             records = []
             for row in cur.fetchall():
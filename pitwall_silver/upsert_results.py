@@ -286,9 +286,12 @@ def get_fastest_lap_map(conn) -> Dict[str, Optional[int]]:
     return fastest_lap_map
 
 
-def get_results_from_bronze(conn) -> List[Dict]:
+def get_results_from_bronze(conn, session_keys: Optional[List[str]] = None) -> List[Dict]:
     """
     Get results records from bronze.results_raw with resolved session_id.
+    
+    Args:
+        session_keys: Only read these openf1_session_keys (all sessions if None)
     """
     try:
         with conn.cursor() as cur:
@@ -308,9 +311,11 @@ def get_results_from_bronze(conn) -> List[Dict]:
                 INNER JOIN silver.sessions s 
                     ON rr.openf1_session_key = s.openf1_session_key
                 WHERE rr.openf1_session_key IS NOT NULL
+                  AND (%(session_keys)s::text[] IS NULL
+                       OR rr.openf1_session_key = ANY(%(session_keys)s::text[]))
                   AND rr.driver_number IS NOT NULL
                 ORDER BY s.session_id, rr.position
-            """)
+            """, {'session_keys': session_keys})
             
             records = []
             for row in cur.fetchall():
@@ -371,6 +376,15 @@ def upsert_results(conn, records: List[Dict], driver_id_map: Dict[Tuple[str, int
             fastest_lap = EXCLUDED.fastest_lap,
             grid_position = EXCLUDED.grid_position,
             quali_lap_ms = EXCLUDED.quali_lap_ms
+        WHERE silver.results.finish_position IS DISTINCT FROM EXCLUDED.finish_position
+           OR silver.results.gap_to_leader_ms IS DISTINCT FROM EXCLUDED.gap_to_leader_ms
+           OR silver.results.duration_ms IS DISTINCT FROM EXCLUDED.duration_ms
+           OR silver.results.laps_completed IS DISTINCT FROM EXCLUDED.laps_completed
+           OR silver.results.status IS DISTINCT FROM EXCLUDED.status
+           OR silver.results.best_lap_ms IS DISTINCT FROM EXCLUDED.best_lap_ms
+           OR silver.results.fastest_lap IS DISTINCT FROM EXCLUDED.fastest_lap
+           OR silver.results.grid_position IS DISTINCT FROM EXCLUDED.grid_position
+           OR silver.results.quali_lap_ms IS DISTINCT FROM EXCLUDED.quali_lap_ms
     """
     
     upserted_count = 0
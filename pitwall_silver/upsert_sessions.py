@@ -13,6 +13,8 @@ Generates session_id using format: ses:{circuit_short_name}-{season}-{session_ty
 Derives session_type and points_awarding from session_name
 Derives scheduled_laps from circuits (race_laps or sprint_laps)
 Derives duration_min from start_time and end_time
+
+Run refresh_driver_id_by_session.py afterwards to update silver.driver_id_by_session.
 """
 
 import os
@@ -375,6 +377,15 @@ def upsert_sessions(conn, sessions: List[Dict], meeting_info_map: Dict[str, Dict
             scheduled_laps = EXCLUDED.scheduled_laps,
             points_awarding = EXCLUDED.points_awarding,
             duration_min = EXCLUDED.duration_min
+        WHERE silver.sessions.meeting_id IS DISTINCT FROM EXCLUDED.meeting_id
+           OR silver.sessions.openf1_session_key IS DISTINCT FROM EXCLUDED.openf1_session_key
+           OR silver.sessions.start_time IS DISTINCT FROM EXCLUDED.start_time
+           OR silver.sessions.end_time IS DISTINCT FROM EXCLUDED.end_time
+           OR silver.sessions.session_name IS DISTINCT FROM EXCLUDED.session_name
+           OR silver.sessions.session_type IS DISTINCT FROM EXCLUDED.session_type
+           OR silver.sessions.scheduled_laps IS DISTINCT FROM EXCLUDED.scheduled_laps
+           OR silver.sessions.points_awarding IS DISTINCT FROM EXCLUDED.points_awarding
+           OR silver.sessions.duration_min IS DISTINCT FROM EXCLUDED.duration_min
     """
     
     try:
@@ -13,6 +13,10 @@ Maps from bronze.stints_raw with conversions:
 - stint_number → stint_number (text to int, nullable)
 
 Resolves lap_start_id and lap_end_id by joining laps on (session_id, driver_id, lap_number).
+
+Records are staged with COPY and merged with a single INSERT ... ON CONFLICT
+on the natural key (session_id, driver_id, lap_start), see
+init-db/17-add-pit-stops-stints-natural-keys.sql.
 """
 
 import os
@@ -115,33 +119,12 @@ def get_driver_id_map(conn) -> Dict[Tuple[str, int], str]:
     return driver_id_map
 
 
-def get_lap_id_map(conn) -> Dict[Tuple[str, str, int], int]:
-    """
-    Get a mapping of (session_id, driver_id, lap_number) -> lap_id from laps table.
-    
-    Returns:
-        Dictionary mapping (session_id, driver_id, lap_number) -> lap_id
-    """
-    lap_id_map = {}
-    try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT session_id, driver_id, lap_number, lap_id
-                FROM silver.laps
-            """)
-            for row in cur.fetchall():
-                key = (row[0], row[1], row[2])
-                lap_id_map[key] = row[3]
-        logger.info(f"Loaded {len(lap_id_map)} lap_id mappings")
-    except psycopg.Error as e:
-        logger.error(f"Failed to fetch lap_id mappings: {e}")
-        raise
-    return lap_id_map
-
-
-def get_stints_from_bronze(conn) -> List[Dict]:
+def get_stints_from_bronze(conn, session_keys: Optional[List[str]] = None) -> List[Dict]:
     """
     Get stint records from bronze.stints_raw with resolved session_id.
+    
+    Args:
+        session_keys: Only read these openf1_session_keys (all sessions if None)
     """
     try:
         with conn.cursor() as cur:
@@ -159,10 +142,12 @@ def get_stints_from_bronze(conn) -> List[Dict]:
                 INNER JOIN silver.sessions s 
                     ON sr.openf1_session_key = s.openf1_session_key
                 WHERE sr.openf1_session_key IS NOT NULL
+                  AND (%(session_keys)s::text[] IS NULL
+                       OR sr.openf1_session_key = ANY(%(session_keys)s::text[]))
                   AND sr.driver_number IS NOT NULL
                   AND sr.lap_start IS NOT NULL
                 ORDER BY sr.openf1_session_key, sr.driver_number, sr.lap_start
-            """)
+            """, {'session_keys': session_keys})
             
             records = []
             for row in cur.fetchall():
@@ -184,15 +169,20 @@ def get_stints_from_bronze(conn) -> List[Dict]:
         raise
 
 
-def upsert_stints(conn, records: List[Dict], driver_id_map: Dict[Tuple[str, int], str], lap_id_map: Dict[Tuple[str, str, int], int]) -> int:
+def upsert_stints(conn, records: List[Dict], driver_id_map: Dict[Tuple[str, int], str]) -> int:
     """
     Upsert stint records into silver.stints table.
+
+    Parsed records are COPY'd into a temp staging table and merged with a single
+    INSERT ... ON CONFLICT on the (session_id, driver_id, lap_start) natural key.
+    lap_start_id and lap_end_id are resolved in the same statement by joining
+    silver.laps, so the whole merge takes a constant number of round trips.
     """
     if not records:
         logger.warning("No stint records to upsert")
         return 0
     
-    insert_sql = """
+    merge_sql = """
         INSERT INTO silver.stints (
             session_id,
             driver_id,
@@ -203,143 +193,133 @@ def upsert_stints(conn, records: List[Dict], driver_id_map: Dict[Tuple[str, int]
             tyre_age_at_start,
             tyre_compound,
             stint_number
-        ) VALUES (
-            %s, %s, %s, %s, %s, %s, %s, %s, %s
         )
+        SELECT DISTINCT ON (st.session_id, st.driver_id, st.lap_start)
+            st.session_id,
+            st.driver_id,
+            st.lap_start,
+            ls.lap_id,
+            st.lap_end,
+            le.lap_id,
+            st.tyre_age_at_start,
+            st.tyre_compound::silver.tyre_compound_enum,
+            st.stint_number
+        FROM stints_staging st
+        INNER JOIN silver.laps ls
+            ON ls.session_id = st.session_id
+            AND ls.driver_id = st.driver_id
+            AND ls.lap_number = st.lap_start
+        -- lap_end_id can be NULL even if lap_end is provided (lap might not exist)
+        LEFT JOIN silver.laps le
+            ON le.session_id = st.session_id
+            AND le.driver_id = st.driver_id
+            AND le.lap_number = st.lap_end
+        ORDER BY st.session_id, st.driver_id, st.lap_start
+        ON CONFLICT (session_id, driver_id, lap_start) DO UPDATE SET
+            lap_end = EXCLUDED.lap_end,
+            lap_end_id = EXCLUDED.lap_end_id,
+            tyre_age_at_start = EXCLUDED.tyre_age_at_start,
+            tyre_compound = EXCLUDED.tyre_compound,
+            stint_number = EXCLUDED.stint_number
+        WHERE (silver.stints.lap_end, silver.stints.lap_end_id, silver.stints.tyre_age_at_start,
+               silver.stints.tyre_compound, silver.stints.stint_number)
+              IS DISTINCT FROM
+              (EXCLUDED.lap_end, EXCLUDED.lap_end_id, EXCLUDED.tyre_age_at_start,
+               EXCLUDED.tyre_compound, EXCLUDED.stint_number)
     """
     
-    update_sql = """
-        UPDATE silver.stints
-        SET
-            lap_end = %s,
-            lap_end_id = %s,
-            tyre_age_at_start = %s,
-            tyre_compound = %s,
-            stint_number = %s
-        WHERE stint_id = %s
-    """
-    
-    inserted_count = 0
-    updated_count = 0
     skipped_count = 0
-    batch_size = 1000
-
+    staging_rows = []
+    
+    for record in records:
+        # Parse data types
+        lap_start_parsed = parse_int(record['lap_start'])
+        if lap_start_parsed is None:
+            logger.warning(f"Skipping record due to invalid lap_start: {record.get('lap_start')}")
+            skipped_count += 1
+            continue
+        
+        lap_end_parsed = parse_int(record['lap_end'])
+        tyre_age_at_start_parsed = parse_int(record['tyre_age_at_start'])
+        stint_number_parsed = parse_int(record['stint_number'])
+        
+        # Normalize tyre compound
+        tyre_compound = normalize_tyre_compound(record['compound'])
+        
+        driver_number_parsed = parse_int(record['driver_number'])
+        if driver_number_parsed is None:
+            logger.warning(f"Skipping record due to invalid driver_number: {record.get('driver_number')}")
+            skipped_count += 1
+            continue
+        
+        # Resolve driver_id using pre-loaded map
+        driver_id_key = (record['openf1_session_key'], driver_number_parsed)
+        driver_id = driver_id_map.get(driver_id_key)
+        if not driver_id:
+            logger.debug(f"Skipping record due to unresolved driver_id for session {record.get('openf1_session_key')}, driver {driver_number_parsed}")
+            skipped_count += 1
+            continue
+        
+        staging_rows.append((
+            record['session_id'],
+            driver_id,
+            lap_start_parsed,
+            lap_end_parsed,
+            tyre_age_at_start_parsed,
+            tyre_compound,
+            stint_number_parsed
+        ))
+    
     try:
         with conn.cursor() as cur:
-            # Pre-fetch existing records for deduplication
-            logger.info("Checking for existing records...")
-            existing_records = {}
             cur.execute("""
-                SELECT session_id, driver_id, lap_start, stint_id
-                FROM silver.stints
+                CREATE TEMP TABLE stints_staging (
+                    session_id TEXT NOT NULL,
+                    driver_id TEXT NOT NULL,
+                    lap_start INT NOT NULL,
+                    lap_end INT,
+                    tyre_age_at_start INT,
+                    tyre_compound TEXT,
+                    stint_number INT
+                ) ON COMMIT DROP
             """)
-            for row in cur.fetchall():
-                key = (row[0], row[1], row[2])
-                existing_records[key] = row[3]
             
-            logger.info(f"Found {len(existing_records)} existing stint records")
+            logger.info(f"Staging {len(staging_rows)} parsed stint records...")
+            with cur.copy("""
+                COPY stints_staging (
+                    session_id, driver_id, lap_start, lap_end,
+                    tyre_age_at_start, tyre_compound, stint_number
+                ) FROM STDIN
+            """) as copy:
+                for row in staging_rows:
+                    copy.write_row(row)
             
-            inserts_data = []
-            updates_data = []
-            
-            for record in records:
-                # Parse data types
-                lap_start_parsed = parse_int(record['lap_start'])
-                if lap_start_parsed is None:
-                    logger.warning(f"Skipping record due to invalid lap_start: {record.get('lap_start')}")
-                    skipped_count += 1
-                    continue
-                
-                lap_end_parsed = parse_int(record['lap_end'])
-                tyre_age_at_start_parsed = parse_int(record['tyre_age_at_start'])
-                stint_number_parsed = parse_int(record['stint_number'])
-                
-                # Normalize tyre compound
-                tyre_compound = normalize_tyre_compound(record['compound'])
-                
-                driver_number_parsed = parse_int(record['driver_number'])
-                if driver_number_parsed is None:
-                    logger.warning(f"Skipping record due to invalid driver_number: {record.get('driver_number')}")
-                    skipped_count += 1
-                    continue
-                
-                # Resolve driver_id using pre-loaded map
-                driver_id_key = (record['openf1_session_key'], driver_number_parsed)
-                driver_id = driver_id_map.get(driver_id_key)
-                if not driver_id:
-                    logger.debug(f"Skipping record due to unresolved driver_id for session {record.get('openf1_session_key')}, driver {driver_number_parsed}")
-                    skipped_count += 1
-                    continue
-                
-                # Resolve lap_start_id using pre-loaded map
-                lap_start_id_key = (record['session_id'], driver_id, lap_start_parsed)
-                lap_start_id = lap_id_map.get(lap_start_id_key)
-                if not lap_start_id:
-                    logger.debug(f"Skipping record due to unresolved lap_start_id for session {record.get('session_id')}, driver {driver_id}, lap {lap_start_parsed}")
-                    skipped_count += 1
-                    continue
-                
-                # Resolve lap_end_id if lap_end is not null
-                lap_end_id = None
-                if lap_end_parsed is not None:
-                    lap_end_id_key = (record['session_id'], driver_id, lap_end_parsed)
-                    lap_end_id = lap_id_map.get(lap_end_id_key)
-                    # Note: lap_end_id can be None even if lap_end is provided (lap might not exist)
-                
-                # Check for existing record (deduplication on session_id, driver_id, lap_start)
-                dedup_key = (
-                    record['session_id'],
-                    driver_id,
-                    lap_start_parsed
+            # Rows whose starting lap does not exist (yet) in silver.laps cannot be merged
+            cur.execute("""
+                SELECT COUNT(*)
+                FROM stints_staging st
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM silver.laps l
+                    WHERE l.session_id = st.session_id
+                      AND l.driver_id = st.driver_id
+                      AND l.lap_number = st.lap_start
                 )
-                
-                existing_stint_id = existing_records.get(dedup_key)
-                
-                if existing_stint_id:
-                    # Update existing record
-                    updates_data.append((
-                        lap_end_parsed,
-                        lap_end_id,
-                        tyre_age_at_start_parsed,
-                        tyre_compound,
-                        stint_number_parsed,
-                        existing_stint_id
-                    ))
-                else:
-                    # Insert new record
-                    inserts_data.append((
-                        record['session_id'],
-                        driver_id,
-                        lap_start_parsed,
-                        lap_start_id,
-                        lap_end_parsed,
-                        lap_end_id,
-                        tyre_age_at_start_parsed,
-                        tyre_compound,
-                        stint_number_parsed
-                    ))
-            
-            logger.info(f"Will insert {len(inserts_data)} new records and update {len(updates_data)} existing records")
-            
-            # Perform batch inserts
-            if inserts_data:
-                logger.info("Inserting new stint records...")
-                cur.executemany(insert_sql, inserts_data)
-                inserted_count = len(inserts_data)
-                logger.info(f"  Inserted {inserted_count} records")
+            """)
+            unresolved_laps = cur.fetchone()[0]
+            if unresolved_laps > 0:
+                logger.debug(f"{unresolved_laps} staged records have no matching lap_start_id")
+                skipped_count += unresolved_laps
             
-            # Perform batch updates
-            if updates_data:
-                logger.info("Updating existing stint records...")
-                cur.executemany(update_sql, updates_data)
-                updated_count = len(updates_data)
-                logger.info(f"  Updated {updated_count} records")
+            logger.info("Merging staged stints into silver.stints...")
+            cur.execute(merge_sql)
+            upserted_count = cur.rowcount
             
             conn.commit()
-            logger.info(f"Successfully upserted {inserted_count + updated_count} stint records into silver.stints")
+            logger.info(f"Successfully upserted {upserted_count} stint records into silver.stints "
+                        f"({len(staging_rows) - unresolved_laps - upserted_count} unchanged)")
             if skipped_count > 0:
                 logger.warning(f"Skipped {skipped_count} records due to validation issues")
-            return inserted_count + updated_count
+            return upserted_count
                     
     except psycopg.Error as e:
         conn.rollback()
@@ -354,13 +334,10 @@ def main():
     conn = get_db_connection()
     
     try:
-        # Load driver_id and lap_id mappings
+        # Load driver_id mappings (lap ids are resolved in SQL during the merge)
         logger.info("Loading driver_id mappings...")
         driver_id_map = get_driver_id_map(conn)
         
-        logger.info("Loading lap_id mappings...")
-        lap_id_map = get_lap_id_map(conn)
-        
         # Get stint records from bronze with resolved session_id
         logger.info("Fetching stint records from bronze.stints_raw with resolved session_id...")
         records = get_stints_from_bronze(conn)
@@ -371,7 +348,7 @@ def main():
         
         # Upsert stints
         logger.info("Upserting stint records into silver.stints...")
-        upserted = upsert_stints(conn, records, driver_id_map, lap_id_map)
+        upserted = upsert_stints(conn, records, driver_id_map)
         
         logger.info("="*60)
         logger.info("STINTS UPSERT COMPLETE")
@@ -13,6 +13,8 @@ Derives season by joining:
 drivers_raw.openf1_session_key → sessions.openf1_session_key → meetings.meeting_id → meetings.season
 
 One entry per team_id per season (even if branding is the same across seasons).
+
+Run refresh_driver_id_by_session.py afterwards to update silver.driver_id_by_session.
 """
 
 import os
@@ -91,9 +91,12 @@ def generate_weather_id(session_id: str, date: datetime) -> str:
     return f"weather:{session_id}-{date_str}"
 
 
-def get_weather_from_bronze(conn) -> List[Dict]:
+def get_weather_from_bronze(conn, session_keys: Optional[List[str]] = None) -> List[Dict]:
     """
     Get weather records from bronze.weather_raw with resolved session_id.
+    
+    Args:
+        session_keys: Only read these openf1_session_keys (all sessions if None)
     """
     try:
         with conn.cursor() as cur:
@@ -113,9 +116,11 @@ def get_weather_from_bronze(conn) -> List[Dict]:
                 INNER JOIN silver.sessions s 
                     ON wr.openf1_session_key = s.openf1_session_key
                 WHERE wr.openf1_session_key IS NOT NULL
+                  AND (%(session_keys)s::text[] IS NULL
+                       OR wr.openf1_session_key = ANY(%(session_keys)s::text[]))
                   AND wr.date IS NOT NULL
                 ORDER BY wr.date
-            """)
+            """, {'session_keys': session_keys})
             
             records = []
             for row in cur.fetchall():
@@ -170,6 +175,13 @@ def upsert_weather(conn, records: List[Dict]) -> int:
             pressure_mbar = EXCLUDED.pressure_mbar,
             wind_direction = EXCLUDED.wind_direction,
             wind_speed_mps = EXCLUDED.wind_speed_mps
+        WHERE silver.weather.air_temp_c IS DISTINCT FROM EXCLUDED.air_temp_c
+           OR silver.weather.track_temp_c IS DISTINCT FROM EXCLUDED.track_temp_c
+           OR silver.weather.humidity IS DISTINCT FROM EXCLUDED.humidity
+           OR silver.weather.rainfall IS DISTINCT FROM EXCLUDED.rainfall
+           OR silver.weather.pressure_mbar IS DISTINCT FROM EXCLUDED.pressure_mbar
+           OR silver.weather.wind_direction IS DISTINCT FROM EXCLUDED.wind_direction
+           OR silver.weather.wind_speed_mps IS DISTINCT FROM EXCLUDED.wind_speed_mps
     """
     
     inserted_count = 0
@@ -0,0 +1,691 @@
+#!/usr/bin/env python3
+"""
+In-process runner for the silver upsert pipeline.
+
+Instead of launching every pitwall_silver/upsert_*.py script as its own python3
+subprocess (each re-importing psycopg, opening a fresh connection and reloading
+the same lookup maps), this imports the silver modules as libraries and runs
+their functions in dependency order:
+
+- One psycopg_pool ConnectionPool is shared by every stage
+- Dimension maps (driver_id_by_session, session ids, alias maps, ...) are loaded
+  once into a DimensionCache and only reloaded after a stage that changes them
+- Session-scoped stages only re-read bronze for sessions logged as changed in
+  silver.dirty_sessions since they last ran
+
+Each stage mirrors the main() of its script without the summary/sample queries.
+The scripts remain runnable on their own.
+
+Usage:
+    python3 run_silver_pipeline.py
+    python3 run_silver_pipeline.py --json
+"""
+
+import os
+import sys
+import time
+import json
+import logging
+import argparse
+import threading
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import psycopg
+from dotenv import load_dotenv
+from psycopg_pool import ConnectionPool
+
+import stage_runs
+from pitwall_silver import (
+    backfill_lap_validity,
+    build_mini_sectors,
+    build_telemetry_lod,
+    build_telemetry_trace,
+    build_turn_analytics,
+    refresh_driver_id_by_session,
+    upsert_circuits,
+    upsert_driver_numbers_by_season,
+    upsert_driver_teams_by_session,
+    upsert_drivers,
+    upsert_intervals,
+    upsert_laps,
+    upsert_meetings,
+    upsert_overtakes,
+    upsert_pit_stops,
+    upsert_points_awarding,
+    upsert_position,
+    upsert_race_control,
+    upsert_results,
+    upsert_sessions,
+    upsert_stints,
+    upsert_team_branding,
+    upsert_weather,
+)
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def create_pool(max_size: int = 4) -> ConnectionPool:
+    """Create the connection pool shared by all silver stages."""
+    return ConnectionPool(
+        conninfo=(
+            f"host={os.getenv('PGHOST', 'localhost')} "
+            f"port={os.getenv('PGPORT', '5433')} "
+            f"dbname={os.getenv('PGDATABASE', 'pitwall')} "
+            f"user={os.getenv('PGUSER', 'pitwall')} "
+            f"password={os.getenv('PGPASSWORD', 'pitwall')}"
+        ),
+        min_size=1,
+        max_size=max_size,
+    )
+
+
+class DimensionCache:
+    """
+    Load-once cache of the lookup maps shared by the silver scripts.
+
+    Maps are loaded lazily on first use with the loader of the requesting module,
+    and dropped by invalidate() once a stage has written the tables they read.
+    A lock makes concurrent stages share one load instead of racing.
+    """
+
+    def __init__(self):
+        self._maps: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.hits = 0
+
+    def get(self, name: str, loader: Callable, conn):
+        with self._lock:
+            if name in self._maps:
+                self.hits += 1
+            else:
+                self._maps[name] = loader(conn)
+                self.loads += 1
+            return self._maps[name]
+
+    def invalidate(self, names: List[str]) -> None:
+        with self._lock:
+            for name in names:
+                self._maps.pop(name, None)
+
+
+# =============================================================================
+# DIRTY SESSIONS
+# =============================================================================
+# silver.dirty_sessions (init-db/19-create-dirty-sessions-changelog.sql) logs which
+# sessions each bronze/silver table changed. Session-scoped stages read the changes
+# to their sources since their cursor, process only those sessions and then advance
+# the cursor; the silver rows they write are logged in turn for downstream stages.
+
+def read_dirty_sessions(conn, consumer: str,
+                        sources: Optional[List[str]] = None) -> Tuple[Optional[Dict[str, str]], int]:
+    """
+    Get the sessions changed in the given sources since the consumer last ran.
+
+    Sessions are widened to their whole meeting: qualifying grids feed race results,
+    and a post-race update touches every session of the weekend anyway.
+
+    Args:
+        consumer: Cursor name (stage or phase)
+        sources: Changelog sources to consider, e.g. 'bronze.laps_raw' (all if None)
+
+    Returns:
+        Tuple of ({session_id: openf1_session_key} or None for a first full run,
+        change_id to pass to advance_dirty_cursor once the work has succeeded)
+    """
+    try:
+        with conn.cursor() as cur:
+            # Wait for in-flight writers so no lower change_id can commit after we read MAX
+            cur.execute("LOCK TABLE silver.dirty_sessions IN SHARE MODE")
+            cur.execute("SELECT COALESCE(MAX(change_id), 0) FROM silver.dirty_sessions")
+            high_water = cur.fetchone()[0]
+
+            cur.execute("""
+                SELECT last_change_id
+                FROM silver.dirty_session_cursors
+                WHERE consumer = %s
+            """, (consumer,))
+            row = cur.fetchone()
+            if row is None:
+                conn.commit()
+                return None, high_water
+
+            cur.execute("""
+                WITH changed AS (
+                    SELECT DISTINCT s.meeting_id
+                    FROM silver.dirty_sessions ds
+                    INNER JOIN silver.sessions s
+                        ON s.session_id = ds.session_id
+                        OR (ds.session_id IS NULL AND s.openf1_session_key = ds.openf1_session_key)
+                    WHERE ds.change_id > %(after)s
+                      AND ds.change_id <= %(upto)s
+                      AND (%(sources)s::text[] IS NULL OR ds.source = ANY(%(sources)s::text[]))
+                )
+                SELECT s.session_id, s.openf1_session_key
+                FROM silver.sessions s
+                INNER JOIN changed c ON s.meeting_id = c.meeting_id
+            """, {'after': row[0], 'upto': high_water, 'sources': sources})
+            sessions = {r[0]: r[1] for r in cur.fetchall()}
+        conn.commit()
+        return sessions, high_water
+    except psycopg.Error as e:
+        conn.rollback()
+        logger.error(f"Failed to read dirty sessions for {consumer}: {e}")
+        raise
+
+
+def read_dirty_sources(conn, consumer: str) -> Tuple[Optional[Set[str]], int]:
+    """
+    Get the silver tables changed since the consumer last ran.
+
+    Returns:
+        Tuple of (set of schema-qualified tables or None for a first full run,
+        change_id to pass to advance_dirty_cursor once the work has succeeded)
+    """
+    try:
+        with conn.cursor() as cur:
+            # Wait for in-flight writers so no lower change_id can commit after we read MAX
+            cur.execute("LOCK TABLE silver.dirty_sessions IN SHARE MODE")
+            cur.execute("SELECT COALESCE(MAX(change_id), 0) FROM silver.dirty_sessions")
+            high_water = cur.fetchone()[0]
+
+            cur.execute("""
+                SELECT last_change_id
+                FROM silver.dirty_session_cursors
+                WHERE consumer = %s
+            """, (consumer,))
+            row = cur.fetchone()
+            if row is None:
+                conn.commit()
+                return None, high_water
+
+            # Tagged sources ('silver.laps:validity') count as their table
+            cur.execute("""
+                SELECT DISTINCT split_part(source, ':', 1)
+                FROM silver.dirty_sessions
+                WHERE change_id > %(after)s
+                  AND change_id <= %(upto)s
+                  AND layer = 'silver'
+            """, {'after': row[0], 'upto': high_water})
+            sources = {r[0] for r in cur.fetchall()}
+        conn.commit()
+        return sources, high_water
+    except psycopg.Error as e:
+        conn.rollback()
+        logger.error(f"Failed to read dirty sources for {consumer}: {e}")
+        raise
+
+
+def advance_dirty_cursor(conn, consumer: str, change_id: int) -> None:
+    """Record that the consumer has processed every change up to change_id."""
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO silver.dirty_session_cursors (consumer, last_change_id, updated_at)
+                VALUES (%s, %s, NOW())
+                ON CONFLICT (consumer) DO UPDATE SET
+                    last_change_id = GREATEST(silver.dirty_session_cursors.last_change_id,
+                                              EXCLUDED.last_change_id),
+                    updated_at = EXCLUDED.updated_at
+            """, (consumer, change_id))
+        conn.commit()
+    except psycopg.Error as e:
+        conn.rollback()
+        logger.error(f"Failed to advance dirty-session cursor for {consumer}: {e}")
+        raise
+
+
+def prune_dirty_sessions(conn) -> int:
+    """Delete changelog rows every registered consumer has already processed."""
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                DELETE FROM silver.dirty_sessions
+                WHERE change_id <= (SELECT MIN(last_change_id) FROM silver.dirty_session_cursors)
+            """)
+            deleted = cur.rowcount
+        conn.commit()
+        return deleted
+    except psycopg.Error as e:
+        conn.rollback()
+        logger.error(f"Failed to prune dirty sessions: {e}")
+        raise
+
+
+def session_keys(sessions: Optional[Dict[str, str]]) -> Optional[List[str]]:
+    """openf1_session_keys to read from bronze (None = all sessions)."""
+    return None if sessions is None else list(sessions.values())
+
+
+# =============================================================================
+# STAGES
+# =============================================================================
+# Each stage takes (conn, dims) and returns the number of rows upserted.
+# Session-scoped stages also take the dirty sessions to process (None = all).
+
+def run_circuits(conn, dims: DimensionCache) -> int:
+    alias_map = dims.get('country_code_alias_map', upsert_circuits.get_country_code_alias_map, conn)
+    circuits = upsert_circuits.get_distinct_circuits_from_bronze(conn)
+    if not circuits:
+        logger.warning("No circuits found in bronze.meetings_raw")
+        return 0
+    return upsert_circuits.upsert_circuits(conn, circuits, alias_map)
+
+
+def run_meetings(conn, dims: DimensionCache) -> int:
+    circuit_id_map = dims.get('circuit_id_map', upsert_meetings.get_circuit_id_map, conn)
+    if not circuit_id_map:
+        logger.error("No circuits found in silver.circuits. Please run upsert_circuits.py first.")
+        return 0
+    meetings = upsert_meetings.get_meetings_from_bronze(conn)
+    if not meetings:
+        logger.warning("No meetings found in bronze.meetings_raw")
+        return 0
+    round_map = upsert_meetings.calculate_round_numbers(meetings)
+    return upsert_meetings.upsert_meetings(conn, meetings, circuit_id_map, round_map)
+
+
+def run_sessions(conn, dims: DimensionCache) -> int:
+    meeting_info_map = dims.get('meeting_info_map', upsert_sessions.get_meeting_info_map, conn)
+    if not meeting_info_map:
+        logger.error("No meetings found in silver.meetings. Please run upsert_meetings.py first.")
+        return 0
+    circuit_info_map = dims.get('circuit_info_map', upsert_sessions.get_circuit_info_map, conn)
+    if not circuit_info_map:
+        logger.error("No circuits found in silver.circuits. Please run upsert_circuits.py first.")
+        return 0
+    sessions = upsert_sessions.get_sessions_from_bronze(conn)
+    if not sessions:
+        logger.warning("No sessions found in bronze.sessions_raw")
+        return 0
+    return upsert_sessions.upsert_sessions(conn, sessions, meeting_info_map, circuit_info_map)
+
+
+def run_drivers(conn, dims: DimensionCache) -> int:
+    alias_map = dims.get('driver_alias_map', upsert_drivers.get_driver_alias_map, conn)
+    country_alias_map = dims.get('country_code_alias_map', upsert_drivers.get_country_code_alias_map, conn)
+    drivers = upsert_drivers.get_distinct_drivers_from_bronze(conn)
+    if not drivers:
+        logger.warning("No drivers found in bronze.drivers_raw")
+        return 0
+    upserted = upsert_drivers.upsert_drivers(conn, drivers, alias_map, country_alias_map)
+
+    # upsert_drivers.py also refreshes driver_teams_by_session
+    driver_id_map = dims.get('driver_id_map', upsert_drivers.get_driver_id_map_for_teams, conn)
+    team_id_map = dims.get('team_id_map', upsert_drivers.get_team_id_map, conn)
+    session_id_map = dims.get('session_id_map', upsert_drivers.get_session_id_map, conn)
+    upserted += upsert_drivers.upsert_driver_teams_by_session(conn, driver_id_map, team_id_map, session_id_map)
+    return upserted
+
+
+def run_driver_numbers_by_season(conn, dims: DimensionCache) -> int:
+    alias_map = dims.get('driver_alias_map', upsert_driver_numbers_by_season.get_driver_alias_map, conn)
+    records = upsert_driver_numbers_by_season.get_driver_number_data_from_bronze(conn)
+    if not records:
+        logger.warning("No driver number records found in bronze.drivers_raw")
+        return 0
+    return upsert_driver_numbers_by_season.upsert_driver_numbers(conn, records, alias_map)
+
+
+def run_driver_teams_by_session(conn, dims: DimensionCache) -> int:
+    module = upsert_driver_teams_by_session
+    driver_id_map = dims.get('driver_id_map', module.get_driver_id_map, conn)
+    team_id_map = dims.get('team_id_map', module.get_team_id_map, conn)
+    session_id_map = dims.get('session_id_map', module.get_session_id_map, conn)
+    records = module.get_driver_teams_from_bronze(conn)
+    if not records:
+        logger.warning("No driver-team records found in bronze.drivers_raw")
+        return 0
+    return module.upsert_driver_teams(conn, records, driver_id_map, team_id_map, session_id_map)
+
+
+def run_team_branding(conn, dims: DimensionCache) -> int:
+    alias_map = dims.get('team_id_map', upsert_team_branding.get_team_alias_map, conn)
+    if not alias_map:
+        logger.error("No team aliases found in silver.team_alias. Please populate team aliases first.")
+        return 0
+    records = upsert_team_branding.get_team_branding_from_bronze(conn)
+    if not records:
+        logger.warning("No team branding records found in bronze.drivers_raw")
+        return 0
+    upsert_team_branding.validate_team_names(records, alias_map)
+    return upsert_team_branding.upsert_team_branding(conn, records, alias_map)
+
+
+def run_refresh_driver_id_by_session(conn, dims: DimensionCache) -> int:
+    return refresh_driver_id_by_session.refresh_driver_id_by_session(conn)
+
+
+def run_laps(conn, dims: DimensionCache, sessions: Optional[Dict[str, str]] = None) -> int:
+    laps = upsert_laps.get_laps_from_bronze(conn, session_keys(sessions))
+    if not laps:
+        logger.warning("No laps found in bronze.laps_raw")
+        return 0
+    return upsert_laps.upsert_laps(conn, laps)
+
+
+def run_results(conn, dims: DimensionCache, sessions: Optional[Dict[str, str]] = None) -> int:
+    driver_id_map = dims.get('driver_id_map', upsert_results.get_driver_id_map, conn)
+    quali_map = upsert_results.get_qualifying_session_map(conn)
+    quali_session_keys = list(set(quali_map.values()))
+    starting_grid_map = upsert_results.get_starting_grid_map(conn, quali_session_keys)
+    best_lap_map = upsert_results.get_best_lap_map(conn)
+    fastest_lap_map = upsert_results.get_fastest_lap_map(conn)
+    records = upsert_results.get_results_from_bronze(conn, session_keys(sessions))
+    if not records:
+        logger.warning("No results records found in bronze.results_raw")
+        return 0
+    return upsert_results.upsert_results(conn, records, driver_id_map, quali_map, starting_grid_map,
+                                         best_lap_map, fastest_lap_map)
+
+
+def run_race_control(conn, dims: DimensionCache, sessions: Optional[Dict[str, str]] = None) -> int:
+    records = upsert_race_control.get_race_control_from_bronze(conn, session_keys(sessions))
+    if not records:
+        logger.warning("No race control records found in bronze.race_control_raw")
+        return 0
+    return upsert_race_control.upsert_race_control(conn, records)
+
+
+def run_stints(conn, dims: DimensionCache, sessions: Optional[Dict[str, str]] = None) -> int:
+    driver_id_map = dims.get('driver_id_map', upsert_stints.get_driver_id_map, conn)
+    records = upsert_stints.get_stints_from_bronze(conn, session_keys(sessions))
+    if not records:
+        logger.warning("No stint records found in bronze.stints_raw")
+        return 0
+    return upsert_stints.upsert_stints(conn, records, driver_id_map)
+
+
+def run_pit_stops(conn, dims: DimensionCache, sessions: Optional[Dict[str, str]] = None) -> int:
+    driver_id_map = dims.get('driver_id_map', upsert_pit_stops.get_driver_id_map, conn)
+    records = upsert_pit_stops.get_pit_stops_from_bronze(conn, session_keys(sessions))
+    if not records:
+        logger.warning("No pit stop records found in bronze.pit_stops_raw")
+        return 0
+    return upsert_pit_stops.upsert_pit_stops(conn, records, driver_id_map)
+
+
+def run_weather(conn, dims: DimensionCache, sessions: Optional[Dict[str, str]] = None) -> int:
+    records = upsert_weather.get_weather_from_bronze(conn, session_keys(sessions))
+    if not records:
+        logger.warning("No weather records found in bronze.weather_raw")
+        return 0
+    return upsert_weather.upsert_weather(conn, records)
+
+
+def run_overtakes(conn, dims: DimensionCache, sessions: Optional[Dict[str, str]] = None) -> int:
+    driver_id_map = dims.get('driver_id_map', upsert_overtakes.get_driver_id_map, conn)
+    records = upsert_overtakes.get_overtakes_from_bronze(conn, session_keys(sessions))
+    if not records:
+        logger.warning("No overtake records found in bronze.overtakes_raw")
+        return 0
+    return upsert_overtakes.upsert_overtakes(conn, records, driver_id_map)
+
+
+def run_intervals(conn, dims: DimensionCache, sessions: Optional[Dict[str, str]] = None) -> int:
+    driver_id_map = dims.get('driver_id_map', upsert_intervals.get_driver_id_map, conn)
+    records = upsert_intervals.get_intervals_from_bronze(conn, session_keys(sessions))
+    if not records:
+        logger.warning("No interval records found in bronze.intervals_raw")
+        return 0
+    return upsert_intervals.upsert_intervals(conn, records, driver_id_map)
+
+
+def run_position(conn, dims: DimensionCache, sessions: Optional[Dict[str, str]] = None) -> int:
+    driver_id_map = dims.get('driver_id_map', upsert_position.get_driver_id_map, conn)
+    records = upsert_position.get_positions_from_bronze(conn, session_keys(sessions))
+    if not records:
+        logger.warning("No position records found in bronze.position_raw")
+        return 0
+    return upsert_position.upsert_positions(conn, records, driver_id_map)
+
+
+def run_points_awarding(conn, dims: DimensionCache, sessions: Optional[Dict[str, str]] = None) -> int:
+    with conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM silver.points_system")
+        if cur.fetchone()[0] == 0:
+            logger.warning("No points system rules found. Skipping.")
+            return 0
+    session_ids = None if sessions is None else list(sessions)
+    _, _, updated = upsert_points_awarding.award_points(conn, session_ids=session_ids)
+    return updated
+
+
+def run_lap_validity(conn, dims: DimensionCache, sessions: Optional[Dict[str, str]] = None) -> int:
+    session_ids = list(sessions) if sessions is not None else None
+    return backfill_lap_validity.update_lap_validity(conn, session_ids)
+
+
+def run_telemetry_lod(conn, dims: DimensionCache, sessions: Optional[Dict[str, str]] = None) -> int:
+    session_ids = list(sessions) if sessions is not None else None
+    return build_telemetry_lod.build_telemetry_lod(conn, session_ids)
+
+
+def run_telemetry_trace(conn, dims: DimensionCache, sessions: Optional[Dict[str, str]] = None) -> int:
+    session_ids = list(sessions) if sessions is not None else None
+    return build_telemetry_trace.build_telemetry_trace(conn, session_ids)
+
+
+def run_turn_analytics(conn, dims: DimensionCache, sessions: Optional[Dict[str, str]] = None) -> int:
+    session_ids = list(sessions) if sessions is not None else None
+    return build_turn_analytics.build_turn_analytics(conn, session_ids)
+
+
+def run_mini_sectors(conn, dims: DimensionCache, sessions: Optional[Dict[str, str]] = None) -> int:
+    session_ids = list(sessions) if sessions is not None else None
+    return build_mini_sectors.build_mini_sectors(conn, session_ids)
+
+
+# Changelog sources that make a session dirty for the session-scoped stages: their own
+# bronze table, plus new sessions and driver mapping changes (rows that could not be
+# resolved before).
+SESSION_SOURCES = ['silver.sessions', 'silver.driver_id_by_session_mat']
+
+# is_pit_in_lap / is_valid updates by backfill_lap_validity.py, logged separately from
+# other silver.laps writes so that stages which only need lap ids ignore them
+LAP_VALIDITY_SOURCE = 'silver.laps:validity'
+
+# Every silver table logged to silver.dirty_sessions (what the gold refresh consumes)
+SILVER_SOURCES = [
+    'silver.sessions', 'silver.driver_teams_by_session', 'silver.driver_id_by_session_mat',
+    'silver.laps', 'silver.results', 'silver.race_control', 'silver.pit_stops', 'silver.stints',
+    'silver.weather', 'silver.overtakes', 'silver.intervals', 'silver.position',
+    'silver.car_telemetry', 'silver.car_telemetry_packed', 'silver.car_gps',
+]
+
+# (script name, stage function, dimension maps invalidated once the stage has run,
+#  dirty-session sources or None to always run over everything)
+#
+# driver_id_map comes from sessions x driver_numbers_by_season (the dimension stages join
+# them directly, later stages read silver.driver_id_by_session once it has been refreshed),
+# session_id_map from silver.sessions. Alias maps are never written by the pipeline.
+#
+# silver.driver_id_by_session_mat is refreshed once, after the last table it reads has
+# been upserted: the refresh compares its whole source join.
+SILVER_STAGES: List[Tuple[str, Callable, List[str], Optional[List[str]]]] = [
+    # Foundation tables
+    ('upsert_circuits.py', run_circuits, ['circuit_id_map', 'circuit_info_map'], None),
+    ('upsert_meetings.py', run_meetings, ['meeting_info_map', 'driver_id_map'], None),
+    ('upsert_sessions.py', run_sessions, ['session_id_map', 'driver_id_map'], None),
+    # Drivers and teams
+    ('upsert_drivers.py', run_drivers, [], None),
+    ('upsert_driver_numbers_by_season.py', run_driver_numbers_by_season, ['driver_id_map'], None),
+    ('upsert_driver_teams_by_session.py', run_driver_teams_by_session, [], None),
+    ('upsert_team_branding.py', run_team_branding, [], None),
+    ('refresh_driver_id_by_session.py', run_refresh_driver_id_by_session, ['driver_id_map'], None),
+    # Session data
+    ('upsert_laps.py', run_laps, [], ['bronze.laps_raw'] + SESSION_SOURCES),
+    ('upsert_results.py', run_results, [],
+     ['bronze.results_raw', 'bronze.starting_grid_raw', 'silver.laps', LAP_VALIDITY_SOURCE]
+     + SESSION_SOURCES),
+    ('upsert_race_control.py', run_race_control, [],
+     ['bronze.race_control_raw', 'silver.laps'] + SESSION_SOURCES),
+    # Lap-dependent tables
+    ('upsert_stints.py', run_stints, [], ['bronze.stints_raw', 'silver.laps'] + SESSION_SOURCES),
+    ('upsert_pit_stops.py', run_pit_stops, [], ['bronze.pit_stops_raw', 'silver.laps'] + SESSION_SOURCES),
+    # Other session data
+    ('upsert_weather.py', run_weather, [], ['bronze.weather_raw', 'silver.sessions']),
+    ('upsert_overtakes.py', run_overtakes, [], ['bronze.overtakes_raw'] + SESSION_SOURCES),
+    ('upsert_intervals.py', run_intervals, [], ['bronze.intervals_raw'] + SESSION_SOURCES),
+    ('upsert_position.py', run_position, [], ['bronze.position_raw'] + SESSION_SOURCES),
+    ('upsert_points_awarding.py', run_points_awarding, [],
+     ['silver.results', 'silver.laps', LAP_VALIDITY_SOURCE, 'silver.race_control', 'silver.sessions']),
+    # Post-processing
+    ('backfill_lap_validity.py', run_lap_validity, [],
+     ['silver.laps', 'silver.pit_stops', 'silver.race_control']),
+]
+
+# Stages that only run with the high-volume (telemetry/GPS) scripts. Not part of
+# run_silver_pipeline(); update_database.py runs them when high-volume data is included.
+HIGH_VOLUME_STAGES: List[Tuple[str, Callable, List[str], Optional[List[str]]]] = [
+    ('build_telemetry_lod.py', run_telemetry_lod, [],
+     ['silver.car_telemetry', 'silver.car_telemetry_packed', 'silver.laps']),
+    ('build_telemetry_trace.py', run_telemetry_trace, [],
+     ['silver.car_telemetry', 'silver.car_telemetry_packed', 'silver.car_gps',
+      'silver.laps', 'silver.pit_stops'] + SESSION_SOURCES),
+    # Read gold.telemetry_trace, so they follow the trace's sources. Both pick their
+    # reference lap by is_valid, so they also follow the validity backfill
+    ('build_turn_analytics.py', run_turn_analytics, [],
+     ['silver.car_telemetry', 'silver.car_telemetry_packed', 'silver.car_gps',
+      'silver.laps', LAP_VALIDITY_SOURCE, 'silver.pit_stops'] + SESSION_SOURCES),
+    ('build_mini_sectors.py', run_mini_sectors, [],
+     ['silver.car_telemetry', 'silver.car_telemetry_packed', 'silver.car_gps',
+      'silver.laps', LAP_VALIDITY_SOURCE, 'silver.pit_stops'] + SESSION_SOURCES),
+]
+
+STAGES_BY_SCRIPT: Dict[str, Tuple[Callable, List[str], Optional[List[str]]]] = {
+    script_name: (stage, invalidates, sources)
+    for script_name, stage, invalidates, sources in SILVER_STAGES + HIGH_VOLUME_STAGES
+}
+
+
+def run_stage(script_name: str, pool: ConnectionPool, dims: DimensionCache) -> int:
+    """
+    Run a single silver stage on a pooled connection.
+
+    Safe to call from several threads at once (update_database.py runs independent
+    stages concurrently). Cached maps the stage makes stale are dropped before it returns.
+    Session-scoped stages only process their dirty sessions and advance their cursor
+    on success.
+    """
+    stage, invalidates, sources = STAGES_BY_SCRIPT[script_name]
+    try:
+        with pool.connection() as conn:
+            if sources is None:
+                return stage(conn, dims)
+
+            sessions, high_water = read_dirty_sessions(conn, script_name, sources)
+            if sessions is None:
+                logger.info(f"  {script_name}: no dirty-session cursor yet, processing all sessions")
+                upserted = stage(conn, dims)
+            elif not sessions:
+                logger.info(f"  {script_name}: no dirty sessions, skipping")
+                upserted = 0
+            else:
+                logger.info(f"  {script_name}: processing {len(sessions)} dirty sessions")
+                upserted = stage(conn, dims, sessions)
+            advance_dirty_cursor(conn, script_name, high_water)
+            return upserted
+    finally:
+        dims.invalidate(invalidates)
+
+
+def run_silver_pipeline(pool: Optional[ConnectionPool] = None) -> Dict:
+    """
+    Run every silver stage sequentially in dependency order inside this process.
+
+    Args:
+        pool: Connection pool to use (a private one is created and closed if omitted)
+
+    Returns:
+        Dict with results summary, in the same shape as update_database.run_silver_upserts
+    """
+    own_pool = pool is None
+    if own_pool:
+        pool = create_pool()
+
+    dims = DimensionCache()
+    results = {"success": 0, "failed": 0, "skipped": 0, "details": []}
+
+    try:
+        for idx, (script_name, _, _, _) in enumerate(SILVER_STAGES, 1):
+            logger.info(f"[{idx}/{len(SILVER_STAGES)}] Running {script_name} (in-process)...")
+
+            start_time = time.time()
+            metrics = {"mode": "in-process"}
+            error = None
+            try:
+                upserted = run_stage(script_name, pool, dims)
+                duration = time.time() - start_time
+                metrics["rows_written"] = upserted
+                logger.info(f"  ✓ Completed in {duration:.1f}s ({upserted} rows)")
+                results["success"] += 1
+                results["details"].append({
+                    "script": script_name,
+                    "success": True,
+                    "duration": duration,
+                    "rows": upserted
+                })
+            except Exception as e:
+                duration = time.time() - start_time
+                error = str(e)
+                logger.error(f"  ✗ Failed after {duration:.1f}s")
+                logger.error(f"    Error: {e}")
+                results["failed"] += 1
+                results["details"].append({
+                    "script": script_name,
+                    "success": False,
+                    "duration": duration,
+                    "error": error
+                })
+
+            with pool.connection() as conn:
+                stage_runs.record_stage_run(conn, 'silver', script_name, start_time, start_time + duration,
+                                            error is None, metrics, error)
+    finally:
+        if own_pool:
+            pool.close()
+
+    logger.info(f"Dimension cache: {dims.loads} loads, {dims.hits} reuses")
+    return results
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Run the silver upsert pipeline in a single process")
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help='Output results as JSON'
+    )
+    args = parser.parse_args()
+
+    logger.info("=" * 60)
+    logger.info("SILVER PIPELINE (IN-PROCESS)")
+    logger.info("=" * 60)
+
+    start_time = time.time()
+    results = run_silver_pipeline()
+    results["duration_seconds"] = time.time() - start_time
+
+    logger.info("=" * 60)
+    logger.info(f"Silver: {results['success']} succeeded, {results['failed']} failed "
+                f"in {results['duration_seconds']:.1f}s")
+    logger.info("=" * 60)
+
+    if args.json:
+        print(json.dumps(results, indent=2, default=str))
+
+    sys.exit(0 if results["failed"] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Record pipeline stage runs in ops.stage_runs (init-db/33-create-stage-runs.sql).
+
+update_database.py records every bronze and silver stage it runs, run_silver_pipeline.py
+its in-process stages, and gold_refresh.py every view refresh. Each runner passes the
+metrics it can measure (see the migration for what each column means); the rest stay NULL.
+In-process stages share the runner process, whose peak RSS never goes down, so they
+record no peak RSS; subprocess stages record no row counts.
+
+Recording never fails a stage: database errors are logged and the row is dropped, e.g.
+before the migration has been applied.
+"""
+
+import sys
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import psycopg
+
+logger = logging.getLogger(__name__)
+
+# ru_maxrss (os.wait4() of a stage subprocess) is in kilobytes on Linux and in bytes on macOS
+RSS_DIVISOR = 1024 if sys.platform == 'darwin' else 1
+
+STAGE_RUN_COLUMNS = ['mode', 'rows_read', 'rows_written', 'bytes_written', 'peak_rss_kb']
+
+
+def record_stage_run(conn, phase: str, stage: str, started: float, finished: float,
+                     success: bool, metrics: Optional[Dict] = None, error: Optional[str] = None) -> None:
+    """
+    Insert one row into ops.stage_runs and commit.
+
+    Args:
+        phase: 'bronze', 'silver' or 'gold'
+        stage: Script name or gold view
+        started: Start time (time.time())
+        finished: End time (time.time())
+        metrics: Any of STAGE_RUN_COLUMNS
+        error: Error message of a failed stage (truncated to 2000 characters)
+    """
+    metrics = metrics or {}
+    params = {column: metrics.get(column) for column in STAGE_RUN_COLUMNS}
+    params.update({
+        'phase': phase,
+        'stage': stage,
+        'started_at': datetime.fromtimestamp(started, timezone.utc),
+        'finished_at': datetime.fromtimestamp(finished, timezone.utc),
+        'duration_ms': int((finished - started) * 1000),
+        'success': success,
+        'error': error[-2000:] if error else None,
+    })
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO ops.stage_runs (
+                    phase, stage, mode, started_at, finished_at, duration_ms, success,
+                    rows_read, rows_written, bytes_written, peak_rss_kb, error
+                )
+                VALUES (
+                    %(phase)s, %(stage)s, %(mode)s, %(started_at)s, %(finished_at)s,
+                    %(duration_ms)s, %(success)s, %(rows_read)s, %(rows_written)s,
+                    %(bytes_written)s, %(peak_rss_kb)s, %(error)s
+                )
+            """, params)
+        conn.commit()
+    except psycopg.Error as e:
+        conn.rollback()
+        logger.warning(f"Could not record stage run for {stage}: {e}")
@@ -7,28 +7,42 @@ Orchestrates the full ETL pipeline:
 2. Silver Upserts - Transform and load to silver layer
 3. Gold Refresh - Refresh materialized views
 
+Bronze and silver scripts run as a dependency DAG (BRONZE_DEPENDENCIES,
+SILVER_DEPENDENCIES): independent stages run concurrently, and each phase
+reports per-stage timings and its critical path in the JSON output.
+
 Usage:
     python3 update_database.py                    # Run full pipeline
     python3 update_database.py --bronze-only      # Only run bronze ingestion
     python3 update_database.py --silver-only      # Only run silver upserts
-    python3 update_database.py --gold-only        # Only refresh gold views
+    python3 update_database.py --gold-only        # Only refresh gold views with changed inputs
+    python3 update_database.py --gold-only --all-gold-views  # Refresh every gold view
     python3 update_database.py --skip-high-volume # Skip GPS/telemetry (faster)
+    python3 update_database.py --silver-subprocess # One subprocess per silver script
+    python3 update_database.py --workers 1        # Run stages one at a time
 """
 
 import subprocess
 import sys
+import tempfile
+import threading
 import time
 import logging
 import argparse
 import os
 from datetime import datetime
 from pathlib import Path
-from typing import List, Tuple, Dict, Optional
+from typing import Callable, List, Tuple, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 import json
 
 import psycopg
 from dotenv import load_dotenv
 
+import gold_refresh
+import stage_runs
+from gold_refresh import GOLD_VIEWS
+
 # Load environment variables
 load_dotenv()
 
@@ -88,6 +102,7 @@ SILVER_SCRIPTS = [
     'pitwall_silver/upsert_driver_numbers_by_season.py',
     'pitwall_silver/upsert_driver_teams_by_session.py',
     'pitwall_silver/upsert_team_branding.py',
+    'pitwall_silver/refresh_driver_id_by_session.py',
     # Session data
     'pitwall_silver/upsert_laps.py',
     'pitwall_silver/upsert_results.py',
@@ -109,23 +124,93 @@ SILVER_SCRIPTS = [
 SILVER_HIGH_VOLUME_SCRIPTS = [
     'pitwall_silver/upsert_car_telemetry.py',
     'pitwall_silver/upsert_car_gps.py',
+    'pitwall_silver/build_telemetry_lod.py',
+    'pitwall_silver/build_telemetry_trace.py',
+    'pitwall_silver/build_turn_analytics.py',
+    'pitwall_silver/build_mini_sectors.py',
 ]
 
-# Gold materialized views to refresh
-GOLD_VIEWS = [
-    'gold.dim_drivers',
-    'gold.dim_teams',
-    'gold.dim_circuits',
-    'gold.dim_meetings',
-    'gold.driver_session_results',
-    'gold.session_classification',
-    'gold.session_summary',
-    'gold.lap_times',
-    'gold.lap_intervals',
-    'gold.driver_standings_progression',
-    'gold.constructor_standings_progression',
-    'gold.circuit_overtake_stats',
-]
+# Stage dependencies (script -> scripts that must finish first). Stages whose
+# dependencies are satisfied run concurrently, up to --workers at a time.
+# Every dependency must appear earlier in its script list, so --workers 1
+# reproduces the sequential order above.
+BRONZE_DEPENDENCIES = {
+    'pitwall_ingest/ingest_meetings.py': [],
+    'pitwall_ingest/ingest_sessions.py': ['pitwall_ingest/ingest_meetings.py'],
+    'pitwall_ingest/ingest_drivers.py': ['pitwall_ingest/ingest_sessions.py'],
+    'pitwall_ingest/ingest_laps.py': ['pitwall_ingest/ingest_drivers.py'],
+    'pitwall_ingest/ingest_results.py': ['pitwall_ingest/ingest_drivers.py'],
+    'pitwall_ingest/ingest_race_control.py': ['pitwall_ingest/ingest_drivers.py'],
+    'pitwall_ingest/ingest_starting_grid.py': ['pitwall_ingest/ingest_drivers.py'],
+    'pitwall_ingest/ingest_pit_stops.py': ['pitwall_ingest/ingest_drivers.py'],
+    'pitwall_ingest/ingest_stints.py': ['pitwall_ingest/ingest_drivers.py'],
+    'pitwall_ingest/ingest_weather.py': ['pitwall_ingest/ingest_sessions.py'],
+    'pitwall_ingest/ingest_overtakes.py': ['pitwall_ingest/ingest_drivers.py'],
+    'pitwall_ingest/ingest_intervals.py': ['pitwall_ingest/ingest_drivers.py'],
+    'pitwall_ingest/ingest_position.py': ['pitwall_ingest/ingest_drivers.py'],
+    'pitwall_ingest/ingest_car_telemetry.py': ['pitwall_ingest/ingest_drivers.py'],
+    'pitwall_ingest/ingest_car_gps.py': ['pitwall_ingest/ingest_drivers.py'],
+}
+
+# The dimension chain (sessions -> drivers -> numbers -> teams -> branding) stays
+# serial, then silver.driver_id_by_session is refreshed once before the session-scoped
+# stages that resolve drivers through it.
+SILVER_DEPENDENCIES = {
+    'pitwall_silver/upsert_circuits.py': [],
+    'pitwall_silver/upsert_meetings.py': ['pitwall_silver/upsert_circuits.py'],
+    'pitwall_silver/upsert_sessions.py': ['pitwall_silver/upsert_meetings.py'],
+    'pitwall_silver/upsert_drivers.py': ['pitwall_silver/upsert_sessions.py'],
+    'pitwall_silver/upsert_driver_numbers_by_season.py': ['pitwall_silver/upsert_drivers.py'],
+    'pitwall_silver/upsert_driver_teams_by_session.py': ['pitwall_silver/upsert_driver_numbers_by_season.py'],
+    'pitwall_silver/upsert_team_branding.py': ['pitwall_silver/upsert_driver_teams_by_session.py'],
+    'pitwall_silver/refresh_driver_id_by_session.py': ['pitwall_silver/upsert_team_branding.py'],
+    'pitwall_silver/upsert_laps.py': ['pitwall_silver/refresh_driver_id_by_session.py'],
+    'pitwall_silver/upsert_results.py': ['pitwall_silver/upsert_laps.py'],
+    'pitwall_silver/upsert_race_control.py': ['pitwall_silver/upsert_laps.py'],
+    'pitwall_silver/upsert_stints.py': ['pitwall_silver/upsert_laps.py'],
+    'pitwall_silver/upsert_pit_stops.py': ['pitwall_silver/upsert_laps.py'],
+    'pitwall_silver/upsert_weather.py': ['pitwall_silver/upsert_sessions.py'],
+    'pitwall_silver/upsert_overtakes.py': ['pitwall_silver/refresh_driver_id_by_session.py'],
+    'pitwall_silver/upsert_intervals.py': ['pitwall_silver/refresh_driver_id_by_session.py'],
+    'pitwall_silver/upsert_position.py': ['pitwall_silver/refresh_driver_id_by_session.py'],
+    'pitwall_silver/upsert_points_awarding.py': [
+        'pitwall_silver/upsert_results.py',
+        'pitwall_silver/upsert_race_control.py',
+    ],
+    'pitwall_silver/backfill_lap_validity.py': [
+        'pitwall_silver/upsert_pit_stops.py',
+        'pitwall_silver/upsert_race_control.py',
+        'pitwall_silver/upsert_points_awarding.py',
+    ],
+    'pitwall_silver/upsert_car_telemetry.py': ['pitwall_silver/refresh_driver_id_by_session.py'],
+    'pitwall_silver/upsert_car_gps.py': ['pitwall_silver/refresh_driver_id_by_session.py'],
+    'pitwall_silver/build_telemetry_lod.py': [
+        'pitwall_silver/upsert_laps.py',
+        'pitwall_silver/upsert_car_telemetry.py',
+    ],
+    'pitwall_silver/build_telemetry_trace.py': [
+        'pitwall_silver/upsert_laps.py',
+        'pitwall_silver/upsert_pit_stops.py',
+        'pitwall_silver/upsert_car_telemetry.py',
+        'pitwall_silver/upsert_car_gps.py',
+    ],
+    # Both pick their reference lap by is_valid, so they wait for the validity backfill
+    'pitwall_silver/build_turn_analytics.py': [
+        'pitwall_silver/build_telemetry_trace.py',
+        'pitwall_silver/backfill_lap_validity.py',
+    ],
+    'pitwall_silver/build_mini_sectors.py': [
+        'pitwall_silver/build_telemetry_trace.py',
+        'pitwall_silver/backfill_lap_validity.py',
+    ],
+}
+
+# Default number of stages run concurrently
+DEFAULT_WORKERS = 4
+
+# silver.dirty_sessions cursor used by the gold refresh
+GOLD_CONSUMER = 'gold_refresh'
+
 
 
 def get_db_connection():
@@ -139,7 +224,7 @@ def get_db_connection():
     )
 
 
-def run_script(script_path: str, timeout: int = 1800) -> Tuple[bool, str, float]:
+def run_script(script_path: str, timeout: int = 1800) -> Tuple[bool, str, float, Optional[int]]:
     """
     Run a Python script and return results.
     
@@ -148,37 +233,205 @@ def run_script(script_path: str, timeout: int = 1800) -> Tuple[bool, str, float]
         timeout: Maximum time in seconds (default 30 minutes)
         
     Returns:
-        Tuple of (success, output, duration_seconds)
+        Tuple of (success, output, duration_seconds, peak_rss_kb)
     """
-    script_name = Path(script_path).name
     start_time = time.time()
     
     try:
-        result = subprocess.run(
-            ['python3', script_path],
-            capture_output=True,
-            text=True,
-            timeout=timeout
-        )
-        
-        duration = time.time() - start_time
+        with tempfile.TemporaryFile('w+') as stdout, tempfile.TemporaryFile('w+') as stderr:
+            process = subprocess.Popen(['python3', script_path], stdout=stdout, stderr=stderr)
+            timed_out = threading.Event()
+            
+            def kill():
+                timed_out.set()
+                process.kill()
+            
+            timer = threading.Timer(timeout, kill)
+            timer.start()
+            try:
+                # wait4 (rather than wait) also returns the script's resource usage
+                _, status, usage = os.wait4(process.pid, 0)
+            finally:
+                timer.cancel()
+            process.returncode = os.waitstatus_to_exitcode(status)
+            
+            duration = time.time() - start_time
+            peak_rss = usage.ru_maxrss // stage_runs.RSS_DIVISOR
+            stdout.seek(0)
+            stderr.seek(0)
+            output, errors = stdout.read(), stderr.read()
         
-        if result.returncode == 0:
-            return True, result.stdout, duration
+        if timed_out.is_set():
+            return False, f"Script timed out after {timeout} seconds", duration, peak_rss
+        if process.returncode == 0:
+            return True, output, duration, peak_rss
         else:
-            return False, result.stderr or result.stdout, duration
+            return False, errors or output, duration, peak_rss
             
-    except subprocess.TimeoutExpired:
-        duration = time.time() - start_time
-        return False, f"Script timed out after {timeout} seconds", duration
     except Exception as e:
         duration = time.time() - start_time
-        return False, str(e), duration
+        return False, str(e), duration, None
 
 
-def run_bronze_ingestion(include_high_volume: bool = False) -> Dict:
+def run_dag(scripts: List[str], dependencies: Dict[str, List[str]],
+            run_stage: Callable[[str], Tuple[bool, str, Dict]], max_workers: int = DEFAULT_WORKERS,
+            phase: Optional[str] = None) -> Dict:
     """
-    Run all bronze ingestion scripts.
+    Run scripts as a dependency DAG, starting every ready stage up to max_workers at a time.
+    
+    Ready stages are started in list order. Stages whose dependencies failed are skipped.
+    Dependencies that are not in the list (e.g. missing or excluded scripts) count as satisfied.
+    
+    Args:
+        scripts: Stages to run
+        dependencies: Stage -> stages that must finish first
+        run_stage: Callable returning (success, output, metrics) for a stage, metrics
+            being any of stage_runs.STAGE_RUN_COLUMNS
+        max_workers: Maximum number of concurrent stages
+        phase: Record every stage that ran in ops.stage_runs under this phase
+        
+    Returns:
+        Dict with results summary, per-stage timings and the critical path
+    """
+    deps = {s: [d for d in dependencies.get(s, []) if d in scripts] for s in scripts}
+    results = {"success": 0, "failed": 0, "skipped": 0, "details": []}
+    
+    phase_start = time.time()
+    pending = list(scripts)
+    status: Dict[str, str] = {}
+    timings: Dict[str, Tuple[float, float]] = {}
+    running = {}
+    
+    history_conn = None
+    if phase:
+        try:
+            history_conn = get_db_connection()
+        except Exception as e:
+            logger.warning(f"Stage runs will not be recorded: {e}")
+    
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        while pending or running:
+            # Skip stages whose dependencies failed or were skipped
+            for script in list(pending):
+                if any(status.get(d) in ('failed', 'skipped') for d in deps[script]):
+                    pending.remove(script)
+                    status[script] = 'skipped'
+                    logger.warning(f"  - Skipping {Path(script).name} (dependency did not complete)")
+                    results["skipped"] += 1
+                    results["details"].append({
+                        "script": Path(script).name,
+                        "success": False,
+                        "skipped": True,
+                        "duration": 0.0
+                    })
+            
+            # Start ready stages
+            for script in list(pending):
+                if len(running) >= max_workers:
+                    break
+                if all(status.get(d) == 'success' for d in deps[script]):
+                    pending.remove(script)
+                    logger.info(f"[{len(status) + len(running) + 1}/{len(scripts)}] Running {Path(script).name}...")
+                    future = executor.submit(run_stage, script)
+                    running[future] = (script, time.time())
+            
+            if not running:
+                # Nothing can start: the remaining stages wait on each other
+                for script in pending:
+                    logger.error(f"  ✗ {Path(script).name} has unsatisfiable dependencies")
+                    status[script] = 'failed'
+                    results["failed"] += 1
+                    results["details"].append({
+                        "script": Path(script).name,
+                        "success": False,
+                        "duration": 0.0,
+                        "error": "unsatisfiable dependencies"
+                    })
+                break
+            
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                script, started = running.pop(future)
+                finished = time.time()
+                duration = finished - started
+                try:
+                    success, output, metrics = future.result()
+                except Exception as e:
+                    success, output, metrics = False, str(e), {}
+                
+                if history_conn is not None:
+                    stage_runs.record_stage_run(history_conn, phase, Path(script).name, started, finished,
+                                                success, metrics, None if success else output)
+                
+                timings[script] = (started - phase_start, finished - phase_start)
+                detail = {
+                    "script": Path(script).name,
+                    "success": success,
+                    "duration": duration,
+                    "start_offset": started - phase_start,
+                    "end_offset": finished - phase_start
+                }
+                if success:
+                    logger.info(f"  ✓ {Path(script).name} completed in {duration:.1f}s")
+                    status[script] = 'success'
+                    results["success"] += 1
+                else:
+                    logger.error(f"  ✗ {Path(script).name} failed after {duration:.1f}s")
+                    logger.error(f"    Error: {output[-500:]}")
+                    status[script] = 'failed'
+                    results["failed"] += 1
+                    detail["error"] = output[-500:]
+                results["details"].append(detail)
+    
+    if history_conn is not None:
+        history_conn.close()
+    
+    # Critical path: the chain of dependent stages with the largest summed duration
+    chain_seconds: Dict[str, float] = {}
+    chain_prev: Dict[str, Optional[str]] = {}
+    for script in scripts:
+        if script not in timings:
+            continue
+        start, end = timings[script]
+        prev = max((d for d in deps[script] if d in chain_seconds),
+                   key=lambda d: chain_seconds[d], default=None)
+        chain_seconds[script] = (end - start) + (chain_seconds[prev] if prev else 0.0)
+        chain_prev[script] = prev
+    
+    critical_path = []
+    if chain_seconds:
+        node = max(chain_seconds, key=lambda s: chain_seconds[s])
+        results["critical_path_seconds"] = chain_seconds[node]
+        while node:
+            critical_path.append(Path(node).name)
+            node = chain_prev[node]
+    else:
+        results["critical_path_seconds"] = 0.0
+    results["critical_path"] = list(reversed(critical_path))
+    results["wall_seconds"] = time.time() - phase_start
+    results["stage_seconds"] = sum(end - start for start, end in timings.values())
+    results["workers"] = max_workers
+    
+    logger.info(f"Wall time {results['wall_seconds']:.1f}s for {results['stage_seconds']:.1f}s of stages "
+                f"(critical path {results['critical_path_seconds']:.1f}s: {' → '.join(results['critical_path'])})")
+    
+    return results
+
+
+def existing_scripts(scripts: List[str]) -> Tuple[List[str], int]:
+    """Drop scripts that are missing on disk, returning (present_scripts, missing_count)."""
+    present = []
+    for script in scripts:
+        if Path(script).exists():
+            present.append(script)
+        else:
+            logger.warning(f"  Script not found: {script}")
+    return present, len(scripts) - len(present)
+
+
+def run_bronze_ingestion(include_high_volume: bool = False, max_workers: int = DEFAULT_WORKERS) -> Dict:
+    """
+    Run all bronze ingestion scripts as a dependency DAG.
     
     Returns:
         Dict with results summary
@@ -190,44 +443,33 @@ def run_bronze_ingestion(include_high_volume: bool = False) -> Dict:
     scripts = BRONZE_SCRIPTS.copy()
     if include_high_volume:
         scripts.extend(BRONZE_HIGH_VOLUME_SCRIPTS)
+    scripts, missing = existing_scripts(scripts)
     
-    results = {"success": 0, "failed": 0, "skipped": 0, "details": []}
-    
-    for idx, script in enumerate(scripts, 1):
-        script_name = Path(script).name
-        logger.info(f"[{idx}/{len(scripts)}] Running {script_name}...")
-        
-        if not Path(script).exists():
-            logger.warning(f"  Script not found: {script}")
-            results["skipped"] += 1
-            continue
-        
-        success, output, duration = run_script(script)
-        
+    def run_stage(script: str) -> Tuple[bool, str, Dict]:
+        success, output, _, peak_rss = run_script(script)
         if success:
-            logger.info(f"  ✓ Completed in {duration:.1f}s")
-            results["success"] += 1
             # Extract key info from output
             for line in output.split('\n')[-5:]:
                 if 'inserted' in line.lower() or 'new' in line.lower():
-                    logger.info(f"    {line.strip()}")
-        else:
-            logger.error(f"  ✗ Failed after {duration:.1f}s")
-            logger.error(f"    Error: {output[-500:]}")
-            results["failed"] += 1
-        
-        results["details"].append({
-            "script": script_name,
-            "success": success,
-            "duration": duration
-        })
+                    logger.info(f"    {Path(script).name}: {line.strip()}")
+        return success, output, {"mode": "subprocess", "peak_rss_kb": peak_rss}
     
+    results = run_dag(scripts, BRONZE_DEPENDENCIES, run_stage, max_workers, phase='bronze')
+    results["skipped"] += missing
     return results
 
 
-def run_silver_upserts(include_high_volume: bool = False) -> Dict:
+def run_silver_upserts(include_high_volume: bool = False, in_process: bool = True,
+                       max_workers: int = DEFAULT_WORKERS) -> Dict:
     """
-    Run all silver upsert scripts.
+    Run all silver upsert scripts as a dependency DAG.
+    
+    Args:
+        include_high_volume: Whether to include GPS/telemetry upserts
+        in_process: Run SILVER_SCRIPTS through run_silver_pipeline (shared pool and
+            dimension cache) instead of one subprocess per script. High-volume
+            scripts always run as subprocesses.
+        max_workers: Maximum number of concurrent stages
     
     Returns:
         Dict with results summary
@@ -239,44 +481,56 @@ def run_silver_upserts(include_high_volume: bool = False) -> Dict:
     scripts = SILVER_SCRIPTS.copy()
     if include_high_volume:
         scripts.extend(SILVER_HIGH_VOLUME_SCRIPTS)
+    scripts, missing = existing_scripts(scripts)
     
-    results = {"success": 0, "failed": 0, "skipped": 0, "details": []}
+    pool = None
+    if in_process:
+        import run_silver_pipeline
+        pool = run_silver_pipeline.create_pool(max_size=max(1, max_workers))
+        dims = run_silver_pipeline.DimensionCache()
     
-    for idx, script in enumerate(scripts, 1):
+    def run_stage(script: str) -> Tuple[bool, str, Dict]:
         script_name = Path(script).name
-        logger.info(f"[{idx}/{len(scripts)}] Running {script_name}...")
-        
-        if not Path(script).exists():
-            logger.warning(f"  Script not found: {script}")
-            results["skipped"] += 1
-            continue
-        
-        success, output, duration = run_script(script)
-        
+        if pool is not None and script_name in run_silver_pipeline.STAGES_BY_SCRIPT:
+            upserted = run_silver_pipeline.run_stage(script_name, pool, dims)
+            logger.info(f"    {script_name}: {upserted} rows")
+            return True, "", {
+                "mode": "in-process",
+                "rows_written": upserted,
+            }
+        success, output, _, peak_rss = run_script(script)
         if success:
-            logger.info(f"  ✓ Completed in {duration:.1f}s")
-            results["success"] += 1
             # Extract key info from output
             for line in output.split('\n')[-5:]:
                 if 'upsert' in line.lower() or 'complete' in line.lower():
-                    logger.info(f"    {line.strip()}")
-        else:
-            logger.error(f"  ✗ Failed after {duration:.1f}s")
-            logger.error(f"    Error: {output[-500:]}")
-            results["failed"] += 1
-        
-        results["details"].append({
-            "script": script_name,
-            "success": success,
-            "duration": duration
-        })
+                    logger.info(f"    {script_name}: {line.strip()}")
+        return success, output, {"mode": "subprocess", "peak_rss_kb": peak_rss}
+    
+    try:
+        results = run_dag(scripts, SILVER_DEPENDENCIES, run_stage, max_workers, phase='silver')
+    finally:
+        if pool is not None:
+            pool.close()
     
+    results["skipped"] += missing
     return results
 
 
-def refresh_gold_views() -> Dict:
+def refresh_gold_views(only_if_changed: bool = False, max_workers: int = DEFAULT_WORKERS) -> Dict:
     """
-    Refresh all gold materialized views.
+    Refresh the gold materialized views.
+    
+    Independent views are refreshed at the same time on pooled connections, and views
+    are refreshed without blocking API reads where possible (see gold_refresh.py).
+    
+    After a successful refresh the gold cursor in silver.dirty_session_cursors and the
+    table markers in gold.refresh_source_markers are advanced, so the next change-aware
+    refresh only looks at what changed since.
+    
+    Args:
+        only_if_changed: Only refresh the views whose silver tables changed since the
+            last refresh (gold_refresh.plan_refresh), and the views that read them
+        max_workers: Maximum number of views refreshed at the same time
     
     Returns:
         Dict with results summary
@@ -285,40 +539,33 @@ def refresh_gold_views() -> Dict:
     logger.info("PHASE 3: GOLD VIEW REFRESH")
     logger.info("=" * 60)
     
-    results = {"success": 0, "failed": 0, "details": []}
+    results = {"success": 0, "failed": 0, "skipped": 0, "unchanged": 0, "details": []}
     
     try:
+        import run_silver_pipeline
         conn = get_db_connection()
         
-        for idx, view in enumerate(GOLD_VIEWS, 1):
-            view_name = view.split('.')[-1]
-            logger.info(f"[{idx}/{len(GOLD_VIEWS)}] Refreshing {view_name}...")
-            
-            start_time = time.time()
+        changed_tables, high_water = run_silver_pipeline.read_dirty_sources(conn, GOLD_CONSUMER)
+        views, markers = gold_refresh.plan_refresh(
+            conn, GOLD_VIEWS, changed_tables if only_if_changed else None)
+        results["unchanged"] = len(GOLD_VIEWS) - len(views)
+        
+        if results["unchanged"]:
+            unchanged = [v.split('.')[-1] for v in GOLD_VIEWS if v not in views]
+            logger.info(f"Inputs unchanged since the last refresh, skipping: {', '.join(unchanged)}")
+        
+        if views:
+            pool = gold_refresh.create_pool(max(1, max_workers))
             try:
-                with conn.cursor() as cur:
-                    cur.execute(f"REFRESH MATERIALIZED VIEW {view}")
-                    conn.commit()
-                
-                duration = time.time() - start_time
-                logger.info(f"  ✓ Refreshed in {duration:.1f}s")
-                results["success"] += 1
-                results["details"].append({
-                    "view": view_name,
-                    "success": True,
-                    "duration": duration
-                })
-                
-            except Exception as e:
-                duration = time.time() - start_time
-                logger.error(f"  ✗ Failed: {e}")
-                results["failed"] += 1
-                results["details"].append({
-                    "view": view_name,
-                    "success": False,
-                    "duration": duration,
-                    "error": str(e)
-                })
+                results.update(gold_refresh.refresh_views(pool, views, max_workers=max_workers))
+            finally:
+                pool.close()
+        
+        if results["failed"] == 0 and results["skipped"] == 0:
+            gold_refresh.save_markers(conn, markers)
+            run_silver_pipeline.advance_dirty_cursor(conn, GOLD_CONSUMER, high_water)
+            pruned = run_silver_pipeline.prune_dirty_sessions(conn)
+            logger.info(f"Pruned {pruned} processed dirty-session entries")
         
         conn.close()
         
@@ -367,12 +614,15 @@ def get_database_stats() -> Dict:
         return {}
 
 
-def run_full_pipeline(include_high_volume: bool = False) -> Dict:
+def run_full_pipeline(include_high_volume: bool = False, silver_in_process: bool = True,
+                      max_workers: int = DEFAULT_WORKERS) -> Dict:
     """
     Run the complete ETL pipeline.
     
     Args:
         include_high_volume: Whether to include GPS/telemetry data
+        silver_in_process: Run silver upserts in-process (see run_silver_upserts)
+        max_workers: Maximum number of concurrent bronze/silver stages and gold views
         
     Returns:
         Dict with complete results
@@ -402,19 +652,19 @@ def run_full_pipeline(include_high_volume: bool = False) -> Dict:
     }
     
     # Phase 1: Bronze
-    bronze_results = run_bronze_ingestion(include_high_volume)
+    bronze_results = run_bronze_ingestion(include_high_volume, max_workers)
     results["phases"]["bronze"] = bronze_results
     logger.info(f"Bronze: {bronze_results['success']} succeeded, {bronze_results['failed']} failed")
     logger.info("")
     
     # Phase 2: Silver
-    silver_results = run_silver_upserts(include_high_volume)
+    silver_results = run_silver_upserts(include_high_volume, silver_in_process, max_workers)
     results["phases"]["silver"] = silver_results
     logger.info(f"Silver: {silver_results['success']} succeeded, {silver_results['failed']} failed")
     logger.info("")
     
     # Phase 3: Gold
-    gold_results = refresh_gold_views()
+    gold_results = refresh_gold_views(only_if_changed=True, max_workers=max_workers)
     results["phases"]["gold"] = gold_results
     logger.info(f"Gold: {gold_results['success']} succeeded, {gold_results['failed']} failed")
     logger.info("")
@@ -464,6 +714,7 @@ Examples:
   python3 update_database.py --skip-high-volume # Skip GPS/telemetry
   python3 update_database.py --bronze-only      # Only bronze ingestion
   python3 update_database.py --gold-only        # Only refresh gold views
+  python3 update_database.py --gold-only --all-gold-views
         """
     )
     
@@ -482,6 +733,11 @@ Examples:
         action='store_true',
         help='Only refresh gold views'
     )
+    parser.add_argument(
+        '--all-gold-views',
+        action='store_true',
+        help='Refresh every gold view, not only those whose silver inputs changed'
+    )
     parser.add_argument(
         '--skip-high-volume',
         action='store_true',
@@ -492,6 +748,17 @@ Examples:
         action='store_true',
         help='Include GPS and telemetry data (slower)'
     )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f'Maximum concurrent bronze/silver stages and gold views (default {DEFAULT_WORKERS}, 1 = sequential)'
+    )
+    parser.add_argument(
+        '--silver-subprocess',
+        action='store_true',
+        help='Run each silver upsert script as its own subprocess instead of in-process'
+    )
     parser.add_argument(
         '--json',
         action='store_true',
@@ -503,13 +770,14 @@ Examples:
     include_high_volume = args.include_high_volume and not args.skip_high_volume
     
     if args.bronze_only:
-        results = {"phases": {"bronze": run_bronze_ingestion(include_high_volume)}}
+        results = {"phases": {"bronze": run_bronze_ingestion(include_high_volume, args.workers)}}
     elif args.silver_only:
-        results = {"phases": {"silver": run_silver_upserts(include_high_volume)}}
+        results = {"phases": {"silver": run_silver_upserts(include_high_volume, not args.silver_subprocess,
+                                                           args.workers)}}
     elif args.gold_only:
-        results = {"phases": {"gold": refresh_gold_views()}}
+        results = {"phases": {"gold": refresh_gold_views(not args.all_gold_views, args.workers)}}
     else:
-        results = run_full_pipeline(include_high_volume)
+        results = run_full_pipeline(include_high_volume, not args.silver_subprocess, args.workers)
     
     if args.json:
         print(json.dumps(results, indent=2, default=str))